@@ -60,8 +60,35 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'makeReports.signals.audit.SignalAuditMiddleware',
 ]
 
+# Records the queries and writes caused by signal receivers in each request,
+# shown to the AAC on the signal audit page
+SIGNAL_AUDIT = os.environ.get("SIGNAL_AUDIT", "False") == "True"
+
+# Number of graphs each worker draws at once, beyond which graph requests wait
+GRAPH_RENDER_CONCURRENCY = int(os.environ.get("GRAPH_RENDER_CONCURRENCY", "2"))
+
+# Number of processes each worker starts to draw batches of graphs in parallel, 0 to draw them in the worker
+GRAPH_RENDER_PROCESSES = int(os.environ.get("GRAPH_RENDER_PROCESSES", "2"))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'makeReports': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 ROOT_URLCONF = 'AACForm.urls'
 
 TEMPLATES = [
@@ -142,6 +169,15 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_ROOT = os.path.join(BASE_DIR,'media')
 MEDIA_URL = '/media/'
 
+# Directory the files of exports run in the background are written to, which is not served publicly
+EXPORT_ROOT = os.path.join(BASE_DIR,'exports')
+
+# Exports with more rows than this are run in the background and downloaded from the CSV page when done
+EXPORT_JOB_ROWS = int(os.environ.get("EXPORT_JOB_ROWS", "20000"))
+
+# SQLite database of the assessment results for analysts, written by the build_warehouse command
+WAREHOUSE_PATH = os.environ.get("WAREHOUSE_PATH", os.path.join(EXPORT_ROOT,'warehouse.sqlite3'))
+
 
 f = open(os.path.join(BASE_DIR,'gd_cred2.json'),'w')
 f.write(os.environ['GD_KEY'])
@@ -0,0 +1,15 @@
+"""
+Configuration of the makeReports application
+"""
+from django.apps import AppConfig
+
+class MakeReportsConfig(AppConfig):
+    """
+    Application configuration, which connects the signal receivers once models are loaded
+    """
+    name = 'makeReports'
+    def ready(self):
+        """
+        Imports the signals so the receivers are connected
+        """
+        import makeReports.signals
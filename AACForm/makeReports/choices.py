@@ -32,6 +32,11 @@ SLO_STATUS_CHOICES = (
     ("Partially Met", "Partially Met"), 
     ("Not Met", "Not Met"), 
     ("Unknown", "Unknown"))
+EXPORT_JOB_STATUS_CHOICES = (
+    ("pending", "Pending"),
+    ("running", "Running"),
+    ("done", "Done"),
+    ("failed", "Failed"))
 FREQUENCY_CHOICES = (
     ("S","Once/semester"),
     ("Y","Once/year"),
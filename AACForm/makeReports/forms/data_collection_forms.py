@@ -1,9 +1,12 @@
 """
 File contains forms related to inputting data points
 """
+import csv
+import io
 from django import forms
+from django.core.exceptions import ValidationError
 from django_summernote.widgets import SummernoteWidget
-from makeReports.models import AssessmentAggregate
+from makeReports.models import AssessmentAggregate, AssessmentData
 from makeReports.choices import SLO_STATUS_CHOICES
 from .cleaners import CleanSummer
 
@@ -16,6 +19,97 @@ class AddDataCollection(forms.Form):
     numberStudents = forms.IntegerField(widget= forms.NumberInput(attrs={'class':'form-control col-3'}), label="Number of Students Sampled")
     overallProficient = forms.IntegerField(widget= forms.NumberInput(attrs={'class':'form-control col-2','addon_after':'%','placeholder':'Percentage'}), label="Percentage of Students who Met/Exceeded Threshold Proficiency")
 
+class UploadDataCollection(forms.Form):
+    """
+    Form to upload many data points at once from a CSV file
+    """
+    HEADER = ["SLO", "Measure", "Data Range", "Number of Students", "Percentage Proficient"]
+    MAX_ROWS = 1000
+    dataFile = forms.FileField(label="CSV File of Data")
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes form, setting the assessments data can be added to
+
+        Keyword Args:
+            assessments (QuerySet): assessments (:class:`~makeReports.models.assessment_models.AssessmentVersion`) in the report
+        """
+        self.assessments = kwargs.pop('assessments',None)
+        super(UploadDataCollection, self).__init__(*args, **kwargs)
+    def clean_dataFile(self):
+        """
+        Validates every row of the file before any data is added, rejecting rows whose SLO, measure
+        and data range repeat another row's or match data already in the report
+
+        Returns:
+            list : unsaved data points (:class:`~makeReports.models.data_models.AssessmentData`) in the file
+        Raises:
+            ValidationError : listing every problem found in the file
+        """
+        dataFile = self.cleaned_data['dataFile']
+        #the form may be cleaned again for the same upload, such as when re-rendered with errors
+        dataFile.seek(0)
+        try:
+            text = dataFile.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValidationError("The file must be a CSV file saved with UTF-8 encoding")
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, [])
+        if [h.strip().lower() for h in header] != [h.lower() for h in self.HEADER]:
+            raise ValidationError("The first row must be the column names: "+", ".join(self.HEADER))
+        byNumber = {
+            (a.slo.number, a.number): a for a in self.assessments.select_related('slo')
+        }
+        existing = set(AssessmentData.objects.filter(
+            assessmentVersion__in=self.assessments).values_list('assessmentVersion', 'dataRange'))
+        seen = {}
+        errors = []
+        data = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            line = reader.line_num
+            if len(data) >= self.MAX_ROWS:
+                raise ValidationError("At most "+str(self.MAX_ROWS)+" rows can be uploaded at once")
+            if len(row) != len(self.HEADER):
+                errors.append("Line "+str(line)+": expected "+str(len(self.HEADER))+" columns")
+                continue
+            slo, measure, dataRange, students, proficient = [cell.strip() for cell in row]
+            try:
+                slo, measure, students, proficient = int(slo), int(measure), int(students), int(proficient)
+            except ValueError:
+                errors.append("Line "+str(line)+": SLO, measure, number of students and percentage must be whole numbers")
+                continue
+            assessment = byNumber.get((slo, measure))
+            if assessment is None:
+                errors.append("Line "+str(line)+": there is no measure "+str(measure)+" for SLO "+str(slo)+" in this report")
+            if not dataRange or len(dataRange) > 500:
+                errors.append("Line "+str(line)+": the data range must be between 1 and 500 characters")
+            if students < 0:
+                errors.append("Line "+str(line)+": the number of students cannot be negative")
+            if proficient < 0 or proficient > 100:
+                errors.append("Line "+str(line)+": the percentage proficient must be between 0 and 100")
+            if assessment is not None and (assessment.pk, dataRange) in existing:
+                errors.append("Line "+str(line)+": there is already data for measure "+str(measure)+" of SLO "+str(slo)+
+                    " with the data range "+dataRange+", edit it instead")
+                continue
+            if (slo, measure, dataRange) in seen:
+                errors.append("Line "+str(line)+": repeats the SLO, measure and data range of line "+
+                    str(seen[(slo, measure, dataRange)]))
+                continue
+            seen[(slo, measure, dataRange)] = line
+            if assessment is not None:
+                data.append(AssessmentData(
+                    assessmentVersion=assessment,
+                    dataRange=dataRange,
+                    numberStudents=students,
+                    overallProficient=proficient
+                ))
+        if errors:
+            raise ValidationError(errors)
+        if not data:
+            raise ValidationError("The file does not contain any data")
+        return data
+
 class SLOStatusForm(forms.Form):
     """
     Form to update SLO status
@@ -0,0 +1,32 @@
+"""
+Management command to write the SQLite warehouse of the assessment results, meant to be run nightly such as by a scheduler
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from makeReports.views.helperFunctions.warehouse import WAREHOUSE_BATCH_SIZE, build_warehouse
+
+class Command(BaseCommand):
+    """
+    Writes the star schema database of :mod:`makeReports.views.helperFunctions.warehouse`, refreshing only
+    the rows changed since the last run unless it is missing, has an older schema or a full build is asked for
+    """
+    help = "Writes or refreshes the SQLite warehouse of assessment results"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the command
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--path', default=settings.WAREHOUSE_PATH, help="path of the database file")
+        parser.add_argument('--full', action='store_true', help="rebuild the whole database")
+        parser.add_argument('--batch-size', type=int, default=WAREHOUSE_BATCH_SIZE,
+            help="number of rows fetched and inserted at a time")
+    def handle(self, *args, **options):
+        """
+        Writes the database and reports the rows written to each table
+        """
+        counts = build_warehouse(options['path'], options['full'], options['batch_size'])
+        for table, count in counts.items():
+            self.stdout.write("%s: %d" % (table, count))
+        self.stdout.write("Wrote the warehouse to %s" % options['path'])
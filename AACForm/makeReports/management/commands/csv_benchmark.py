@@ -0,0 +1,74 @@
+"""
+Management command to compare the speed of the ways the CSV export can fetch its rows
+"""
+import hashlib
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from makeReports.models import AssessmentData, AssessmentOutcome, AssessmentVersion
+from makeReports.signals.analytics_signals import rebuild_outcomes
+from makeReports.views.graphing_views import OutputCSVDepartment
+
+class Command(BaseCommand):
+    """
+    Benchmark which adds data points to the existing assessments, exports every data point as the department
+    CSV does, once as model objects and once with values_list, and then removes the data points again
+
+    Notes:
+        The data points are added within a transaction which is rolled back, so the benchmark can be run against
+        a copy of the production database. Both exports are checked to give the same file.
+    """
+    help = "Times the CSV export of many data points as model objects and with values_list"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the benchmark
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--rows', type=int, default=100000, help="number of data points to add")
+        parser.add_argument('--batch-size', type=int, default=5000, help="number of data points inserted at a time")
+    def export(self, useValuesList):
+        """
+        Exports every data point
+
+        Args:
+            useValuesList (bool): whether to fetch the rows with values_list
+        Returns:
+            tuple : seconds taken, number of lines and hash of the file
+        """
+        view = OutputCSVDepartment()
+        view.use_values_list = useValuesList
+        queryset = AssessmentOutcome.objects.order_by('data')
+        digest = hashlib.sha1()
+        lines = 0
+        start = time.perf_counter()
+        for line in view.iter_rows(queryset, view.get_fields(queryset)):
+            digest.update(line.encode())
+            lines += 1
+        return time.perf_counter()-start, lines, digest.hexdigest()
+    def handle(self, *args, **options):
+        """
+        Adds the data points, times the exports and rolls the data points back
+        """
+        versions = list(AssessmentVersion.objects.values_list('pk', flat=True)[:1000])
+        if not versions:
+            raise CommandError("There must be at least one assessment to add data points to")
+        with transaction.atomic():
+            AssessmentData.objects.bulk_create([
+                AssessmentData(
+                    assessmentVersion_id=versions[i % len(versions)],
+                    dataRange="Benchmark %d" % i,
+                    numberStudents=i % 200,
+                    overallProficient=i % 101
+                ) for i in range(options['rows'])
+            ], batch_size=options['batch_size'])
+            #bulk_create sends no signals, so the analytics rows are built here
+            rebuild_outcomes(options['batch_size'])
+            objectTime, lines, objectHash = self.export(False)
+            valuesTime, _, valuesHash = self.export(True)
+            transaction.set_rollback(True)
+        self.stdout.write("Model objects: %.2f s, values_list: %.2f s for %d lines (%.1fx faster)" % (
+            objectTime, valuesTime, lines, objectTime/max(valuesTime, 1e-9)))
+        if objectHash != valuesHash:
+            raise CommandError("The exports differ")
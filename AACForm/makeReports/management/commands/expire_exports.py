@@ -0,0 +1,26 @@
+"""
+Management command to delete old export jobs and their files, meant to be run periodically such as by a scheduler
+"""
+from django.core.management.base import BaseCommand
+from makeReports.views.helperFunctions.export_jobs import delete_old_exports
+
+class Command(BaseCommand):
+    """
+    Deletes the :class:`~makeReports.models.data_models.ExportJob` objects older than the given age,
+    along with their files
+    """
+    help = "Deletes old export jobs and their files"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the command
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--days', type=int, default=7, help="age in days beyond which jobs are deleted")
+    def handle(self, *args, **options):
+        """
+        Deletes the old jobs
+        """
+        deleted = delete_old_exports(options['days'])
+        self.stdout.write("Deleted %d export jobs" % deleted)
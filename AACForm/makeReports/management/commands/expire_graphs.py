@@ -0,0 +1,28 @@
+"""
+Management command to delete expired graphs, meant to be run periodically such as by a scheduler
+"""
+from django.core.management.base import BaseCommand
+from makeReports.views.helperFunctions.graph_store import GRAPH_EXPIRY_MINUTES, delete_expired_graphs
+
+class Command(BaseCommand):
+    """
+    Deletes the :class:`~makeReports.models.data_models.Graph` objects older than the expiry time,
+    which the graph API no longer does itself
+    """
+    help = "Deletes graphs older than the expiry time"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the command
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--minutes', type=int, default=GRAPH_EXPIRY_MINUTES,
+            help="age in minutes beyond which graphs are deleted")
+        parser.add_argument('--batch-size', type=int, default=500, help="number of graphs deleted at a time")
+    def handle(self, *args, **options):
+        """
+        Deletes the expired graphs
+        """
+        deleted = delete_expired_graphs(options['minutes'], options['batch_size'])
+        self.stdout.write("Deleted %d expired graphs" % deleted)
@@ -0,0 +1,84 @@
+"""
+Management command to check the memory of a worker stays flat while drawing many graphs
+"""
+import threading
+import time
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from makeReports.views.helperFunctions.graph_rendering import render_bar_graph
+
+def current_rss():
+    """
+    Gets the resident memory of this process
+
+    Returns:
+        int : resident memory in kilobytes
+    """
+    import resource
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1])*resource.getpagesize()//1024
+    except OSError:
+        #peak rather than current memory where /proc is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class Command(BaseCommand):
+    """
+    Soak benchmark which draws graphs of random data from several threads, as a gunicorn worker would,
+    and reports the resident memory as it goes
+    """
+    help = "Draws many graphs and reports whether the memory of the process grows"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the benchmark
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--graphs', type=int, default=2000, help="number of graphs to draw")
+        parser.add_argument('--threads', type=int, default=4, help="number of threads requesting graphs")
+        parser.add_argument('--format', default='png', help="image format to draw the graphs in")
+        parser.add_argument('--every', type=int, default=250, help="number of graphs between memory reports")
+        parser.add_argument('--max-growth', type=int,
+            help="fail if memory grows by more than this many megabytes after the first report")
+    def handle(self, *args, **options):
+        """
+        Draws the graphs and reports the memory
+        """
+        years = list(range(2010, 2020))
+        columns = ['Met', 'Partially Met', 'Not Met', 'Unknown']
+        remaining = [options['graphs']]
+        lock = threading.Lock()
+        samples = []
+        start = time.perf_counter()
+        def work():
+            rng = np.random.RandomState()
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                    done = options['graphs']-remaining[0]
+                df = pd.DataFrame(rng.rand(len(years), len(columns)), columns=columns)
+                df.insert(0, 'Year', years)
+                render_bar_graph(df, columns, options['format'])
+                if done % options['every'] == 0:
+                    rss = current_rss()
+                    with lock:
+                        samples.append(rss)
+                    self.stdout.write("%d graphs: %d KB resident" % (done, rss))
+        threads = [threading.Thread(target=work) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter()-start
+        end = current_rss()
+        growth = end-samples[0] if samples else 0
+        self.stdout.write(
+            "Drew %d graphs in %.1f s (%.1f ms each), memory grew %d KB after the first report" % (
+                options['graphs'], elapsed, elapsed*1000/max(options['graphs'], 1), growth)
+        )
+        if options['max_growth'] is not None and growth > options['max_growth']*1024:
+            raise CommandError("Memory grew by more than %d MB" % options['max_growth'])
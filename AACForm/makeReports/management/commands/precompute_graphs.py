@@ -0,0 +1,86 @@
+"""
+Management command to draw the standard graphs ahead of time, meant to be run nightly such as by a scheduler
+"""
+import json
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from makeReports.models import DegreeProgram, Department, Graph, Report, SLOInReport
+from makeReports.views.API.graphAPI import GRAPH_FORMATS, draw_graphs, graph_parameters_key, graph_revision
+
+class Command(BaseCommand):
+    """
+    Draws the degree program success graph of every active department and the SLO status graph of every
+    active degree program, for windows of years ending at the latest year, so the graph API can serve them
+    without drawing them
+
+    Notes:
+        The SLO status graphs weigh every SLO equally, as the graphing pages do unless the weights are changed.
+        Each graph is keyed by the revision of its own data, so it is served until that data changes, and
+        every graph is kept until the command is run again and replaces them.
+    """
+    help = "Draws the standard graph of every department and degree program ahead of time"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the command
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--windows', nargs='+', type=int, default=[3, 5],
+            help="numbers of years to graph, ending at the last year")
+        parser.add_argument('--end-year', type=int, help="last year graphed, the year of the latest report by default")
+        parser.add_argument('--format', default='png', choices=list(GRAPH_FORMATS), help="image format to draw the graphs in")
+    def handle(self, *args, **options):
+        """
+        Draws the graphs and replaces the previously precomputed graphs with them
+        """
+        start = timezone.now()
+        imageFormat = options['format']
+        endYear = options['end_year'] or Report.objects.aggregate(Max('year'))['year__max']
+        if endYear is None:
+            self.stdout.write("No reports to graph")
+            return
+        departments = list(Department.active_objects.filter(degreeprogram__active=True).distinct().values_list('pk', flat=True))
+        programs = list(DegreeProgram.active_objects.values_list('pk', flat=True))
+        specs = []
+        for window in options['windows']:
+            bYear = endYear-window+1
+            for dept in departments:
+                specs.append({
+                    'decision': '3',
+                    'report__degreeProgram__department': dept,
+                    'report__year__gte': bYear,
+                    'report__year__lte': endYear
+                })
+            #the SLOs the graphing page would weigh, in one query for every program
+            slos = {}
+            for dp, slo in SLOInReport.objects.filter(
+                report__year__gte=bYear, report__year__lte=endYear, report__degreeProgram__in=programs
+                ).values_list('report__degreeProgram', 'slo').distinct():
+                slos.setdefault(dp, {})[str(slo)] = 1
+            for dp in programs:
+                specs.append({
+                    'decision': '2',
+                    'report__degreeProgram': dp,
+                    'report__year__gte': bYear,
+                    'report__year__lte': endYear,
+                    'sloWeights': json.dumps(slos.get(dp, {}))
+                })
+        #revisions are read before drawing, so data changed while drawing is drawn again on request
+        keyed = {graph_parameters_key(dict(spec, format=imageFormat), graph_revision(spec)): spec for spec in specs}
+        images = draw_graphs(list(keyed.items()), imageFormat)
+        with transaction.atomic():
+            Graph.objects.bulk_create([
+                Graph(
+                    dateTime=start,
+                    parameters=key,
+                    image=image,
+                    contentType=GRAPH_FORMATS[imageFormat],
+                    precomputed=True
+                ) for key, image in images.items()
+            ], batch_size=100)
+            Graph.objects.filter(precomputed=True, dateTime__lt=start).delete()
+        self.stdout.write("Precomputed %d graphs for %d departments and %d degree programs" % (
+            len(images), len(departments), len(programs)))
@@ -0,0 +1,26 @@
+"""
+Management command to rebuild the analytics table from the data, such as after bulk imports which send no signals
+"""
+from django.core.management.base import BaseCommand
+from makeReports.signals.analytics_signals import rebuild_outcomes
+
+class Command(BaseCommand):
+    """
+    Rewrites every row of :class:`~makeReports.models.data_models.AssessmentOutcome` from the data points
+    and the objects they are joined through
+    """
+    help = "Rebuilds the analytics table of assessment outcomes"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the command
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--batch-size', type=int, default=5000, help="number of rows built by each query")
+    def handle(self, *args, **options):
+        """
+        Rebuilds the table
+        """
+        written = rebuild_outcomes(options['batch_size'])
+        self.stdout.write("Rebuilt %d analytics rows" % written)
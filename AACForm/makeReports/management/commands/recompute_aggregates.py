@@ -0,0 +1,50 @@
+"""
+Management command to recompute assessment aggregates and SLO statuses in bulk
+"""
+from django.core.management.base import BaseCommand
+from makeReports.views.helperFunctions.aggregates import AggregateRecompute, reports_in_scope
+
+class Command(BaseCommand):
+    """
+    Rebuilds :class:`~makeReports.models.data_models.AssessmentAggregate` and
+    :class:`~makeReports.models.data_models.SLOStatus` for the chosen years, colleges or reports
+
+    Notes:
+        Overridden aggregates and statuses are not changed unless --clear-overrides is given
+    """
+    help = "Recomputes assessment aggregates and SLO statuses that have not been overridden"
+    def add_arguments(self, parser):
+        """
+        Adds the options limiting which reports are recomputed
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--years', nargs='+', type=int, help="years of reports to recompute")
+        parser.add_argument('--colleges', nargs='+', type=int, help="primary keys of colleges to recompute")
+        parser.add_argument('--reports', nargs='+', type=int, help="primary keys of reports to recompute")
+        parser.add_argument('--clear-overrides', action='store_true',
+            help="clear overrides and reset every aggregate and status to its computed value")
+        parser.add_argument('--dry-run', action='store_true', help="show the changes without saving them")
+    def handle(self, *args, **options):
+        """
+        Recomputes the aggregates and statuses, then saves them or shows the changes
+        """
+        reports = reports_in_scope(options['years'], options['colleges'], options['reports'])
+        recompute = AggregateRecompute(reports, clearOverrides=options['clear_overrides'])
+        changes = recompute.compute()
+        if options['dry_run']:
+            for change in changes.itertuples(index=False):
+                if change.old is None:
+                    self.stdout.write("create %s for %s: %s" % (change.model, change.pk, change.new))
+                else:
+                    self.stdout.write("update %s %s: %s -> %s" % (change.model, change.pk, change.old, change.new))
+        else:
+            recompute.save()
+        self.stdout.write(
+            "%s %d aggregates created, %d aggregates updated, %d statuses created, %d statuses updated" % (
+                "Would have:" if options['dry_run'] else "Done:",
+                len(recompute.newAggs), len(recompute.changedAggs),
+                len(recompute.newStatuses), len(recompute.changedStatuses)
+            )
+        )
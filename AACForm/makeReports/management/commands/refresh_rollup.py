@@ -0,0 +1,27 @@
+"""
+Management command to refresh the rollup cube of outcomes, meant to be run periodically such as by a scheduler
+"""
+from django.core.management.base import BaseCommand
+from makeReports.views.helperFunctions.rollup import refresh_rollup
+
+class Command(BaseCommand):
+    """
+    Recomputes the slices of :class:`~makeReports.models.data_models.OutcomeRollup` whose data changed since
+    the last refresh, or the whole cube if it is empty or a full refresh is asked for
+    """
+    help = "Refreshes the rollup cube of SLO and assessment outcomes"
+    def add_arguments(self, parser):
+        """
+        Adds the options of the command
+
+        Args:
+            parser (ArgumentParser): parser of command line arguments
+        """
+        parser.add_argument('--full', action='store_true',
+            help="recompute the whole cube, such as after assessments, SLOs or programs are changed")
+    def handle(self, *args, **options):
+        """
+        Refreshes the cube
+        """
+        slices, cells = refresh_rollup(options['full'])
+        self.stdout.write("Recomputed %d slices with %d cells" % (slices, cells))
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('makeReports', '0007_auto_20201112_0802'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graph',
+            name='parameters',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.0.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import gdstorage.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('makeReports', '0008_graph_parameters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graph',
+            name='contentType',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='graph',
+            name='image',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AlterField(
+            model_name='graph',
+            name='graph',
+            field=models.FileField(blank=True, storage=gdstorage.storage.GoogleDriveStorage(), upload_to='data/graphs'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('makeReports', '0009_graph_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graph',
+            name='precomputed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.0.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import makeReports.models.basic_models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('makeReports', '0010_graph_precomputed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=200)),
+                ('fileFormat', models.CharField(max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('artifact', models.FileField(blank=True, storage=makeReports.models.basic_models.ExportStorage(), upload_to='')),
+                ('error', models.TextField(blank=True, default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('parameters', models.CharField(blank=True, db_index=True, default='', max_length=40)),
+            ],
+        ),
+    ]
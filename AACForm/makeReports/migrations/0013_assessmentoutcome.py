@@ -0,0 +1,124 @@
+# Generated by Django 3.0.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+COLUMNS = (
+    ('data_id', 'pk'),
+    ('year', 'assessmentVersion__report__year'),
+    ('college', 'assessmentVersion__report__degreeProgram__department__college'),
+    ('collegeName', 'assessmentVersion__report__degreeProgram__department__college__name'),
+    ('department', 'assessmentVersion__report__degreeProgram__department'),
+    ('departmentName', 'assessmentVersion__report__degreeProgram__department__name'),
+    ('degreeProgram', 'assessmentVersion__report__degreeProgram'),
+    ('degreeProgramName', 'assessmentVersion__report__degreeProgram__name'),
+    ('level', 'assessmentVersion__report__degreeProgram__level'),
+    ('report', 'assessmentVersion__report'),
+    ('sloIR', 'assessmentVersion__slo'),
+    ('goalText', 'assessmentVersion__slo__goalText'),
+    ('sloChangedFromPrior', 'assessmentVersion__slo__changedFromPrior'),
+    ('slo', 'assessmentVersion__slo__slo'),
+    ('blooms', 'assessmentVersion__slo__slo__blooms'),
+    ('status', 'assessmentVersion__slo__slostatus__status'),
+    ('assessment', 'assessmentVersion__assessment'),
+    ('title', 'assessmentVersion__assessment__title'),
+    ('domainExamination', 'assessmentVersion__assessment__domainExamination'),
+    ('domainProduct', 'assessmentVersion__assessment__domainProduct'),
+    ('domainPerformance', 'assessmentVersion__assessment__domainPerformance'),
+    ('directMeasure', 'assessmentVersion__assessment__directMeasure'),
+    ('assessmentVersion', 'assessmentVersion'),
+    ('aggregate_proficiency', 'assessmentVersion__assessmentaggregate__aggregate_proficiency'),
+    ('met', 'assessmentVersion__assessmentaggregate__met'),
+    ('date', 'assessmentVersion__date'),
+    ('description', 'assessmentVersion__description'),
+    ('finalTerm', 'assessmentVersion__finalTerm'),
+    ('where', 'assessmentVersion__where'),
+    ('allStudents', 'assessmentVersion__allStudents'),
+    ('sampleDescription', 'assessmentVersion__sampleDescription'),
+    ('frequencyChoice', 'assessmentVersion__frequencyChoice'),
+    ('frequency', 'assessmentVersion__frequency'),
+    ('threshold', 'assessmentVersion__threshold'),
+    ('target', 'assessmentVersion__target'),
+    ('changedFromPrior', 'assessmentVersion__changedFromPrior'),
+    ('dataRange', 'dataRange'),
+    ('numberStudents', 'numberStudents'),
+    ('overallProficient', 'overallProficient'),
+)
+
+def fill_outcomes(apps, schema_editor):
+    """
+    Builds the analytics row of every existing data point
+    """
+    AssessmentData = apps.get_model('makeReports', 'AssessmentData')
+    AssessmentOutcome = apps.get_model('makeReports', 'AssessmentOutcome')
+    names = [name for name, _ in COLUMNS]
+    lastPk = 0
+    while True:
+        rows = [
+            AssessmentOutcome(**dict(zip(names, values)))
+            for values in AssessmentData.objects.filter(pk__gt=lastPk).order_by('pk')[:5000].values_list(
+                *[lookup for _, lookup in COLUMNS])
+        ]
+        if not rows:
+            return
+        AssessmentOutcome.objects.bulk_create(rows, batch_size=500)
+        lastPk = rows[-1].data_id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('makeReports', '0012_change_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentOutcome',
+            fields=[
+                ('data', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='makeReports.AssessmentData', verbose_name='ID')),
+                ('year', models.PositiveIntegerField(db_index=True)),
+                ('college', models.IntegerField(db_index=True)),
+                ('collegeName', models.CharField(max_length=100, verbose_name='college name')),
+                ('department', models.IntegerField(db_index=True)),
+                ('departmentName', models.CharField(max_length=100, verbose_name='name')),
+                ('degreeProgram', models.IntegerField(db_index=True, verbose_name='degree program')),
+                ('degreeProgramName', models.CharField(max_length=100, verbose_name='name')),
+                ('level', models.CharField(choices=[('UG', 'Undergraduate'), ('GR', 'Graduate')], max_length=75)),
+                ('report', models.IntegerField()),
+                ('sloIR', models.IntegerField(verbose_name='SLO in report')),
+                ('goalText', models.CharField(max_length=1000, verbose_name='goal text')),
+                ('sloChangedFromPrior', models.BooleanField(verbose_name='changed from prior version')),
+                ('slo', models.IntegerField(verbose_name='SLO')),
+                ('blooms', models.CharField(choices=[('', '------'), ('KN', 'Knowledge'), ('CO', 'Comprehension'), ('AP', 'Application'), ('AN', 'Analysis'), ('SN', 'Synthesis'), ('EV', 'Evaluation')], max_length=50, verbose_name="Bloom's taxonomy level")),
+                ('status', models.CharField(choices=[('Met', 'Met'), ('Partially Met', 'Partially Met'), ('Not Met', 'Not Met'), ('Unknown', 'Unknown')], max_length=50, null=True)),
+                ('assessment', models.IntegerField()),
+                ('title', models.CharField(max_length=300)),
+                ('domainExamination', models.BooleanField(verbose_name='examination domain')),
+                ('domainProduct', models.BooleanField(verbose_name='product domain')),
+                ('domainPerformance', models.BooleanField(verbose_name='performance domain')),
+                ('directMeasure', models.BooleanField(verbose_name='direct measure')),
+                ('assessmentVersion', models.IntegerField(verbose_name='assessment version')),
+                ('aggregate_proficiency', models.PositiveIntegerField(null=True, verbose_name='aggregate proficiency percentage')),
+                ('met', models.BooleanField(null=True, verbose_name='target met')),
+                ('date', models.DateField()),
+                ('description', models.CharField(max_length=1000)),
+                ('finalTerm', models.BooleanField(verbose_name='final term')),
+                ('where', models.CharField(max_length=500, verbose_name='location of assessment')),
+                ('allStudents', models.BooleanField(verbose_name='all students assessed')),
+                ('sampleDescription', models.CharField(max_length=500, null=True, verbose_name='description of sample')),
+                ('frequencyChoice', models.CharField(choices=[('S', 'Once/semester'), ('Y', 'Once/year'), ('O', 'Other')], max_length=100, verbose_name='frequency choice')),
+                ('frequency', models.CharField(max_length=500)),
+                ('threshold', models.CharField(max_length=500)),
+                ('target', models.PositiveIntegerField()),
+                ('changedFromPrior', models.BooleanField(verbose_name='changed from prior version')),
+                ('dataRange', models.CharField(max_length=500, verbose_name='data range')),
+                ('numberStudents', models.PositiveIntegerField(verbose_name='number of students')),
+                ('overallProficient', models.PositiveIntegerField(null=True, verbose_name='overall percentage proficient')),
+                ('updatedAt', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'assessment data',
+            },
+        ),
+        migrations.RunPython(fill_outcomes, migrations.RunPython.noop),
+    ]
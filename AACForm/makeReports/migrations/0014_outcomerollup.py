@@ -0,0 +1,39 @@
+# Generated by Django 3.0.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('makeReports', '0013_assessmentoutcome'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutcomeRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('college', models.IntegerField(db_index=True)),
+                ('department', models.IntegerField()),
+                ('level', models.CharField(choices=[('UG', 'Undergraduate'), ('GR', 'Graduate')], max_length=75)),
+                ('blooms', models.CharField(choices=[('', '------'), ('KN', 'Knowledge'), ('CO', 'Comprehension'), ('AP', 'Application'), ('AN', 'Analysis'), ('SN', 'Synthesis'), ('EV', 'Evaluation')], max_length=50, verbose_name="Bloom's taxonomy level")),
+                ('directMeasure', models.BooleanField(null=True, verbose_name='direct measure')),
+                ('status', models.CharField(choices=[('Met', 'Met'), ('Partially Met', 'Partially Met'), ('Not Met', 'Not Met'), ('Unknown', 'Unknown')], max_length=50, null=True)),
+                ('slos', models.FloatField(verbose_name='number of SLOs')),
+                ('assessments', models.PositiveIntegerField(verbose_name='number of assessments')),
+                ('aggregates', models.PositiveIntegerField(verbose_name='number of aggregates')),
+                ('met', models.PositiveIntegerField(verbose_name='number of aggregates meeting the target')),
+                ('proficiencySum', models.PositiveIntegerField(verbose_name='sum of aggregate proficiency percentages')),
+                ('dataPoints', models.PositiveIntegerField(verbose_name='number of data points')),
+                ('students', models.PositiveIntegerField(verbose_name='number of students')),
+                ('proficientStudents', models.FloatField(verbose_name='number of proficient students')),
+                ('refreshedAt', models.DateTimeField(db_index=True, verbose_name='refreshed at')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='outcomerollup',
+            index=models.Index(fields=['department', 'year'], name='makeReports_departm_03a549_idx'),
+        ),
+    ]
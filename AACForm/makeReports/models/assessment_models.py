@@ -4,9 +4,9 @@ This file contains models most directly related to assessments of SLOs, excludin
 import os
 from django.db import models
 from makeReports.choices import FREQUENCY_CHOICES
-from .basic_models import gd_storage
+from .basic_models import DirtyFieldsMixin, gd_storage
 
-class Assessment(models.Model):
+class Assessment(DirtyFieldsMixin):
     """
     Assessment model collects assessments that are ostensibly the same except for minor changes,
     and includes fields which should never change
@@ -21,7 +21,7 @@ class Assessment(models.Model):
     def __str__(self):
         return self.title
 
-class AssessmentVersion(models.Model):
+class AssessmentVersion(DirtyFieldsMixin):
     """
     Specific versions of Assessments that occur within a report
     """
@@ -44,6 +44,9 @@ class AssessmentVersion(models.Model):
     threshold = models.CharField(max_length=500)
     target = models.PositiveIntegerField()
     supplements = models.ManyToManyField('AssessmentSupplement')
+    #when the row was created and last changed, for exports of the changes since a given time
+    createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True, db_index=True)
     def __str__(self):
         return self.assessment.title
 
@@ -1,11 +1,21 @@
 """
 Includes most common models used extensively by all users across the site
 """
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.deconstruct import deconstructible
 from gdstorage.storage import GoogleDriveStorage
 
 gd_storage = GoogleDriveStorage()
+@deconstructible
+class ExportStorage(FileSystemStorage):
+    """
+    Local storage of the files of exports, in the EXPORT_ROOT directory, which is not served publicly
+    """
+    def __init__(self):
+        super().__init__(location=settings.EXPORT_ROOT)
 class NonArchivedManager(models.Manager):
     """
     Includes only active objects
@@ -18,7 +28,93 @@ class NonArchivedManager(models.Manager):
             QuerySet : active objects only
         """
         return super().get_queryset().filter(active=True)
-class Report(models.Model):
+class DirtyFieldsMixin(models.Model):
+    """
+    Records the values of fields as loaded from or saved to the database, so saving only
+    writes the columns which changed and is skipped entirely when nothing changed
+
+    Notes:
+        Since only changed fields are written, post_save receivers can check the update_fields
+        argument (None when every field was written) to see if fields they depend on changed
+    """
+    class Meta:
+        abstract = True
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Creates the instance from database values and records the original values
+
+        Returns:
+            DirtyFieldsMixin : instance loaded from the database
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._record_original_values()
+        return instance
+    def _record_original_values(self, fields=None):
+        """
+        Records the current values of the given fields as the values in the database
+
+        Args:
+            fields (iterable): names or attribute names of fields to record, all loaded fields if None
+        """
+        if not hasattr(self, '_original_values'):
+            self._original_values = {}
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                self._original_values[field.attname] = getattr(self, field.attname)
+    def get_dirty_fields(self):
+        """
+        Gets the fields whose values differ from the values last loaded from or saved to the database
+
+        Returns:
+            list : names of changed fields, or None if the instance is not known to be in the database
+        """
+        if self._state.adding or self.pk is None or not hasattr(self, '_original_values'):
+            return None
+        deferred = self.get_deferred_fields()
+        dirty = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname in deferred:
+                continue
+            if field.attname not in self._original_values or \
+                    self._original_values[field.attname] != getattr(self, field.attname):
+                dirty.append(field.name)
+        return dirty
+    def has_changed(self, *fieldNames):
+        """
+        Checks whether any of the given fields have changed since last loaded or saved
+
+        Args:
+            *fieldNames (str): names of the fields to check
+        Returns:
+            bool : whether any of the fields changed (always True if the instance is unsaved)
+        """
+        dirty = self.get_dirty_fields()
+        if dirty is None:
+            return True
+        return any(name in dirty for name in fieldNames)
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """
+        Saves the instance, limiting the update to the changed fields if no fields are given.
+        Fields set automatically on every save, such as updatedAt, are written along with any changed field
+        """
+        if update_fields is None and not force_insert and (using is None or using == self._state.db):
+            update_fields = self.get_dirty_fields()
+        if update_fields:
+            update_fields = list(update_fields)+[
+                f.name for f in self._meta.concrete_fields if getattr(f, 'auto_now', False) and f.name not in update_fields]
+        super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+        self._record_original_values(update_fields)
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Reloads fields from the database and records the reloaded values as the originals
+        """
+        super().refresh_from_db(using=using, fields=fields)
+        self._record_original_values(fields)
+class Report(DirtyFieldsMixin):
     """
     Report model which collects attributes specific to a report and completion status
     """
@@ -35,7 +131,10 @@ class Report(models.Model):
     submitted = models.BooleanField()
     returned = models.BooleanField(default=False)
     numberOfSLOs = models.PositiveIntegerField(default=0, verbose_name="number of SLOs")
-class Profile(models.Model):
+    #when the row was created and last changed, for exports of the changes since a given time
+    createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True, db_index=True)
+class Profile(DirtyFieldsMixin):
     """
     Model to hold extra information in addition to Django's User class, including whether they are 
     AAC members and the department
@@ -3,10 +3,10 @@ This file contains models most directly related to data from assessments
 """
 import os
 from django.db import models
-from makeReports.choices import SLO_STATUS_CHOICES
-from .basic_models import gd_storage
+from makeReports.choices import BLOOMS_CHOICES, EXPORT_JOB_STATUS_CHOICES, FREQUENCY_CHOICES, LEVELS, SLO_STATUS_CHOICES
+from .basic_models import DirtyFieldsMixin, ExportStorage, gd_storage
 
-class AssessmentData(models.Model):
+class AssessmentData(DirtyFieldsMixin):
     """
     Assessment data point for a particular assessment in a report
     """
@@ -14,8 +14,11 @@ class AssessmentData(models.Model):
     dataRange = models.CharField(max_length=500, verbose_name="data range")
     numberStudents = models.PositiveIntegerField(verbose_name="number of students")
     overallProficient = models.PositiveIntegerField(blank=True, verbose_name="overall percentage proficient")
+    #when the row was created and last changed, for exports of the changes since a given time
+    createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True, db_index=True)
 
-class AssessmentAggregate(models.Model):
+class AssessmentAggregate(DirtyFieldsMixin):
     """
     Aggregates the various assessments on different ranges for an aggregate success rate
     """ 
@@ -23,6 +26,9 @@ class AssessmentAggregate(models.Model):
     aggregate_proficiency = models.PositiveIntegerField(verbose_name="aggregate proficiency percentage")
     met = models.BooleanField(verbose_name="target met")
     override = models.BooleanField(default=False)
+    #when the row was created and last changed, for exports of the changes since a given time
+    createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True, db_index=True)
     def __str__(self):
         return str(self.aggregate_proficiency)
 
@@ -38,13 +44,16 @@ class DataAdditionalInformation(models.Model):
         validators=[])
     def __str__(self):
         return os.path.basename(self.supplement.name)
-class SLOStatus(models.Model):
+class SLOStatus(DirtyFieldsMixin):
     """
     Status of whether the target was met for an SLO
     """
     status = models.CharField(max_length=50, choices=SLO_STATUS_CHOICES)
     sloIR = models.OneToOneField('SLOInReport',on_delete=models.CASCADE)
     override = models.BooleanField(default=False)
+    #when the row was created and last changed, for exports of the changes since a given time
+    createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True, db_index=True)
 class ResultCommunicate(models.Model):
     """
     Model holds the text for communicating results
@@ -52,8 +61,125 @@ class ResultCommunicate(models.Model):
     text = models.CharField(max_length=3000)
     report = models.ForeignKey('Report', on_delete=models.CASCADE)
 class Graph(models.Model):
+    """
+    Graph image drawn for the graphing pages, kept temporarily
+    """
     dateTime = models.DateTimeField()
+    #graphs used to be uploaded to Google Drive, they are now kept in the image field
     graph = models.FileField(
         upload_to='data/graphs', 
         storage=gd_storage,
-    )
\ No newline at end of file
+        blank=True,
+    )
+    image = models.BinaryField(blank=True, default=b"")
+    contentType = models.CharField(max_length=50, blank=True, default="")
+    #whether the graph was drawn ahead of time by the precompute_graphs command, rather than for a request
+    precomputed = models.BooleanField(default=False)
+    #hash of the graph type, parameters and revision of the data it is drawn from, blank if the type is unknown
+    parameters = models.CharField(max_length=40, blank=True, default="", db_index=True)
+class ExportJob(models.Model):
+    """
+    Export of assessment data too large to write within a request, written to a file in the background
+    """
+    #path of the export requested, such as /makeReports/csv/col/1/2015/2020/
+    path = models.CharField(max_length=200)
+    #'csv' for a gzipped CSV or 'parquet'
+    fileFormat = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=EXPORT_JOB_STATUS_CHOICES, default="pending")
+    #number of rows counted when the export was requested
+    rows = models.PositiveIntegerField(default=0)
+    artifact = models.FileField(upload_to='', storage=ExportStorage(), blank=True)
+    error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    #hash of the path, format and revision of the data exported
+    parameters = models.CharField(max_length=40, blank=True, default="", db_index=True)
+class DeletedRecord(models.Model):
+    """
+    Tombstone of a deleted object of one of the models with change tracking, for exports of the changes since a given time
+    """
+    #name of the model, such as AssessmentData
+    model = models.CharField(max_length=50)
+    objectPk = models.PositiveIntegerField(verbose_name="object primary key")
+    deletedAt = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="deleted at")
+class AssessmentOutcome(models.Model):
+    """
+    Denormalized row for each data point with the columns of its assessment, aggregate, SLO, status, report,
+    degree program, department and college, kept up to date by the signals in
+    :mod:`makeReports.signals.analytics_signals` so exports read a single table
+
+    Notes:
+        Related objects are stored as their primary keys, with the verbose names of the fields they are copied from.
+        The rebuild_analytics management command rewrites the whole table
+    """
+    data = models.OneToOneField('AssessmentData', on_delete=models.CASCADE, primary_key=True, verbose_name="ID")
+    year = models.PositiveIntegerField(db_index=True)
+    college = models.IntegerField(db_index=True)
+    collegeName = models.CharField(max_length=100, verbose_name="college name")
+    department = models.IntegerField(db_index=True)
+    departmentName = models.CharField(max_length=100, verbose_name="name")
+    degreeProgram = models.IntegerField(db_index=True, verbose_name="degree program")
+    degreeProgramName = models.CharField(max_length=100, verbose_name="name")
+    level = models.CharField(max_length=75, choices=LEVELS)
+    report = models.IntegerField()
+    sloIR = models.IntegerField(verbose_name="SLO in report")
+    goalText = models.CharField(max_length=1000, verbose_name="goal text")
+    sloChangedFromPrior = models.BooleanField(verbose_name="changed from prior version")
+    slo = models.IntegerField(verbose_name="SLO")
+    blooms = models.CharField(choices=BLOOMS_CHOICES, max_length=50, verbose_name="Bloom's taxonomy level")
+    status = models.CharField(max_length=50, choices=SLO_STATUS_CHOICES, null=True)
+    assessment = models.IntegerField()
+    title = models.CharField(max_length=300)
+    domainExamination = models.BooleanField(verbose_name="examination domain")
+    domainProduct = models.BooleanField(verbose_name="product domain")
+    domainPerformance = models.BooleanField(verbose_name="performance domain")
+    directMeasure = models.BooleanField(verbose_name="direct measure")
+    assessmentVersion = models.IntegerField(verbose_name="assessment version")
+    aggregate_proficiency = models.PositiveIntegerField(null=True, verbose_name="aggregate proficiency percentage")
+    met = models.BooleanField(null=True, verbose_name="target met")
+    date = models.DateField()
+    description = models.CharField(max_length=1000)
+    finalTerm = models.BooleanField(verbose_name="final term")
+    where = models.CharField(max_length=500, verbose_name="location of assessment")
+    allStudents = models.BooleanField(verbose_name="all students assessed")
+    sampleDescription = models.CharField(max_length=500, null=True, verbose_name="description of sample")
+    frequencyChoice = models.CharField(max_length=100, choices=FREQUENCY_CHOICES, verbose_name="frequency choice")
+    frequency = models.CharField(max_length=500)
+    threshold = models.CharField(max_length=500)
+    target = models.PositiveIntegerField()
+    changedFromPrior = models.BooleanField(verbose_name="changed from prior version")
+    dataRange = models.CharField(max_length=500, verbose_name="data range")
+    numberStudents = models.PositiveIntegerField(verbose_name="number of students")
+    overallProficient = models.PositiveIntegerField(null=True, verbose_name="overall percentage proficient")
+    #when the row was last rewritten, for exports of the changes since a given time
+    updatedAt = models.DateTimeField(auto_now=True, db_index=True)
+    class Meta:
+        verbose_name = "assessment data"
+class OutcomeRollup(models.Model):
+    """
+    Cell of the rollup cube of SLO and assessment outcomes by year, college, department, level, Bloom's taxonomy level,
+    direct or indirect measure and SLO status, refreshed by :func:`~makeReports.views.helperFunctions.rollup.refresh_rollup`
+
+    Notes:
+        Measures are sums, so any slice of the cube is the sum of its cells. An SLO with several assessments is
+        split between their cells, so its shares add up to one
+    """
+    year = models.PositiveIntegerField()
+    college = models.IntegerField(db_index=True)
+    department = models.IntegerField()
+    level = models.CharField(max_length=75, choices=LEVELS)
+    blooms = models.CharField(choices=BLOOMS_CHOICES, max_length=50, verbose_name="Bloom's taxonomy level")
+    #None for SLOs without assessments
+    directMeasure = models.BooleanField(null=True, verbose_name="direct measure")
+    status = models.CharField(max_length=50, choices=SLO_STATUS_CHOICES, null=True)
+    slos = models.FloatField(verbose_name="number of SLOs")
+    assessments = models.PositiveIntegerField(verbose_name="number of assessments")
+    aggregates = models.PositiveIntegerField(verbose_name="number of aggregates")
+    met = models.PositiveIntegerField(verbose_name="number of aggregates meeting the target")
+    proficiencySum = models.PositiveIntegerField(verbose_name="sum of aggregate proficiency percentages")
+    dataPoints = models.PositiveIntegerField(verbose_name="number of data points")
+    students = models.PositiveIntegerField(verbose_name="number of students")
+    proficientStudents = models.FloatField(verbose_name="number of proficient students")
+    refreshedAt = models.DateTimeField(db_index=True, verbose_name="refreshed at")
+    class Meta:
+        indexes = [models.Index(fields=['department', 'year'])]
@@ -4,9 +4,9 @@ This file contains models most directly related to Student Learning Outcomes
 from django.db import models
 from django.utils.safestring import mark_safe
 from makeReports.choices import BLOOMS_CHOICES
-from .basic_models import NonArchivedManager
+from .basic_models import DirtyFieldsMixin, NonArchivedManager
 
-class SLO(models.Model):
+class SLO(DirtyFieldsMixin):
     """
     Model collects SLO in reports which are ostensibly  the same except minor changes, 
     includes only the attributes which should never change and counts how often it is used
@@ -14,7 +14,7 @@ class SLO(models.Model):
     blooms = models.CharField(choices=BLOOMS_CHOICES,max_length=50, verbose_name="Bloom's taxonomy level")
     gradGoals = models.ManyToManyField('GradGoal', verbose_name="graduate-level goals")
     numberOfUses = models.PositiveIntegerField(default=0, verbose_name="number of uses of this SLO")
-class SLOInReport(models.Model):
+class SLOInReport(DirtyFieldsMixin):
     """
     A specific version of an SLO which occurs within a report
     """
@@ -25,6 +25,9 @@ class SLOInReport(models.Model):
     report = models.ForeignKey('Report', on_delete=models.CASCADE)
     number = models.PositiveIntegerField(default=1)
     numberOfAssess = models.PositiveIntegerField(default=0, verbose_name="number of assessments")
+    #when the row was created and last changed, for exports of the changes since a given time
+    createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True, db_index=True)
     def __str__(self):
         return self.goalText
 
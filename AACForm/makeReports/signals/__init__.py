@@ -4,6 +4,8 @@ When models are saved and deleted, signals automatically update fields in other
 For example, the fields which track the number of assessments an SLO has are updated by signals.
 """
 from .aacAdmin_signals import *
+from .analytics_signals import *
 from .assessment_signals import *
 from .data_signals import *
-from .slo_signals import *
\ No newline at end of file
+from .slo_signals import *
+from .tombstone_signals import *
\ No newline at end of file
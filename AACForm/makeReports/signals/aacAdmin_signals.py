@@ -7,18 +7,21 @@ from makeReports.models import (
     Profile,
     User
 )
+from .audit import audited
 
 @receiver(post_save,sender=User)
+@audited
 def update_user_profile(sender, instance, created, **kwargs):
     """
-    Updates the custom profile when users are created
+    Creates the custom profile when users are created
     
     Args:
         sender (type): model type sending hook
         instance (User): user updated
         created (bool): whether model was newly created
+    Notes:
+        Later saves of the user (such as updating last_login) do not change the profile,
+        so the profile is not saved again
     """
-    #this updates profile when user is updated
     if created:
-        Profile.objects.create(user=instance)
-    instance.profile.save()
\ No newline at end of file
+        Profile.objects.create(user=instance)
\ No newline at end of file
@@ -0,0 +1,328 @@
+"""
+Contains the signals which keep the analytics table (:class:`~makeReports.models.data_models.AssessmentOutcome`)
+up to date as the data, assessments, SLOs, reports and programs it is copied from change.
+
+Columns copied from a single object are updated in place. Rows are rewritten when an object they are
+joined through changes, and removed along with their data point. Bulk writes send no signals, so
+their callers refresh the rows themselves.
+"""
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from makeReports.models import (
+    Assessment, AssessmentAggregate, AssessmentData, AssessmentOutcome, AssessmentVersion,
+    College, DegreeProgram, Department, Report, SLO, SLOInReport, SLOStatus
+)
+from .audit import audited
+
+#column of the analytics table and the lookup from AssessmentData it is copied from
+OUTCOME_COLUMNS = (
+    ('data_id', 'pk'),
+    ('year', 'assessmentVersion__report__year'),
+    ('college', 'assessmentVersion__report__degreeProgram__department__college'),
+    ('collegeName', 'assessmentVersion__report__degreeProgram__department__college__name'),
+    ('department', 'assessmentVersion__report__degreeProgram__department'),
+    ('departmentName', 'assessmentVersion__report__degreeProgram__department__name'),
+    ('degreeProgram', 'assessmentVersion__report__degreeProgram'),
+    ('degreeProgramName', 'assessmentVersion__report__degreeProgram__name'),
+    ('level', 'assessmentVersion__report__degreeProgram__level'),
+    ('report', 'assessmentVersion__report'),
+    ('sloIR', 'assessmentVersion__slo'),
+    ('goalText', 'assessmentVersion__slo__goalText'),
+    ('sloChangedFromPrior', 'assessmentVersion__slo__changedFromPrior'),
+    ('slo', 'assessmentVersion__slo__slo'),
+    ('blooms', 'assessmentVersion__slo__slo__blooms'),
+    ('status', 'assessmentVersion__slo__slostatus__status'),
+    ('assessment', 'assessmentVersion__assessment'),
+    ('title', 'assessmentVersion__assessment__title'),
+    ('domainExamination', 'assessmentVersion__assessment__domainExamination'),
+    ('domainProduct', 'assessmentVersion__assessment__domainProduct'),
+    ('domainPerformance', 'assessmentVersion__assessment__domainPerformance'),
+    ('directMeasure', 'assessmentVersion__assessment__directMeasure'),
+    ('assessmentVersion', 'assessmentVersion'),
+    ('aggregate_proficiency', 'assessmentVersion__assessmentaggregate__aggregate_proficiency'),
+    ('met', 'assessmentVersion__assessmentaggregate__met'),
+    ('date', 'assessmentVersion__date'),
+    ('description', 'assessmentVersion__description'),
+    ('finalTerm', 'assessmentVersion__finalTerm'),
+    ('where', 'assessmentVersion__where'),
+    ('allStudents', 'assessmentVersion__allStudents'),
+    ('sampleDescription', 'assessmentVersion__sampleDescription'),
+    ('frequencyChoice', 'assessmentVersion__frequencyChoice'),
+    ('frequency', 'assessmentVersion__frequency'),
+    ('threshold', 'assessmentVersion__threshold'),
+    ('target', 'assessmentVersion__target'),
+    ('changedFromPrior', 'assessmentVersion__changedFromPrior'),
+    ('dataRange', 'dataRange'),
+    ('numberStudents', 'numberStudents'),
+    ('overallProficient', 'overallProficient'),
+)
+#fields of each model whose changes rewrite the rows joined through it
+DATA_FIELDS = {'assessmentVersion', 'dataRange', 'numberStudents', 'overallProficient'}
+VERSION_FIELDS = {
+    'report', 'slo', 'assessment', 'date', 'description', 'finalTerm', 'where', 'allStudents',
+    'sampleDescription', 'frequencyChoice', 'frequency', 'threshold', 'target', 'changedFromPrior'
+}
+SLO_IR_FIELDS = {'goalText', 'changedFromPrior', 'slo', 'report'}
+REPORT_FIELDS = {'year', 'degreeProgram'}
+#fields copied unchanged from assessments, which are updated in place
+ASSESSMENT_FIELDS = ('title', 'domainExamination', 'domainProduct', 'domainPerformance', 'directMeasure')
+
+def outcome_rows(data):
+    """
+    Builds the analytics rows of the data points with one query
+
+    Args:
+        data (QuerySet): data points (:class:`~makeReports.models.data_models.AssessmentData`)
+    Returns:
+        list : unsaved rows (:class:`~makeReports.models.data_models.AssessmentOutcome`)
+    """
+    names = [name for name, _ in OUTCOME_COLUMNS]
+    return [
+        AssessmentOutcome(**dict(zip(names, values)))
+        for values in data.values_list(*[lookup for _, lookup in OUTCOME_COLUMNS])
+    ]
+
+def refresh_outcomes(data):
+    """
+    Rewrites the analytics rows of the data points which are missing or out of date
+
+    Args:
+        data (QuerySet): data points (:class:`~makeReports.models.data_models.AssessmentData`)
+    Returns:
+        int : number of rows written
+    Notes:
+        Rows whose values are unchanged are left alone, so keep their updatedAt for exports of the changes
+    """
+    rows = outcome_rows(data)
+    if not rows:
+        return 0
+    names = [name for name, _ in OUTCOME_COLUMNS]
+    current = {
+        values[0]: values for values in AssessmentOutcome.objects.filter(
+            data__in=[row.data_id for row in rows]).values_list(*names)
+    }
+    rows = [row for row in rows if current.get(row.data_id) != tuple(getattr(row, name) for name in names)]
+    if not rows:
+        return 0
+    with transaction.atomic():
+        AssessmentOutcome.objects.filter(data__in=[row.data_id for row in rows]).delete()
+        AssessmentOutcome.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+def rebuild_outcomes(batchSize=5000):
+    """
+    Rewrites the whole analytics table, a batch of data points at a time
+
+    Args:
+        batchSize (int): number of rows built by each query
+    Returns:
+        int : number of rows written
+    """
+    written = 0
+    with transaction.atomic():
+        AssessmentOutcome.objects.all().delete()
+        lastPk = 0
+        while True:
+            rows = outcome_rows(AssessmentData.objects.filter(pk__gt=lastPk).order_by('pk')[:batchSize])
+            if not rows:
+                return written
+            AssessmentOutcome.objects.bulk_create(rows, batch_size=500)
+            written += len(rows)
+            lastPk = rows[-1].data_id
+
+def update_outcomes(lookups, **values):
+    """
+    Updates columns of the analytics rows in place, skipping rows which already have the values
+
+    Args:
+        lookups (dict): lookups of the rows to update
+        **values: new values of the columns
+    """
+    AssessmentOutcome.objects.filter(**lookups).exclude(**values).update(updatedAt=timezone.now(), **values)
+
+def changed(update_fields, fields):
+    """
+    Checks whether a save wrote any of the fields
+
+    Args:
+        update_fields (frozenset): fields written by the save, None if all were written
+        fields (iterable): names of the fields
+    Returns:
+        bool : whether any of the fields were written
+    """
+    return update_fields is None or not update_fields.isdisjoint(fields)
+
+@receiver(post_save,sender=AssessmentData)
+@audited
+def refresh_outcome_by_data(sender, instance, update_fields=None, **kwargs):
+    """
+    Rewrites the row of the saved data point
+
+    Args:
+        sender (type): model type sending hook
+        instance (AssessmentData): data saved
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if changed(update_fields, DATA_FIELDS):
+        refresh_outcomes(AssessmentData.objects.filter(pk=instance.pk))
+@receiver(post_save,sender=AssessmentVersion)
+@audited
+def refresh_outcomes_by_version(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Rewrites the rows of the data of the saved assessment version
+
+    Args:
+        sender (type): model type sending hook
+        instance (AssessmentVersion): assessment saved
+        created (bool): whether the assessment is new, so has no data yet
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if not created and changed(update_fields, VERSION_FIELDS):
+        refresh_outcomes(AssessmentData.objects.filter(assessmentVersion=instance))
+@receiver(post_save,sender=SLOInReport)
+@audited
+def refresh_outcomes_by_slo(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Rewrites the rows of the data of the saved SLO in a report
+
+    Args:
+        sender (type): model type sending hook
+        instance (SLOInReport): SLO saved
+        created (bool): whether the SLO is new, so has no data yet
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if not created and changed(update_fields, SLO_IR_FIELDS):
+        refresh_outcomes(AssessmentData.objects.filter(assessmentVersion__slo=instance))
+@receiver(post_save,sender=Report)
+@audited
+def refresh_outcomes_by_report(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Rewrites the rows of the data of the saved report
+
+    Args:
+        sender (type): model type sending hook
+        instance (Report): report saved
+        created (bool): whether the report is new, so has no data yet
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if not created and changed(update_fields, REPORT_FIELDS):
+        refresh_outcomes(AssessmentData.objects.filter(assessmentVersion__report=instance))
+@receiver(post_save,sender=DegreeProgram)
+@audited
+def refresh_outcomes_by_program(sender, instance, created=False, **kwargs):
+    """
+    Rewrites the rows of the data of the saved degree program
+
+    Args:
+        sender (type): model type sending hook
+        instance (DegreeProgram): degree program saved
+        created (bool): whether the program is new, so has no data yet
+    """
+    if not created:
+        refresh_outcomes(AssessmentData.objects.filter(assessmentVersion__report__degreeProgram=instance))
+@receiver(post_save,sender=Department)
+@audited
+def refresh_outcomes_by_department(sender, instance, created=False, **kwargs):
+    """
+    Updates the rows of the data of the saved department
+
+    Args:
+        sender (type): model type sending hook
+        instance (Department): department saved
+        created (bool): whether the department is new, so has no data yet
+    """
+    if not created:
+        update_outcomes({'department': instance.pk},
+            departmentName=instance.name, college=instance.college_id, collegeName=instance.college.name)
+@receiver(post_save,sender=College)
+@audited
+def update_outcomes_by_college(sender, instance, created=False, **kwargs):
+    """
+    Updates the college name of the rows of the data of the saved college
+
+    Args:
+        sender (type): model type sending hook
+        instance (College): college saved
+        created (bool): whether the college is new, so has no data yet
+    """
+    if not created:
+        update_outcomes({'college': instance.pk}, collegeName=instance.name)
+@receiver(post_save,sender=Assessment)
+@audited
+def update_outcomes_by_assessment(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Updates the assessment columns of the rows of the data of the saved assessment
+
+    Args:
+        sender (type): model type sending hook
+        instance (Assessment): assessment saved
+        created (bool): whether the assessment is new, so has no data yet
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if not created and changed(update_fields, ASSESSMENT_FIELDS):
+        update_outcomes({'assessment': instance.pk}, **{f: getattr(instance, f) for f in ASSESSMENT_FIELDS})
+@receiver(post_save,sender=SLO)
+@audited
+def update_outcomes_by_slo(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Updates the Bloom's taxonomy level of the rows of the data of the saved SLO
+
+    Args:
+        sender (type): model type sending hook
+        instance (SLO): SLO saved
+        created (bool): whether the SLO is new, so has no data yet
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if not created and changed(update_fields, {'blooms'}):
+        update_outcomes({'slo': instance.pk}, blooms=instance.blooms)
+@receiver(post_save,sender=AssessmentAggregate)
+@audited
+def update_outcomes_by_aggregate(sender, instance, update_fields=None, **kwargs):
+    """
+    Updates the aggregate of the rows of the data of the aggregate's assessment
+
+    Args:
+        sender (type): model type sending hook
+        instance (AssessmentAggregate): aggregate saved
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if changed(update_fields, {'aggregate_proficiency', 'met', 'assessmentVersion'}):
+        update_outcomes({'assessmentVersion': instance.assessmentVersion_id},
+            aggregate_proficiency=instance.aggregate_proficiency, met=instance.met)
+@receiver(post_delete,sender=AssessmentAggregate)
+@audited
+def clear_outcomes_by_aggregate(sender, instance, **kwargs):
+    """
+    Clears the aggregate of the rows of the data of the deleted aggregate's assessment
+
+    Args:
+        sender (type): model type sending hook
+        instance (AssessmentAggregate): aggregate deleted
+    """
+    update_outcomes({'assessmentVersion': instance.assessmentVersion_id}, aggregate_proficiency=None, met=None)
+@receiver(post_save,sender=SLOStatus)
+@audited
+def update_outcomes_by_status(sender, instance, update_fields=None, **kwargs):
+    """
+    Updates the status of the rows of the data of the status's SLO
+
+    Args:
+        sender (type): model type sending hook
+        instance (SLOStatus): status saved
+        update_fields (frozenset): fields written by the save, None if all were written
+    """
+    if changed(update_fields, {'status', 'sloIR'}):
+        update_outcomes({'sloIR': instance.sloIR_id}, status=instance.status)
+@receiver(post_delete,sender=SLOStatus)
+@audited
+def clear_outcomes_by_status(sender, instance, **kwargs):
+    """
+    Clears the status of the rows of the data of the deleted status's SLO
+
+    Args:
+        sender (type): model type sending hook
+        instance (SLOStatus): status deleted
+    """
+    update_outcomes({'sloIR': instance.sloIR_id}, status=None)
@@ -6,6 +6,7 @@ from django.db.models.signals import post_save, post_delete
 from makeReports.models import (
     AssessmentVersion
 )
+from .audit import audited
 
 
 def post_create_update_assessment_uses(instance):
@@ -38,7 +39,8 @@ def post_save_update_agg_by_assessment(instance):
         pass
 
 @receiver(post_save,sender=AssessmentVersion)
-def post_save_receiver_assessment(sender,instance,created,**kwargs):
+@audited
+def post_save_receiver_assessment(sender,instance,created,update_fields=None,**kwargs):
     """
     Post save receiver that triggers aggregates and numbers to be updated
     
@@ -46,13 +48,16 @@ def post_save_receiver_assessment(sender,instance,created,**kwargs):
         sender (type): model type sending hook
         instance (AssessmentVersion): assessment updated
         created (bool): whether model was newly created
+        update_fields (frozenset): fields written by the save, None if all were written
     """
-    post_save_update_agg_by_assessment(instance)
+    if update_fields is None or 'target' in update_fields:
+        post_save_update_agg_by_assessment(instance)
     if created:
         post_create_update_assessment_uses(instance)
     
 
 @receiver(post_delete,sender=AssessmentVersion)
+@audited
 def post_delete_assessment_update_numbering(sender, instance, **kwargs):
     """
     Updates the numbering of assessments in the same report
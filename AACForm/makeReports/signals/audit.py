@@ -0,0 +1,154 @@
+"""
+Audits how much database work the signal receivers cause within each request.
+
+Receivers decorated with :func:`audited` record their calls, the queries they issue, the rows they
+write and the time they take, including any receivers triggered by their own saves. Auditing is
+only active when the SIGNAL_AUDIT setting is on, in which case :class:`SignalAuditMiddleware` logs
+a summary of each request and keeps the most recent ones for the AAC debug panel.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+_state = threading.local()
+#most recent audits within this worker, newest last
+recentAudits = deque(maxlen=50)
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+class SignalAudit:
+    """
+    Statistics on the receivers run within one request
+    """
+    def __init__(self, name):
+        """
+        Args:
+            name (str): name of the request audited, such as the method and path
+        """
+        self.name = name
+        self.receivers = {}
+        self.queries = 0
+        self.rows = 0
+        self.duration = 0
+        self.stack = []
+        self.start = time.perf_counter()
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper which counts queries and written rows towards the request
+        and every receiver currently running
+
+        Returns:
+            object : result of executing the query
+        """
+        result = execute(sql, params, many, context)
+        rows = 0
+        if sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+            rows = max(context['cursor'].rowcount, 0)
+        self.queries += 1
+        self.rows += rows
+        for name in set(self.stack):
+            self.receivers[name]['queries'] += 1
+            self.receivers[name]['rows'] += rows
+        return result
+    def run(self, name, func, args, kwargs):
+        """
+        Runs the receiver, recording its statistics
+
+        Args:
+            name (str): name of the receiver
+            func (function): the receiver
+            args (tuple): positional arguments to the receiver
+            kwargs (dict): keyword arguments to the receiver
+        Returns:
+            object : return value of the receiver
+        """
+        stats = self.receivers.setdefault(name, {'name':name, 'calls':0, 'queries':0, 'rows':0, 'time':0.0})
+        stats['calls'] += 1
+        outermost = name not in self.stack
+        self.stack.append(name)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.stack.pop()
+            if outermost:
+                stats['time'] += time.perf_counter() - start
+    def finish(self):
+        """
+        Finishes the audit, logging it and keeping it for the debug panel if any receivers ran
+        """
+        self.duration = time.perf_counter() - self.start
+        if not self.receivers:
+            return
+        logger.info(
+            "%s: %d queries, %d rows written, %.1f ms",
+            self.name, self.queries, self.rows, self.duration*1000
+        )
+        for stats in self.receiver_list():
+            logger.info(
+                "    %s: %d calls, %d queries, %d rows written, %.1f ms",
+                stats['name'], stats['calls'], stats['queries'], stats['rows'], stats['time']*1000
+            )
+        recentAudits.append(self)
+    def receiver_list(self):
+        """
+        Gets the statistics of each receiver, most time consuming first
+
+        Returns:
+            list : dictionaries of statistics for each receiver
+        """
+        return sorted(self.receivers.values(), key=lambda s: s['time'], reverse=True)
+
+def audited(func):
+    """
+    Decorator to record the statistics of a receiver when a request is being audited
+
+    Args:
+        func (function): the receiver
+    Returns:
+        function : the wrapped receiver
+    """
+    name = func.__module__.rsplit('.', 1)[-1]+"."+func.__name__
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        audit = getattr(_state, 'audit', None)
+        if audit is None:
+            return func(*args, **kwargs)
+        return audit.run(name, func, args, kwargs)
+    return wrapper
+
+class SignalAuditMiddleware:
+    """
+    Audits the receivers run within each request when the SIGNAL_AUDIT setting is on
+    """
+    def __init__(self, get_response):
+        """
+        Args:
+            get_response (function): the next middleware or view
+        """
+        if not getattr(settings, 'SIGNAL_AUDIT', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+    def __call__(self, request):
+        """
+        Gets the response while auditing the request
+
+        Args:
+            request (HttpRequest): the request
+        Returns:
+            HttpResponse : the response
+        """
+        audit = SignalAudit(request.method+" "+request.path)
+        _state.audit = audit
+        try:
+            with connection.execute_wrapper(audit):
+                response = self.get_response(request)
+        finally:
+            _state.audit = None
+            audit.finish()
+        return response
@@ -9,19 +9,29 @@ from makeReports.models import (
     SLOStatus
 )
 from makeReports.choices import SLO_STATUS_CHOICES
+from .audit import audited
+
+#fields of AssessmentData the aggregate is calculated from
+AGG_DEPENDENT_FIELDS = {'assessmentVersion', 'numberStudents', 'overallProficient'}
+#fields of AssessmentAggregate the SLO status is calculated from
+STATUS_DEPENDENT_FIELDS = {'assessmentVersion', 'met'}
 
 
 @receiver(post_save,sender=AssessmentData)
-def post_save_agg_by_data(sender, instance, **kwargs):
+@audited
+def post_save_agg_by_data(sender, instance, update_fields=None, **kwargs):
     """
     Updates aggregates when data is created or modified post-save
     
     Args:
         sender (type): model type sending hook
         instance (AssessmentData): data updated
+        update_fields (frozenset): fields written by the save, None if all were written
     """
-    update_agg_by_data(sender,instance, 0)
+    if update_fields is None or not update_fields.isdisjoint(AGG_DEPENDENT_FIELDS):
+        update_agg_by_data(sender,instance, 0)
 @receiver(pre_delete,sender=AssessmentData)
+@audited
 def pre_delete_agg_by_data(sender,instance,**kwargs):
     """
     Updates aggregates when data is deleted
@@ -94,16 +104,20 @@ def calcWeightedAgg(assessment, sigType, pk):
     return round(totalProf/totalStudents)
 
 @receiver(post_save,sender=AssessmentAggregate)
-def post_save_status_by_agg(sender,instance,**kwargs):
+@audited
+def post_save_status_by_agg(sender,instance,update_fields=None,**kwargs):
     """
     Updates status based upon aggregates after model is saved
 
     Args:
         sender (type): model type sending hook
         instance (AssessmentAggregate): data updated
+        update_fields (frozenset): fields written by the save, None if all were written
     """
-    update_status_by_agg(sender,instance, 0)
+    if update_fields is None or not update_fields.isdisjoint(STATUS_DEPENDENT_FIELDS):
+        update_status_by_agg(sender,instance, 0)
 @receiver(pre_delete,sender=AssessmentAggregate)
+@audited
 def pre_delete_status_by_agg(sender,instance,**kwargs):
     """
     Updates status based upon aggregates after model is saved
@@ -6,8 +6,10 @@ from django.db.models.signals import post_save, post_delete
 from makeReports.models import (
     SLOInReport
 )
+from .audit import audited
 
 @receiver(post_save,sender=SLOInReport)
+@audited
 def post_save_slo_update_numbering(sender,instance,created,**kwargs):
     """
     Post save receiver that triggers numbers to be updated
@@ -24,6 +26,7 @@ def post_save_slo_update_numbering(sender,instance,created,**kwargs):
         instance.slo.save()
 
 @receiver(post_delete,sender=SLOInReport)
+@audited
 def post_delete_slo_update_numbering(sender,instance,**kwargs):
     """
     Updates the numbering of SLOs in the same report
@@ -0,0 +1,27 @@
+"""
+Contains the signals which record the deletion of objects with change tracking, so exports of the changes
+since a given time can report them
+"""
+from django.dispatch import receiver
+from django.db.models.signals import post_delete
+from makeReports.models import (
+    AssessmentAggregate, AssessmentData, AssessmentVersion, DeletedRecord, Report, SLOInReport, SLOStatus
+)
+from .audit import audited
+
+@receiver(post_delete,sender=Report)
+@receiver(post_delete,sender=SLOInReport)
+@receiver(post_delete,sender=AssessmentVersion)
+@receiver(post_delete,sender=AssessmentData)
+@receiver(post_delete,sender=AssessmentAggregate)
+@receiver(post_delete,sender=SLOStatus)
+@audited
+def record_deletion(sender, instance, **kwargs):
+    """
+    Records a tombstone of the deleted object
+
+    Args:
+        sender (type): model type sending hook
+        instance (Model): the deleted object
+    """
+    DeletedRecord.objects.create(model=sender.__name__, objectPk=instance.pk)
@@ -10,6 +10,7 @@ from .test_APIs import *
 from .test_graphingCSV import *
 from .test_mixins import *
 from .test_signals import *
+from .test_commands import *
 from .forms.test_adminforms import *
 from .forms.test_gradingforms import *
 from .forms.test_assessmentforms import *
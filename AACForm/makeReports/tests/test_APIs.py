@@ -1,10 +1,19 @@
 """
 Tests the APIs work as expected
 """
+import importlib
+import matplotlib.pyplot as plt
 from django.urls import reverse
-from makeReports.models import SLOStatus
+from makeReports.models import AssessmentAggregate, Graph, SLOInReport, SLOStatus
 from model_bakery import baker
-from .test_basicViews import ReportAACSetupTest, NonAACTest
+from makeReports.views.API.graphAPI import (
+    get_degreeProgramSuccess_series,
+    get_numberSLOs_series,
+    get_specificSLO_series
+)
+from makeReports.views.helperFunctions.graph_rendering import render_bar_graph
+from makeReports.views.helperFunctions.rollup import refresh_rollup
+from .test_basicViews import AACTest, ReportAACSetupTest, NonAACTest
 
 class APITesting(NonAACTest):
     """
@@ -272,6 +281,100 @@ class APITesting(NonAACTest):
         }
         resp = self.client.post(reverse('makeReports:api-new-graph'),data)
         self.assertEquals(resp.status_code,200)
+    def test_api_new_graph_cached(self):
+        """
+        Tests a graph is reused for the same parameters until the data it is drawn from changes
+        """
+        department = baker.make("Department")
+        program = baker.make("DegreeProgram",department=department)
+        r = baker.make("Report", degreeProgram=program, year=2016)
+        slo = baker.make("SLOInReport",report=r)
+        assessHere = baker.make("AssessmentVersion",report=r,slo=slo)
+        baker.make("AssessmentData",assessmentVersion=assessHere,overallProficient=93)
+        data = {
+            'report__degreeProgram__department': department.pk,
+            'report__year__gte': 2015,
+            'report__year__lte': 2018,
+            'decision': 3
+        }
+        resp = self.client.post(reverse('makeReports:api-new-graph'),data)
+        resp2 = self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(resp.data,resp2.data)
+        self.assertEquals(Graph.objects.count(),1)
+        aa = AssessmentAggregate.objects.get(assessmentVersion=assessHere)
+        aa.aggregate_proficiency = 10
+        aa.save()
+        self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(Graph.objects.count(),2)
+        self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(Graph.objects.count(),2)
+        assessHere.target = 99
+        assessHere.save()
+        self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(Graph.objects.count(),3)
+        elsewhere = baker.make("AssessmentVersion",report__year=2016)
+        baker.make("AssessmentData",assessmentVersion=elsewhere,overallProficient=50)
+        self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(Graph.objects.count(),3)
+        baker.make("DegreeProgram",department=department,active=False)
+        self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(Graph.objects.count(),3)
+        program.active = False
+        program.save()
+        self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(Graph.objects.count(),4)
+    def test_api_new_graph_delivery(self):
+        """
+        Tests graphs can be delivered as an image, a data URI or the URL of the image
+        """
+        department = baker.make("Department")
+        baker.make("DegreeProgram",department=department)
+        data = {
+            'report__degreeProgram__department': department.pk,
+            'report__year__gte': 2015,
+            'report__year__lte': 2018,
+            'decision': 3,
+            'format': 'svg'
+        }
+        resp = self.client.post(reverse('makeReports:api-new-graph'),data)
+        graph = Graph.objects.get()
+        self.assertEquals(resp.data,reverse('makeReports:api-graph-image',kwargs={'key':graph.parameters}))
+        resp = self.client.get(resp.data)
+        self.assertEquals(resp['Content-Type'],"image/svg+xml")
+        self.assertEquals(resp.content,bytes(graph.image))
+        #graphs cannot be found by guessing their primary keys
+        resp = self.client.get(reverse('makeReports:api-graph-image',kwargs={'key':"%040d" % graph.pk}))
+        self.assertEquals(resp.status_code,404)
+        data['delivery'] = 'uri'
+        resp = self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertTrue(resp.data.startswith("data:image/svg+xml;base64,"))
+        data['delivery'] = 'image'
+        data['format'] = 'png'
+        resp = self.client.post(reverse('makeReports:api-new-graph'),data)
+        self.assertEquals(resp['Content-Type'],"image/png")
+        self.assertEquals(Graph.objects.count(),2)
+    def test_api_new_graph_resolution(self):
+        """
+        Tests raster graphs are drawn at the requested resolution, and the size of the image is reported
+        """
+        department = baker.make("Department")
+        baker.make("DegreeProgram",department=department)
+        data = {
+            'report__degreeProgram__department': department.pk,
+            'report__year__gte': 2015,
+            'report__year__lte': 2018,
+            'decision': 3,
+            'delivery': 'image'
+        }
+        small = self.client.post(reverse('makeReports:api-new-graph'),dict(data,dpi=50))
+        large = self.client.post(reverse('makeReports:api-new-graph'),dict(data,dpi=200))
+        self.assertEquals(int(small['X-Graph-Size']),len(small.content))
+        self.assertLess(len(small.content),len(large.content))
+        resp = self.client.post(reverse('makeReports:api-new-graph'),dict(data,format='webp'))
+        self.assertEquals(resp['Content-Type'],"image/webp")
+        self.assertTrue(resp.content.startswith(b"RIFF"))
+        resp = self.client.post(reverse('makeReports:api-new-graph'),dict(data,dpi=1000))
+        self.assertEquals(resp.status_code,400)
 class ActionAPITests(ReportAACSetupTest):
     """
     Tests relating to the action API
@@ -294,3 +397,300 @@ class ActionAPITests(ReportAACSetupTest):
 
 
 
+    def test_clear_override_recomputes(self):
+        """
+        Tests clearing overrides resets every aggregate and status to its computed value
+        """
+        slo = baker.make("SLOInReport",report=self.rpt)
+        aVs = baker.make("AssessmentVersion",report=self.rpt,slo=slo,target=50,_quantity=3)
+        for aV in aVs:
+            baker.make("AssessmentData",assessmentVersion=aV,numberStudents=10,overallProficient=80)
+        AssessmentAggregate.objects.filter(assessmentVersion__in=aVs).update(
+            override=True,aggregate_proficiency=10,met=False)
+        SLOStatus.objects.filter(sloIR=slo).update(override=True,status="Not Met")
+        self.client.get(reverse('makeReports:api-clear-ovr')+"?pk="+str(self.rpt.pk))
+        for aa in AssessmentAggregate.objects.filter(assessmentVersion__in=aVs):
+            self.assertFalse(aa.override)
+            self.assertEquals(aa.aggregate_proficiency,80)
+            self.assertTrue(aa.met)
+        ss = SLOStatus.objects.get(sloIR=slo)
+        self.assertFalse(ss.override)
+        self.assertEquals(ss.status,"Met")
+class GraphSeriesTests(NonAACTest):
+    """
+    Tests the series computed for the graphs
+    """
+    def setUp(self):
+        """
+        Creates a degree program with SLOs in two years
+        """
+        super().setUp()
+        self.program = baker.make("DegreeProgram",department=self.dept,name="Prog",level="UG")
+        self.r1 = baker.make("Report",degreeProgram=self.program,year=2017)
+        self.r2 = baker.make("Report",degreeProgram=self.program,year=2018)
+        self.slo1 = baker.make("SLO")
+        self.slo2 = baker.make("SLO")
+        self.makeStatus(self.r1,self.slo1,"Met")
+        self.makeStatus(self.r1,self.slo2,"Not Met")
+        self.makeStatus(self.r2,self.slo1,"Partially Met")
+    def makeStatus(self, report, slo, status):
+        """
+        Creates an SLO in the report with the status
+
+        Args:
+            report (Report): report of the SLO
+            slo (SLO): parent SLO
+            status (str): status of the SLO
+        """
+        sloIR = baker.make("SLOInReport",report=report,slo=slo)
+        baker.make("SLOStatus",sloIR=sloIR,status=status)
+    def test_numberSLOs_weights(self):
+        """
+        Tests the SLO statuses are weighted and normalized within each year
+        """
+        df = get_numberSLOs_series(2016,2018,self.program.pk,{str(self.slo1.pk):"3",str(self.slo2.pk):"1"})
+        self.assertEquals(list(df['Year']),[2016,2017,2018])
+        self.assertEquals(list(df['Met']),[0,0.75,0])
+        self.assertEquals(list(df['Not Met']),[0,0.25,0])
+        self.assertEquals(list(df['Partially Met']),[0,0,1])
+        self.assertEquals(list(df['Unknown']),[0,0,0])
+    def test_numberSLOs_unweighted(self):
+        """
+        Tests SLOs without weights are not counted
+        """
+        df = get_numberSLOs_series(2017,2017,self.program.pk,{str(self.slo2.pk):"1"})
+        self.assertEquals(list(df['Not Met']),[1])
+        self.assertEquals(list(df['Met']),[0])
+    def test_degreeProgramSuccess(self):
+        """
+        Tests the percentage of SLOs met is computed for each active program in each year
+        """
+        program2 = baker.make("DegreeProgram",department=self.dept,name="Second",level="GR")
+        inactive = baker.make("DegreeProgram",department=self.dept,name="Old",level="UG",active=False)
+        self.makeStatus(baker.make("Report",degreeProgram=program2,year=2018),self.slo2,"Met")
+        self.makeStatus(baker.make("Report",degreeProgram=inactive,year=2018),self.slo2,"Met")
+        df = get_degreeProgramSuccess_series(2017,2018,self.dept.pk)
+        self.assertEquals(list(df.columns),['Year','Prog (UG)','Second (GR)'])
+        self.assertEquals(list(df['Prog (UG)']),[0.5,0])
+        self.assertEquals(list(df['Second (GR)']),[0,1])
+    def test_numberSLOs_counts(self):
+        """
+        Tests the number of SLOs with each status is counted for the weighted SLOs
+        """
+        df, numbers = get_numberSLOs_series(2017,2018,self.program.pk,{str(self.slo1.pk):"1"},withCounts=True)
+        self.assertEquals(list(df['Met']),[1,0])
+        self.assertEquals(list(numbers['Met']),[1,0])
+        self.assertEquals(list(numbers['Not Met']),[0,0])
+        self.assertEquals(list(numbers['Partially Met']),[0,1])
+    def test_specificSLO(self):
+        """
+        Tests the target, actual proficiency and students assessed are computed for the SLO and assessment
+        """
+        sloIR = SLOStatus.objects.filter(sloIR__report=self.r1,sloIR__slo=self.slo1).get().sloIR
+        aV = baker.make("AssessmentVersion",report=self.r1,slo=sloIR,target=70)
+        baker.make("AssessmentData",assessmentVersion=aV,numberStudents=10,overallProficient=80)
+        baker.make("AssessmentData",assessmentVersion=aV,numberStudents=30,overallProficient=60)
+        df, numbers = get_specificSLO_series(2016,2018,self.program.pk,sloIR.pk,aV.assessment.pk,withCounts=True)
+        self.assertEquals(list(df['Year']),[2017])
+        self.assertEquals(list(df['Target']),[0.7])
+        self.assertEquals(list(df['Actual']),[0.65])
+        self.assertEquals(list(numbers['Students']),[40])
+    def test_render_without_pyplot(self):
+        """
+        Tests graphs are drawn without leaving figures registered with pyplot
+        """
+        figures = plt.get_fignums()
+        df = get_numberSLOs_series(2016,2018,self.program.pk,{str(self.slo1.pk):"1"})
+        image = render_bar_graph(df,['Met','Not Met'],'png')
+        self.assertTrue(image.startswith(b"\x89PNG"))
+        self.assertEquals(plt.get_fignums(),figures)
+    def test_series_api(self):
+        """
+        Tests the series API returns the series with an ETag, and 304 once the browser has them
+        """
+        resp = self.client.get(reverse('makeReports:api-graph-series'),{
+            'report__degreeProgram__department': self.dept.pk,
+            'report__year__gte': 2017,
+            'report__year__lte': 2018,
+            'decision': 3
+        })
+        self.assertEquals(resp.status_code,200)
+        self.assertEquals(resp.data['years'],[2017,2018])
+        self.assertEquals(resp.data['series']['Prog (UG)'],[0.5,0])
+        self.assertEquals(resp.data['counts']['Prog (UG)'],[2,1])
+        resp2 = self.client.get(reverse('makeReports:api-graph-series'),{
+            'report__degreeProgram__department': self.dept.pk,
+            'report__year__gte': 2017,
+            'report__year__lte': 2018,
+            'decision': 3
+        }, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEquals(resp2.status_code,304)
+    def test_series_api_bad_parameters(self):
+        """
+        Tests the series API rejects missing parameters
+        """
+        resp = self.client.get(reverse('makeReports:api-graph-series'),{'decision': 3})
+        self.assertEquals(resp.status_code,400)
+    def test_trend_api(self):
+        """
+        Tests the trend API gives the deltas, unmet streaks and moving averages of an SLO across its reports
+        """
+        prog = baker.make("DegreeProgram")
+        slo = baker.make("SLO")
+        for year, proficient in [(2017,50),(2018,60),(2020,80)]:
+            rpt = baker.make("Report",degreeProgram=prog,year=year)
+            sloIR = baker.make("SLOInReport",report=rpt,slo=slo,goalText="Goal %d" % year)
+            aV = baker.make("AssessmentVersion",report=rpt,slo=sloIR,target=70)
+            baker.make("AssessmentData",assessmentVersion=aV,numberStudents=10,overallProficient=proficient)
+        resp = self.client.get(reverse('makeReports:api-slo-trends'),{
+            'report__degreeProgram': prog.pk,
+            'report__year__gte': 2017,
+            'report__year__lte': 2020,
+            'window': 2
+        })
+        self.assertEquals(resp.status_code,200)
+        self.assertEquals(resp.data['years'],[2017,2018,2019,2020])
+        trend = resp.data['trends'][0]
+        self.assertEquals(len(resp.data['trends']),1)
+        self.assertEquals(trend['goalText'],"Goal 2020")
+        self.assertEquals(trend['proficiency'],[0.5,0.6,None,0.8])
+        self.assertEquals(trend['unmetStreak'],[1,2,None,0])
+        self.assertIsNone(trend['delta'][0])
+        self.assertAlmostEqual(trend['delta'][3],0.2)
+        self.assertAlmostEqual(trend['movingAverage'][1],0.55)
+        self.assertAlmostEqual(trend['movingAverage'][3],0.8)
+        resp = self.client.get(reverse('makeReports:api-slo-trends'),{'report__year__gte': 2017})
+        self.assertEquals(resp.status_code,400)
+        resp = self.client.get(reverse('makeReports:api-slo-trends'),{
+            'report__degreeProgram': prog.pk,
+            'report__year__gte': 0,
+            'report__year__lte': 999999
+        })
+        self.assertEquals(resp.status_code,400)
+    def test_batch_api(self):
+        """
+        Tests the batch API draws each graph once and returns them in the order requested
+        """
+        dps = {
+            'report__degreeProgram__department': self.dept.pk,
+            'report__year__gte': 2017,
+            'report__year__lte': 2018,
+            'decision': 3
+        }
+        numberSLOs = {
+            'report__degreeProgram': self.program.pk,
+            'report__year__gte': 2016,
+            'report__year__lte': 2018,
+            'decision': 2,
+            'sloWeights': "{\""+str(self.slo1.pk)+"\": 1}"
+        }
+        resp = self.client.post(reverse('makeReports:api-graph-batch'),{
+            'graphs': [dps, dict(dps, report__year__lte=2017), numberSLOs, dps],
+            'delivery': 'uri'
+        },content_type="application/json")
+        self.assertEquals(resp.status_code,200)
+        self.assertEquals(len(resp.data),4)
+        self.assertTrue(all(uri.startswith("data:image/png;base64,") for uri in resp.data))
+        self.assertEquals(resp.data[0],resp.data[3])
+        self.assertEquals(Graph.objects.count(),3)
+        resp = self.client.post(reverse('makeReports:api-graph-batch'),{
+            'graphs': [numberSLOs]
+        },content_type="application/json")
+        self.assertEquals(Graph.objects.count(),3)
+        graph = Graph.objects.get(parameters=resp.data[0].rstrip("/").split("/")[-1])
+        self.assertEquals(resp.data[0],reverse('makeReports:api-graph-image',kwargs={'key':graph.parameters}))
+    def test_batch_api_bad_parameters(self):
+        """
+        Tests the batch API rejects graphs missing parameters
+        """
+        resp = self.client.post(reverse('makeReports:api-graph-batch'),{
+            'graphs': [{'decision': 3}]
+        },content_type="application/json")
+        self.assertEquals(resp.status_code,400)
+    def test_import_and_render(self):
+        """
+        Tests the rendering module sets up its style when loaded and then draws a graph
+        """
+        module = importlib.reload(importlib.import_module('makeReports.views.helperFunctions.graph_rendering'))
+        df = get_numberSLOs_series(2016,2018,self.program.pk,{str(self.slo1.pk):"1"})
+        image = module.render_bar_graph(df,['Met','Not Met'],'svg')
+        self.assertIn(b"<svg",image)
+class RollupTests(AACTest):
+    """
+    Tests the rollup cube is refreshed incrementally and sliced by its API
+    """
+    def setUp(self):
+        """
+        Sets up a report with an SLO with a direct assessment and an SLO without assessments
+        """
+        super().setUp()
+        self.prog = baker.make("DegreeProgram",department=self.dept,level="UG")
+        rpt = baker.make("Report",degreeProgram=self.prog,year=2020)
+        self.sloIR = baker.make("SLOInReport",report=rpt)
+        self.aV = baker.make("AssessmentVersion",report=rpt,slo=self.sloIR,target=70,assessment__directMeasure=True)
+        baker.make("AssessmentData",assessmentVersion=self.aV,numberStudents=10,overallProficient=80)
+        self.unassessed = baker.make("SLOInReport",report=rpt)
+    def slice(self, **params):
+        """
+        Gets the groups of a slice from the API, keyed by their dimensions
+        """
+        resp = self.client.get(reverse('makeReports:api-rollup'),params)
+        self.assertEquals(resp.status_code,200)
+        return {tuple(g[d] for d in resp.data['groupby']): g for g in resp.data['groups']}
+    def test_slices(self):
+        """
+        Tests groups are summed from the cells, with missing assessments as their own group
+        """
+        self.assertEquals(refresh_rollup(),(1,2))
+        groups = self.slice(groupby="directMeasure",college=self.col.pk)
+        self.assertEquals(groups[(True,)]['students'],10)
+        self.assertAlmostEqual(groups[(True,)]['weightedProficiency'],0.8)
+        self.assertEquals(groups[(True,)]['metShare'],1)
+        self.assertEquals(groups[(None,)]['assessments'],0)
+        self.assertEquals(groups[(None,)]['slos'],1)
+        total = self.slice(level="UG",year__gte=2019)[()]
+        self.assertEquals(total['slos'],2)
+        resp = self.client.get(reverse('makeReports:api-rollup'),{'groupby':"color"})
+        self.assertEquals(resp.status_code,400)
+    def test_incremental(self):
+        """
+        Tests only changed slices are recomputed, including those with deleted objects
+        """
+        refresh_rollup()
+        self.assertEquals(refresh_rollup(),(0,0))
+        rpt = baker.make("Report",degreeProgram=self.prog,year=2021)
+        baker.make("SLOInReport",report=rpt)
+        self.assertEquals(refresh_rollup(),(1,1))
+        self.unassessed.delete()
+        self.assertEquals(refresh_rollup(),(1,1))
+        self.assertEquals(self.slice(groupby="year")[(2020,)]['slos'],1)
+    def test_dimension_changes(self):
+        """
+        Tests changing the Bloom's taxonomy level of an SLO, the kind of measure of an assessment, the level of a
+        program or the college of a department recomputes its slice, without marking the SLOs as changed
+        """
+        refresh_rollup()
+        updatedAt = SLOInReport.objects.get(pk=self.sloIR.pk).updatedAt
+        slo = self.sloIR.slo
+        slo.blooms = "KN" if slo.blooms == "EV" else "EV"
+        slo.save()
+        self.assertEquals(refresh_rollup(),(1,2))
+        self.assertEquals(self.slice(groupby="blooms,directMeasure")[(slo.blooms,True)]['slos'],1)
+        assessment = self.aV.assessment
+        assessment.directMeasure = False
+        assessment.save()
+        self.assertEquals(refresh_rollup(),(1,2))
+        groups = self.slice(groupby="directMeasure")
+        self.assertEquals(groups[(False,)]['students'],10)
+        self.assertNotIn((True,),groups)
+        self.prog.level = "GR"
+        self.prog.save()
+        self.assertEquals(refresh_rollup(),(1,2))
+        self.assertEquals(self.slice(groupby="level")[("GR",)]['slos'],2)
+        college = baker.make("College")
+        self.dept.college = college
+        self.dept.save()
+        self.assertEquals(refresh_rollup(),(1,2))
+        self.assertEquals(self.slice(college=college.pk)[()]['slos'],2)
+        self.assertEquals(refresh_rollup(),(0,0))
+        self.assertEquals(SLOInReport.objects.get(pk=self.sloIR.pk).updatedAt,updatedAt)
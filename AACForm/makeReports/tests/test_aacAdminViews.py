@@ -17,6 +17,12 @@ class AACBasicViewsTest(ReportAACSetupTest):
         """
         response = self.client.get(reverse('makeReports:admin-home'))
         self.assertEquals(response.status_code,200)
+    def test_signal_audit(self):
+        """
+        Tests the signal audit page exists
+        """
+        response = self.client.get(reverse('makeReports:signal-audit'))
+        self.assertEquals(response.status_code,200)
 class AACCollegeViewsTest(ReportAACSetupTest):
     """
     Tests the AAC admin views related to the colleges
@@ -0,0 +1,213 @@
+"""
+Tests relating to management commands
+"""
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from makeReports.models import AssessmentAggregate, AssessmentData, AssessmentOutcome, Graph, SLOStatus
+from model_bakery import baker
+from makeReports.views.API.graphAPI import graph_parameters_key, graph_revision
+from makeReports.views.helperFunctions.graph_store import reusable_graphs
+
+class RecomputeAggregatesTests(TestCase):
+    """
+    Tests the command recomputing aggregates and statuses
+    """
+    def setUp(self):
+        """
+        Setups a report with an assessment and data, then makes the aggregate and status stale
+        """
+        super().setUp()
+        self.rpt = baker.make("Report", year=2019)
+        self.slo = baker.make("SLOInReport", report=self.rpt)
+        self.aV = baker.make("AssessmentVersion", report=self.rpt, slo=self.slo, target=50)
+        baker.make("AssessmentData", assessmentVersion=self.aV, numberStudents=10, overallProficient=40)
+        baker.make("AssessmentData", assessmentVersion=self.aV, numberStudents=30, overallProficient=80)
+        AssessmentAggregate.objects.filter(assessmentVersion=self.aV).update(aggregate_proficiency=5, met=False)
+        SLOStatus.objects.filter(sloIR=self.slo).update(status="Not Met")
+    def test_recompute(self):
+        """
+        Tests the aggregate and status are recomputed
+        """
+        call_command('recompute_aggregates', stdout=StringIO())
+        agg = AssessmentAggregate.objects.get(assessmentVersion=self.aV)
+        self.assertEquals(agg.aggregate_proficiency, 70)
+        self.assertTrue(agg.met)
+        self.assertEquals(SLOStatus.objects.get(sloIR=self.slo).status, "Met")
+    def test_unchanged_outcomes(self):
+        """
+        Tests analytics rows already holding the recomputed values are not rewritten
+        """
+        updatedAt = sorted(AssessmentOutcome.objects.values_list('updatedAt', flat=True))
+        call_command('recompute_aggregates', stdout=StringIO())
+        call_command('recompute_aggregates', stdout=StringIO())
+        self.assertEquals(sorted(AssessmentOutcome.objects.values_list('updatedAt', flat=True)), updatedAt)
+        self.assertEquals(set(AssessmentOutcome.objects.values_list('aggregate_proficiency', 'status')), {(70, "Met")})
+    def test_dry_run(self):
+        """
+        Tests a dry run shows the changes without saving them
+        """
+        out = StringIO()
+        call_command('recompute_aggregates', '--dry-run', stdout=out)
+        self.assertIn("-> (70, True)", out.getvalue())
+        agg = AssessmentAggregate.objects.get(assessmentVersion=self.aV)
+        self.assertEquals(agg.aggregate_proficiency, 5)
+    def test_override(self):
+        """
+        Tests overridden aggregates are not recomputed
+        """
+        AssessmentAggregate.objects.filter(assessmentVersion=self.aV).update(override=True)
+        call_command('recompute_aggregates', stdout=StringIO())
+        agg = AssessmentAggregate.objects.get(assessmentVersion=self.aV)
+        self.assertEquals(agg.aggregate_proficiency, 5)
+    def test_other_years(self):
+        """
+        Tests reports outside the chosen years are not recomputed
+        """
+        call_command('recompute_aggregates', '--years', '2018', stdout=StringIO())
+        agg = AssessmentAggregate.objects.get(assessmentVersion=self.aV)
+        self.assertEquals(agg.aggregate_proficiency, 5)
+    def test_clear_overrides(self):
+        """
+        Tests overrides are cleared when asked to
+        """
+        AssessmentAggregate.objects.filter(assessmentVersion=self.aV).update(override=True)
+        SLOStatus.objects.filter(sloIR=self.slo).update(override=True)
+        call_command('recompute_aggregates', '--clear-overrides', stdout=StringIO())
+        agg = AssessmentAggregate.objects.get(assessmentVersion=self.aV)
+        self.assertFalse(agg.override)
+        self.assertEquals(agg.aggregate_proficiency, 70)
+        sS = SLOStatus.objects.get(sloIR=self.slo)
+        self.assertFalse(sS.override)
+        self.assertEquals(sS.status, "Met")
+class GraphSoakTests(TestCase):
+    """
+    Tests the graph soak benchmark
+    """
+    def test_soak(self):
+        """
+        Tests the benchmark draws the graphs and reports the memory
+        """
+        out = StringIO()
+        call_command('graph_soak', graphs=4, threads=2, every=2, stdout=out)
+        self.assertIn("4 graphs:", out.getvalue())
+        self.assertIn("Drew 4 graphs", out.getvalue())
+class ExpireGraphsTests(TestCase):
+    """
+    Tests the command deleting expired graphs
+    """
+    def test_expire(self):
+        """
+        Tests only graphs older than the expiry time are deleted, leaving precomputed graphs to their command
+        """
+        baker.make("Graph", dateTime=timezone.now()-timedelta(minutes=30), image=b"old", _quantity=3)
+        new = baker.make("Graph", dateTime=timezone.now()-timedelta(minutes=5), image=b"new")
+        precomputed = baker.make("Graph", dateTime=timezone.now()-timedelta(days=1), image=b"pre", precomputed=True)
+        out = StringIO()
+        call_command('expire_graphs', batch_size=2, stdout=out)
+        self.assertIn("Deleted 3 expired graphs", out.getvalue())
+        self.assertEquals(sorted(Graph.objects.values_list('pk', flat=True)), [new.pk, precomputed.pk])
+class PrecomputeGraphsTests(TestCase):
+    """
+    Tests the command drawing the standard graphs ahead of time
+    """
+    def test_precompute(self):
+        """
+        Tests the graphs are drawn with the parameters the graphing page sends, served until their own data
+        changes, and replaced when run again
+        """
+        dept = baker.make("Department")
+        program = baker.make("DegreeProgram", department=dept)
+        sloIR = baker.make("SLOInReport", report__degreeProgram=program, report__year=2018)
+        call_command('precompute_graphs', windows=[2], stdout=StringIO())
+        self.assertEquals(Graph.objects.filter(precomputed=True).count(), 2)
+        spec = {
+            'decision': "2",
+            'report__degreeProgram': str(program.pk),
+            'report__year__gte': "2017",
+            'report__year__lte': "2018",
+            'sloWeights': json.dumps({sloIR.slo.pk: 1})
+        }
+        self.assertTrue(reusable_graphs([graph_parameters_key(spec, graph_revision(spec))]).exists())
+        call_command('precompute_graphs', windows=[2], stdout=StringIO())
+        self.assertEquals(Graph.objects.count(), 2)
+        #data of other programs does not stop the graph being served
+        baker.make("AssessmentData", assessmentVersion__report__year=2018, overallProficient=50)
+        self.assertTrue(reusable_graphs([graph_parameters_key(spec, graph_revision(spec))]).exists())
+        baker.make("SLOInReport", report=sloIR.report)
+        self.assertFalse(reusable_graphs([graph_parameters_key(spec, graph_revision(spec))]).exists())
+class CSVBenchmarkTests(TestCase):
+    """
+    Tests the CSV export benchmark
+    """
+    def test_benchmark(self):
+        """
+        Tests both exports give the same file and the data points are removed afterwards
+        """
+        aV = baker.make("AssessmentVersion")
+        baker.make("AssessmentAggregate", assessmentVersion=aV, override=True)
+        baker.make("AssessmentVersion")
+        out = StringIO()
+        call_command('csv_benchmark', rows=50, batch_size=20, stdout=out)
+        self.assertIn("for 52 lines", out.getvalue())
+        self.assertEquals(AssessmentData.objects.count(), 0)
+class RebuildAnalyticsTests(TestCase):
+    """
+    Tests the command rebuilding the analytics table
+    """
+    def test_rebuild(self):
+        """
+        Tests rows missing after a bulk insert are built and stale rows are rewritten
+        """
+        aV = baker.make("AssessmentVersion")
+        data = baker.make("AssessmentData", assessmentVersion=aV, numberStudents=5, overallProficient=60)
+        AssessmentData.objects.bulk_create([
+            AssessmentData(assessmentVersion=aV, dataRange="Bulk", numberStudents=7, overallProficient=80)])
+        AssessmentOutcome.objects.filter(data=data).update(numberStudents=1)
+        out = StringIO()
+        call_command('rebuild_analytics', stdout=out)
+        self.assertIn("Rebuilt 2 analytics rows", out.getvalue())
+        self.assertEquals(AssessmentOutcome.objects.get(data=data).numberStudents, 5)
+        self.assertEquals(AssessmentOutcome.objects.get(dataRange="Bulk").numberStudents, 7)
+class BuildWarehouseTests(TestCase):
+    """
+    Tests the command writing the SQLite warehouse
+    """
+    def test_build_and_refresh(self):
+        """
+        Tests the first run builds every table and later runs copy only changes and remove deleted rows
+        """
+        rpt = baker.make("Report", year=2020)
+        aV = baker.make("AssessmentVersion", report=rpt, slo__report=rpt, target=50)
+        kept = baker.make("AssessmentData", assessmentVersion=aV, numberStudents=10, overallProficient=60)
+        removed = baker.make("AssessmentData", assessmentVersion=aV, numberStudents=20, overallProficient=70)
+        #the signals create the SLO's status from the data
+        self.assertEquals(SLOStatus.objects.get(sloIR=aV.slo).status, "Met")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "warehouse.sqlite3")
+            out = StringIO()
+            call_command('build_warehouse', path=path, stdout=out)
+            self.assertIn("fact_data: 2", out.getvalue())
+            removedPk = removed.pk
+            removed.delete()
+            kept.numberStudents = 11
+            kept.save()
+            out = StringIO()
+            call_command('build_warehouse', path=path, stdout=out)
+            self.assertIn("fact_data: 1", out.getvalue())
+            conn = sqlite3.connect(path)
+            try:
+                self.assertEquals(conn.execute("SELECT data_id, number_students, year FROM fact_data").fetchall(),
+                    [(kept.pk, 11, 2020)])
+                self.assertEquals(conn.execute("SELECT COUNT(*) FROM fact_data WHERE data_id = ?", [removedPk]).fetchone()[0], 0)
+                self.assertEquals(conn.execute(
+                    "SELECT s.status, y.year FROM fact_slo_status s JOIN dim_year y ON y.year = s.year").fetchall(),
+                    [("Met", 2020)])
+            finally:
+                conn.close()
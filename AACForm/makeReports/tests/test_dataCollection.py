@@ -1,6 +1,7 @@
 """
 Tests related to testing data collection entry views
 """
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from makeReports.models import AssessmentAggregate, AssessmentData, ResultCommunicate, SLOStatus
 from model_bakery import baker
@@ -473,3 +474,91 @@ class DataCollectionExtrasTests(ReportAACSetupTest):
 
 
 
+class DataCollectionUploadTests(ReportAACSetupTest):
+    """
+    Tests uploading many data points at once from a CSV file
+    """
+    def setUp(self):
+        """
+        Creates an SLO with two measures to upload data for
+        """
+        super().setUp()
+        self.slo = baker.make("SLOInReport", report=self.rpt, number=1)
+        self.assess = baker.make("AssessmentVersion", report=self.rpt, slo=self.slo, number=1, target=70)
+        self.assess2 = baker.make("AssessmentVersion", report=self.rpt, slo=self.slo, number=2, target=70)
+    def upload(self, text):
+        """
+        Posts the text as the uploaded CSV file
+
+        Args:
+            text (str): contents of the CSV file
+        Returns:
+            HttpResponse : response to the post
+        """
+        f = SimpleUploadedFile("data.csv", text.encode('utf-8'), content_type="text/csv")
+        return self.client.post(reverse('makeReports:upload-data-collection',kwargs={
+            'report':self.rpt.pk
+        }),{'dataFile':f})
+    def test_upload_page(self):
+        """
+        Tests the upload page exists
+        """
+        r = self.client.get(reverse('makeReports:upload-data-collection',kwargs={
+            'report':self.rpt.pk
+        }))
+        self.assertEquals(r.status_code,200)
+    def test_upload(self):
+        """
+        Tests uploaded data is created and the aggregates and status are computed
+        """
+        resp = self.upload(
+            "SLO,Measure,Data Range,Number of Students,Percentage Proficient\n"
+            "1,1,Fall 2019,10,60\n"
+            "1,1,Spring 2020,30,80\n"
+            "1,2,Fall 2019,20,50\n"
+        )
+        self.assertEquals(resp.status_code,302)
+        self.assertEquals(AssessmentData.objects.filter(assessmentVersion=self.assess).count(),2)
+        self.assertEquals(AssessmentData.objects.filter(assessmentVersion=self.assess2).count(),1)
+        agg = AssessmentAggregate.objects.get(assessmentVersion=self.assess)
+        self.assertEquals(agg.aggregate_proficiency,75)
+        self.assertTrue(agg.met)
+        self.assertFalse(AssessmentAggregate.objects.get(assessmentVersion=self.assess2).met)
+        self.assertEquals(SLOStatus.objects.get(sloIR=self.slo).status,SLO_STATUS_CHOICES[1][0])
+    def test_upload_invalid(self):
+        """
+        Tests no data is created when any row is invalid
+        """
+        resp = self.upload(
+            "SLO,Measure,Data Range,Number of Students,Percentage Proficient\n"
+            "1,1,Fall 2019,10,60\n"
+            "1,3,Fall 2019,20,50\n"
+        )
+        self.assertContains(resp,"there is no measure 3 for SLO 1")
+        self.assertEquals(AssessmentData.objects.filter(assessmentVersion__report=self.rpt).count(),0)
+    def test_upload_duplicates(self):
+        """
+        Tests rows repeating another row's key, or the key of existing data, are rejected
+        """
+        resp = self.upload(
+            "SLO,Measure,Data Range,Number of Students,Percentage Proficient\n"
+            "1,1,Fall 2019,10,60\n"
+            "1,1,Fall 2019,20,50\n"
+        )
+        self.assertContains(resp,"repeats the SLO, measure and data range of line 2")
+        self.assertEquals(AssessmentData.objects.filter(assessmentVersion__report=self.rpt).count(),0)
+        baker.make("AssessmentData",assessmentVersion=self.assess,dataRange="Spring 2020",numberStudents=5,overallProficient=90)
+        resp = self.upload(
+            "SLO,Measure,Data Range,Number of Students,Percentage Proficient\n"
+            "1,1,Fall 2019,10,60\n"
+            "1,1,Spring 2020,30,80\n"
+        )
+        self.assertContains(resp,"there is already data for measure 1 of SLO 1 with the data range Spring 2020")
+        self.assertEquals(AssessmentData.objects.filter(assessmentVersion__report=self.rpt).count(),1)
+    def test_upload_bad_header(self):
+        """
+        Tests files without the expected column names are rejected
+        """
+        resp = self.upload("1,1,Fall 2019,10,60\n")
+        self.assertNotEquals(resp.status_code,302)
+        self.assertEquals(AssessmentData.objects.filter(assessmentVersion__report=self.rpt).count(),0)
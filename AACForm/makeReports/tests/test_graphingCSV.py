@@ -1,7 +1,18 @@
 """
 Tests graphing and CSV view pages exist
 """
+import gzip
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from makeReports.models import ExportJob
+from makeReports.views.helperFunctions.delta_export import DeltaExportMixin, parse_since
+from makeReports.views.helperFunctions.export_jobs import run_export_job
 from .test_basicViews import ReportAACSetupTest
 
 class GraphPagesTests(ReportAACSetupTest):
@@ -57,6 +68,133 @@ class CSVPagesTest(ReportAACSetupTest):
             'lYear':2014
         }))
         self.assertEquals(resp.status_code,200)
+    def test_CSVStreaming(self):
+        """
+        Tests the CSV is streamed with a header and a row for each data point
+        """
+        aV = baker.make("AssessmentVersion",report=self.rpt)
+        baker.make("AssessmentData",assessmentVersion=aV,dataRange="Fall semester",overallProficient=70,_quantity=3)
+        resp = self.client.get(reverse('makeReports:csv-dept',kwargs={
+            'dept':self.rpt.degreeProgram.department.pk,
+            'gYear':self.rpt.year,
+            'lYear':self.rpt.year
+        }))
+        self.assertTrue(resp.streaming)
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEquals(lines[0],"sep=,")
+        self.assertIn('"Number Of Students"',lines[1])
+        self.assertEquals(len(lines),5)
+        self.assertIn('"Fall semester"',lines[2])
+    def test_CSVJoinedQuery(self):
+        """
+        Tests the number of queries of the CSV does not grow with its rows, and data without aggregates are exported
+        """
+        url = reverse('makeReports:csv-dept',kwargs={
+            'dept':self.rpt.degreeProgram.department.pk,
+            'gYear':self.rpt.year,
+            'lYear':self.rpt.year
+        })
+        aV = baker.make("AssessmentVersion",report=self.rpt)
+        baker.make("AssessmentData",assessmentVersion=aV,overallProficient=70)
+        resp = self.client.get(url)
+        with CaptureQueriesContext(connection) as one:
+            b"".join(resp.streaming_content)
+        aV2 = baker.make("AssessmentVersion",report=self.rpt)
+        baker.make("AssessmentAggregate",assessmentVersion=aV2,aggregate_proficiency=1072,override=True)
+        baker.make("AssessmentData",assessmentVersion=aV2,overallProficient=70,_quantity=4)
+        resp = self.client.get(url)
+        with CaptureQueriesContext(connection) as many:
+            lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEquals(len(many),len(one))
+        self.assertEquals(len(lines),7)
+        self.assertEquals(sum('"1072"' in line for line in lines),4)
+    def test_Parquet(self):
+        """
+        Tests the Parquet file has typed columns and a row for each data point
+        """
+        aV = baker.make("AssessmentVersion",report=self.rpt)
+        baker.make("AssessmentData",assessmentVersion=aV,numberStudents=12,overallProficient=70,_quantity=3)
+        resp = self.client.get(reverse('makeReports:csv-col',kwargs={
+            'col':self.rpt.degreeProgram.department.college.pk,
+            'gYear':self.rpt.year,
+            'lYear':self.rpt.year
+        })+"?format=parquet")
+        self.assertEquals(resp['Content-Type'],"application/vnd.apache.parquet")
+        table = pq.read_table(pa.BufferReader(resp.content))
+        self.assertEquals(table.num_rows,3)
+        self.assertEquals(table.schema.field('numberStudents').type,pa.int64())
+        self.assertEquals(table.schema.field('date').type,pa.date32())
+        self.assertEquals(table.schema.field('met').type,pa.bool_())
+        self.assertTrue(pa.types.is_dictionary(
+            table.schema.field('departmentName').type))
+        self.assertEquals(table.column('numberStudents').to_pylist(),[12,12,12])
+    @override_settings(EXPORT_JOB_ROWS=2)
+    def test_exportJob(self):
+        """
+        Tests large exports are written in the background, downloaded once done and reused until the data changes
+        """
+        aV = baker.make("AssessmentVersion",report=self.rpt)
+        baker.make("AssessmentData",assessmentVersion=aV,overallProficient=70,_quantity=3)
+        url = reverse('makeReports:csv-dept',kwargs={
+            'dept':self.rpt.degreeProgram.department.pk,
+            'gYear':self.rpt.year,
+            'lYear':self.rpt.year
+        })
+        resp = self.client.get(url)
+        job = ExportJob.objects.get()
+        self.assertRedirects(resp,reverse('makeReports:csv-mang')+"?job=%d" % job.pk)
+        self.assertEquals(job.rows,3)
+        run_export_job(job.pk)
+        resp = self.client.get(reverse('makeReports:export-job-status',kwargs={'pk':job.pk}))
+        self.assertEquals(resp.json()['status'],"done")
+        resp = self.client.get(resp.json()['download'])
+        lines = gzip.decompress(b"".join(resp.streaming_content)).decode().splitlines()
+        self.assertEquals(len(lines),5)
+        self.client.get(url)
+        self.assertEquals(ExportJob.objects.count(),1)
+        baker.make("AssessmentData",assessmentVersion=aV,overallProficient=70)
+        self.client.get(url)
+        self.assertEquals(ExportJob.objects.count(),2)
+        ExportJob.objects.get(pk=job.pk).artifact.delete(save=False)
+    def test_CSVDelta(self):
+        """
+        Tests exports since a cursor only have the changed data, and deleted data is listed as tombstones
+        """
+        aV = baker.make("AssessmentVersion",report=self.rpt)
+        deleted = baker.make("AssessmentData",assessmentVersion=aV,overallProficient=70)
+        aV2 = baker.make("AssessmentVersion",report=self.rpt)
+        old = baker.make("AssessmentData",assessmentVersion=aV2,overallProficient=70)
+        url = reverse('makeReports:csv-dept',kwargs={
+            'dept':self.rpt.degreeProgram.department.pk,
+            'gYear':self.rpt.year,
+            'lYear':self.rpt.year
+        })
+        resp = self.client.get(url)
+        b"".join(resp.streaming_content)
+        cursor = resp['X-Export-Cursor']
+        #rows committed late are not missed
+        self.assertLessEqual(parse_since(cursor),timezone.now()-DeltaExportMixin.cursor_margin)
+        self.assertEquals(len(b"".join(self.client.get(url,{'since':cursor}).streaming_content).decode().splitlines()),4)
+        now = timezone.now().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        self.assertEquals(len(b"".join(self.client.get(url,{'since':now}).streaming_content).decode().splitlines()),2)
+        deletedPk = deleted.pk
+        deleted.delete()
+        new = baker.make("AssessmentData",assessmentVersion=aV2,overallProficient=90)
+        resp = self.client.get(url,{'since':cursor})
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        #the new data changes the aggregate shown on the old data's row too
+        self.assertEquals(sorted(line.split(",")[0] for line in lines[2:]),sorted(['"%d"' % old.pk,'"%d"' % new.pk]))
+        resp = self.client.get(reverse('makeReports:csv-deleted'),{'since':cursor})
+        lines = b"".join(resp.streaming_content).decode()
+        self.assertIn('"AssessmentData","%d"' % deletedPk,lines)
+        self.user.profile.aac = False
+        self.user.profile.save()
+        resp = self.client.get(reverse('makeReports:csv-deleted'),{'since':cursor})
+        self.assertEquals(resp.status_code,403)
+        self.user.profile.aac = True
+        self.user.profile.save()
+        resp = self.client.get(url,{'since':"yesterday"})
+        self.assertEquals(resp.status_code,400)
     def test_CSVManagement(self):
         """
         Ensures the CSV Management page exists
@@ -1,8 +1,11 @@
 """
 Tests relating to signals
 """
+from django.db import connection
 from django.test import TestCase
-from makeReports.models import AssessmentAggregate, SLOStatus
+from django.test.utils import CaptureQueriesContext
+from makeReports.models import AssessmentAggregate, AssessmentOutcome, AssessmentVersion, SLOStatus, User
+from makeReports.signals import audit
 from model_bakery import baker
 
 class AggregateReceiverTests(TestCase):
@@ -49,8 +52,138 @@ class AggregateReceiverTests(TestCase):
         data.save()
         a.refresh_from_db()
         self.assertEquals(a.aggregate_proficiency,data.overallProficient)
-    
-        
-
-    
-    
+class DirtyFieldsTests(TestCase):
+    """
+    Tests related to only saving fields which changed
+    """
+    def setUp(self):
+        """
+        Setups an assessment with an aggregate
+        """
+        super().setUp()
+        self.aV = baker.make("AssessmentVersion", target=50)
+        self.agg = baker.make("AssessmentAggregate",assessmentVersion=self.aV,aggregate_proficiency=60,met=True)
+    def test_dirty_fields(self):
+        """
+        Tests only changed fields are reported as dirty
+        """
+        aV = AssessmentVersion.objects.get(pk=self.aV.pk)
+        self.assertEquals(aV.get_dirty_fields(),[])
+        aV.target = 70
+        self.assertEquals(aV.get_dirty_fields(),['target'])
+        self.assertTrue(aV.has_changed('target','threshold'))
+        self.assertFalse(aV.has_changed('threshold'))
+        aV.save()
+        self.assertEquals(aV.get_dirty_fields(),[])
+    def test_updated_at(self):
+        """
+        Tests saving changed fields also writes the time of the change
+        """
+        aV = AssessmentVersion.objects.get(pk=self.aV.pk)
+        before = aV.updatedAt
+        aV.description = "New description"
+        aV.save()
+        aV = AssessmentVersion.objects.get(pk=self.aV.pk)
+        self.assertGreater(aV.updatedAt,before)
+        self.assertEquals(aV.get_dirty_fields(),[])
+    def test_noop_save(self):
+        """
+        Tests saving without changes does not write to the database
+        """
+        aV = AssessmentVersion.objects.get(pk=self.aV.pk)
+        with self.assertNumQueries(0):
+            aV.save()
+    def test_target_change_agg(self):
+        """
+        Tests the aggregate is still updated when the target changes
+        """
+        aV = AssessmentVersion.objects.get(pk=self.aV.pk)
+        aV.target = 70
+        aV.save()
+        self.agg.refresh_from_db()
+        self.assertFalse(self.agg.met)
+    def test_other_change_agg(self):
+        """
+        Tests the aggregate is not checked when fields other than the target change
+        """
+        aV = AssessmentVersion.objects.get(pk=self.aV.pk)
+        aV.description = "New description"
+        with CaptureQueriesContext(connection) as queries:
+            aV.save()
+        #the description is copied to the analytics table, but the aggregate is not affected
+        table = 'FROM "%s"' % AssessmentAggregate._meta.db_table
+        self.assertFalse([q for q in queries if table in q['sql']])
+    def test_user_save_profile(self):
+        """
+        Tests saving an existing user does not save the profile again
+        """
+        user = User.objects.create_user(username='Sam', password='passywordy')
+        self.assertIsNotNone(user.profile)
+        user = User.objects.get(pk=user.pk)
+        user.first_name = "Sam"
+        with self.assertNumQueries(1):
+            user.save()
+class SignalAuditTests(TestCase):
+    """
+    Tests related to auditing the work done by receivers
+    """
+    def test_audit_cascade(self):
+        """
+        Tests receivers triggered by saving data are recorded, including the writes of the receivers they trigger
+        """
+        aV = baker.make("AssessmentVersion", target=50)
+        a = audit.SignalAudit("test")
+        audit._state.audit = a
+        try:
+            with connection.execute_wrapper(a):
+                baker.make("AssessmentData", assessmentVersion=aV, overallProficient=60)
+        finally:
+            audit._state.audit = None
+        a.finish()
+        byData = a.receivers['data_signals.post_save_agg_by_data']
+        byAgg = a.receivers['data_signals.post_save_status_by_agg']
+        self.assertEquals(byData['calls'], 1)
+        self.assertEquals(byAgg['calls'], 1)
+        self.assertGreaterEqual(byData['rows'], byAgg['rows'])
+        self.assertGreaterEqual(byAgg['rows'], 1)
+        self.assertIn(a, audit.recentAudits)
+    def test_not_audited(self):
+        """
+        Tests receivers run normally when no request is being audited
+        """
+        aV = baker.make("AssessmentVersion", target=50)
+        baker.make("AssessmentData", assessmentVersion=aV, overallProficient=60)
+        self.assertTrue(AssessmentAggregate.objects.get(assessmentVersion=aV).met)
+class AnalyticsReceiverTests(TestCase):
+    """
+    Tests the analytics table is kept up to date by the signals
+    """
+    def test_outcome_refresh(self):
+        """
+        Tests rows follow their data, aggregate, status, department and report, and go with their data
+        """
+        aV = baker.make("AssessmentVersion", target=50)
+        data = baker.make("AssessmentData", assessmentVersion=aV, overallProficient=60, numberStudents=10)
+        outcome = AssessmentOutcome.objects.get(data=data)
+        self.assertEquals(outcome.numberStudents, 10)
+        self.assertTrue(outcome.met)
+        self.assertEquals(outcome.year, aV.report.year)
+        status = SLOStatus.objects.get(sloIR=aV.slo)
+        status.status = "Partially Met"
+        status.override = True
+        status.save()
+        dept = aV.report.degreeProgram.department
+        dept.name = "Renamed"
+        dept.save()
+        report = aV.report
+        report.year = 2031
+        report.save()
+        data.numberStudents = 11
+        data.save()
+        outcome = AssessmentOutcome.objects.get(data=data)
+        self.assertEquals(outcome.status, "Partially Met")
+        self.assertEquals(outcome.departmentName, "Renamed")
+        self.assertEquals(outcome.year, 2031)
+        self.assertEquals(outcome.numberStudents, 11)
+        data.delete()
+        self.assertFalse(AssessmentOutcome.objects.exists())
@@ -111,6 +111,7 @@ urlpatterns = [
     re_path(r'^aac/ann/(?P<pk>\d+)/delete/$', views.DeleteAnnouncement.as_view(),name='delete-announ'),
     re_path(r'^aac/ann/(?P<pk>\d+)/modify/$', views.ModifyAnnouncement.as_view(),name='edit-announ'),
     re_path(r'^aac/report/required/$', views.ChangeRequiredFields.as_view(), name='req-fields'),
+    re_path(r'^aac/debug/signals/$', views.SignalAuditPanel.as_view(), name='signal-audit'),
     #Grading urls
     re_path(r'^aac/report/(?P<report>\d+)/grading/entry/$',views.GradingEntry.as_view() ,name='grade-entry'),
     re_path(r'^aac/report/(?P<report>\d+)/grading/section1/$', views.Section1Grading.as_view(), name='grade-sec1'),
@@ -139,6 +140,8 @@ urlpatterns = [
         views.CreateDataCollectionRow.as_view(), name='add-data-collection'),
     re_path(r'^report/(?P<report>\d+)/datacollection/assessment/(?P<assessment>\d+)/add/assess/$', 
         views.CreateDataCollectionRowAssess.as_view(), name='add-data-collection-assess'),
+    re_path(r'^report/(?P<report>\d+)/datacollection/upload/$', 
+        views.UploadDataCollectionRows.as_view(), name='upload-data-collection'),
     re_path(r'^report/(?P<report>\d+)/datacollection/assessment/edit/(?P<dataCollection>\d+)/$', 
         views.EditDataCollectionRow.as_view(), name='edit-data-collection'),
     re_path(r'^report/(?P<report>\d+)/datacollection/assessment/delete/(?P<pk>\d+)/$', 
@@ -190,6 +193,11 @@ urlpatterns = [
     re_path(r'^api/slo/dp/$', views.SloByDPListAPI.as_view(),name='api-slo-by-dp'),
     re_path(r'^api/assess/slo/$', views.AssessmentBySLO.as_view(),name='api-assess-by-slo'),
     re_path(r'^api/graph/$', views.createGraphAPI.as_view(),name='api-new-graph'),
+    re_path(r'^api/graph/(?P<key>[0-9a-f]{40})/$', views.GraphImageAPI.as_view(),name='api-graph-image'),
+    re_path(r'^api/graph/series/$', views.GraphSeriesAPI.as_view(),name='api-graph-series'),
+    re_path(r'^api/graph/batch/$', views.GraphBatchAPI.as_view(),name='api-graph-batch'),
+    re_path(r'^api/graph/trends/$', views.SLOTrendAPI.as_view(),name='api-slo-trends'),
+    re_path(r'^api/rollup/$', views.RollupAPI.as_view(),name='api-rollup'),
     re_path(r'^api/blooms/$', views.BloomsSuggestionsAPI.as_view(), name='api-bloom-words'),
     re_path(r'^api/import/years/$', views.ImportYearsAPI.as_view(), name='api-impt-years'),
     re_path(r'^api/override/clear/$', views.ClearOverrideAPI.as_view(), name='api-clear-ovr'),
@@ -203,5 +211,8 @@ urlpatterns = [
         views.OutputCSVDepartment.as_view(),name="csv-dept"),
     re_path(r'^csv/dept/(?P<dept>\d+)/dp/(?P<dP>\d+)/(?P<gYear>\d+)/(?P<lYear>\d+)/$', 
         views.OutputCSVDP.as_view(),name="csv-dp"),
+    re_path(r'^csv/deleted/$', views.DeletedRecordsCSV.as_view(),name="csv-deleted"),
     re_path(r'^csv/management/$', views.CSVManagement.as_view(),name="csv-mang"),
+    re_path(r'^csv/job/(?P<pk>\d+)/$', views.ExportJobStatus.as_view(),name="export-job-status"),
+    re_path(r'^csv/job/(?P<pk>\d+)/download/$', views.ExportJobDownload.as_view(),name="export-job-download"),
 ]
\ No newline at end of file
@@ -9,6 +9,7 @@ from django.views.generic.list import ListView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
 from django.views.generic import TemplateView
 from django.urls import reverse_lazy
+from django.conf import settings
 from makeReports.models import (
     Announcement, 
     College, 
@@ -31,6 +32,7 @@ from makeReports.forms import (
 )
 from makeReports.choices import POSSIBLE_REQS
 from makeReports.views.helperFunctions.mixins import AACOnlyMixin
+from makeReports.signals.audit import recentAudits
 
 class AdminHome(AACOnlyMixin,FormView):
     """
@@ -664,4 +666,20 @@ class ChangeRequiredFields(AACOnlyMixin,FormView):
                 reqSetting.save()
             except:
                 RequiredFieldSetting.objects.create(name=req[0],required=form.cleaned_data[req[0]])
-        return super().form_valid(form)
\ No newline at end of file
+        return super().form_valid(form)
+class SignalAuditPanel(AACOnlyMixin,TemplateView):
+    """
+    Debug page showing the queries and writes caused by signal receivers in recent requests
+    """
+    template_name = "makeReports/AACAdmin/signalAudit.html"
+    def get_context_data(self, **kwargs):
+        """
+        Gets the most recent audited requests handled by this worker
+
+        Returns:
+            dict : context for template, including the audits newest first
+        """
+        context = super(SignalAuditPanel,self).get_context_data(**kwargs)
+        context['enabled'] = getattr(settings, 'SIGNAL_AUDIT', False)
+        context['audits'] = list(reversed(recentAudits))
+        return context
@@ -7,8 +7,8 @@ from rest_framework.views import APIView
 from rest_framework.renderers import JSONRenderer
 from rest_framework.authentication import BasicAuthentication, SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
-from makeReports.models import AssessmentAggregate, Report, SLOStatus
-from makeReports.signals import update_status, update_agg
+from makeReports.models import Report
+from makeReports.views.helperFunctions.aggregates import reset_to_computed
 
 class ClearOverrideAPI(APIView):
     """
@@ -28,7 +28,8 @@ class ClearOverrideAPI(APIView):
             response (Response): empty response
 
         Notes:
-            Expects primary key of report to be passed in GET request as 'pk'
+            Expects primary key of report to be passed in GET request as 'pk'.
+            Every aggregate and status of the report is reset to its computed value in bulk.
         """
         pk = int(request.query_params['pk'])
         try:
@@ -37,15 +38,6 @@ class ClearOverrideAPI(APIView):
             raise Http404("Report matching URL does not exist")
         if((rpt.degreeProgram.department==request.user.profile.department) or request.user.profile.aac):
             #only proceed if the person truly has the right to modify the report
-            aggs = AssessmentAggregate.objects.filter(assessmentVersion__report__pk=pk, override=True)
-            for agg in aggs:
-                agg.override = False
-                #update_agg will save the change
-                update_agg(agg,0,0,agg.assessmentVersion)
-            statuses = SLOStatus.objects.filter(sloIR__report__pk=pk, override=True)
-            for status in statuses:
-                status.override = False
-                #update_status will save the change
-                update_status(status,0,0, status.sloIR)
+            reset_to_computed(Report.objects.filter(pk=pk))
             return Response()
 
@@ -1,236 +1,656 @@
 """
 This file contains the APIs to return graphs
 """
-import io
-from datetime import datetime, timedelta
-from matplotlib.ticker import FuncFormatter
+import base64
+import hashlib
 import pandas as pd
 import json
-import django.core.files as files
-from django.http import Http404
+from django.db.models import Count, Max, Q, Sum
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import views, status
 from rest_framework.response import Response
 from makeReports.models import AssessmentAggregate, DegreeProgram, Graph, SLOInReport, SLOStatus
 from makeReports.choices import SLO_STATUS_CHOICES
+from makeReports.views.helperFunctions.graph_rendering import (
+    GRAPH_FORMATS,
+    MAX_DPI,
+    MIN_DPI,
+    render_bar_graph,
+    render_bar_graphs
+)
+from makeReports.views.helperFunctions.graph_store import GRAPH_CACHE_MINUTES, live_graphs, reusable_graphs
+from makeReports.views.helperFunctions.rollup import ROLLUP_DIMENSIONS, slice_rollup
+from makeReports.views.helperFunctions.slo_trends import TREND_WINDOW, slo_trends, trends_payload
 
-def get_specificSLO_graph(request):
+#POST parameters each type of graph is drawn from, by decision
+GRAPH_PARAMETERS = {
+    '1': ('report__year__gte','report__year__lte','report__degreeProgram','sloIR','assess'),
+    '2': ('report__year__gte','report__year__lte','report__degreeProgram','sloWeights'),
+    '3': ('report__year__gte','report__year__lte','report__degreeProgram__department'),
+}
+
+def get_specificSLO_series(bYear, eYear, degreeProgram, slo, assess, withCounts=False):
     """
-    Graphs a specific SLO/Assessment combination performance over time
+    Computes the target and actual proficiency of a specific SLO/Assessment combination over time,
+    from one aggregate query
 
     Args:
-        request (HttpRequest): contains GET parameters
+        bYear (int): minimum year
+        eYear (int): maximum year
+        degreeProgram (str): primary key of the degree program
+        slo (str): primary key of the :class:`~makeReports.models.slo_models.SLOInReport`
+        assess (str): primary key of the :class:`~makeReports.models.assessment_models.Assessment`
+        withCounts (bool): whether to also return the number of students assessed
     Returns:
-        matplotlib.figure.Figure : figure, i.e. the graph
-    Notes:
-        Uses POST data 'report__year__gte' (min year), 'report__year__lte' (max year),
-        'report__degreeProgram' (degree program pk), 'sloIR' (SLOInReport primary key),
-        'assess' (Assessment primary key)
+        pandas.DataFrame : 'Year', 'Target' and 'Actual' columns, with one row per aggregate; if withCounts, 
+        also a DataFrame of 'Year' and 'Students' columns
     """
-    begYear=request.data['report__year__gte']
-    endYear = request.data['report__year__lte']
-    bYear=int(begYear)
-    eYear=int(endYear)
-    degreeProgram = request.data['report__degreeProgram']
-    slo = request.data['sloIR']
     try:
         sloObj = SLOInReport.objects.get(pk=slo)
     except SLOInReport.DoesNotExist:
         raise Http404("SLO matching URL does not exist.")
-    assess = request.data['assess']
-    queryset = AssessmentAggregate.objects.filter(
+    rows = pd.DataFrame.from_records(list(AssessmentAggregate.objects.filter(
         assessmentVersion__assessment__pk = assess,
-        assessmentVersion__report__year__gte=begYear,
-        assessmentVersion__report__year__lte = endYear,
+        assessmentVersion__report__year__gte=bYear,
+        assessmentVersion__report__year__lte = eYear,
         assessmentVersion__report__degreeProgram__pk = degreeProgram,
         assessmentVersion__slo__slo = sloObj.slo
-        )
+        ).values('pk','assessmentVersion__report__year','assessmentVersion__target','aggregate_proficiency').annotate(
+            students=Sum('assessmentVersion__assessmentdata__numberStudents')
+        ).order_by('assessmentVersion__report__year','pk')),
+        columns=['pk','assessmentVersion__report__year','assessmentVersion__target','aggregate_proficiency','students'])
+    df = pd.DataFrame({
+        'Year': rows['assessmentVersion__report__year'].astype(int),
+        'Target': rows['assessmentVersion__target'].astype(float)/100,
+        'Actual': rows['aggregate_proficiency'].astype(float)/100
+    })
+    if not withCounts:
+        return df
+    return df, pd.DataFrame({
+        'Year': df['Year'],
+        'Students': rows['students'].fillna(0).astype(int)
+    })
+def get_specificSLO_graph(request, imageFormat="png", dpi=None):
+    """
+    Graphs a specific SLO/Assessment combination performance over time
 
-    dataFrame = {
-        'Year': [],
-        'Target': [],
-        'Actual': []
-    }
-    index = []
-
-    for year in range(bYear,eYear+1):
-        qYear = queryset.filter(assessmentVersion__report__year=year)
-        for assessA in qYear:
-            dataFrame['Year'].append(year)
-            dataFrame['Target'].append(assessA.assessmentVersion.target/100)
-            dataFrame['Actual'].append(assessA.aggregate_proficiency/100)
-        index.append(year)
-    df = pd.DataFrame(data=dataFrame)
-    #lines = df.plot.line()
-    lines = df.plot(kind='bar',x='Year',y=['Target','Actual'])
-    lines.set(xlabel="Year", ylabel="Percentage")
-    lines.yaxis.set_major_formatter(FuncFormatter(lambda y, _: '{:.0%}'.format(y))) 
-    figure = lines.get_figure()
-    return figure
-def get_numberSLOs_graph(request):
+    Args:
+        request (HttpRequest): contains GET parameters
+        imageFormat (str): format to encode the graph in
+        dpi (int): resolution of the graph if a raster image, the default if None
+    Returns:
+        bytes : the encoded graph
+    Notes:
+        Uses POST data 'report__year__gte' (min year), 'report__year__lte' (max year),
+        'report__degreeProgram' (degree program pk), 'sloIR' (SLOInReport primary key),
+        'assess' (Assessment primary key)
+    """
+    bYear = int(request.data['report__year__gte'])
+    eYear = int(request.data['report__year__lte'])
+    df = get_specificSLO_series(
+        bYear, eYear, request.data['report__degreeProgram'], request.data['sloIR'], request.data['assess'])
+    return render_bar_graph(df, ['Target','Actual'], imageFormat, dpi)
+def get_numberSLOs_series(bYear, eYear, degreeProgram, sloWeights, withCounts=False):
+    """
+    Computes the weighted percentage of SLOs with each status in each year within a degree program,
+    from one grouped query
+
+    Args:
+        bYear (int): minimum year
+        eYear (int): maximum year
+        degreeProgram (str): primary key of the degree program
+        sloWeights (dict): weight of each SLO, keyed by SLO primary key
+        withCounts (bool): whether to also return the number of SLOs with each status
+    Returns:
+        pandas.DataFrame : 'Year' column and a column of percentages for each status; if withCounts, 
+        also a DataFrame of the same shape with the number of SLOs counted
+    Notes:
+        SLOs without a weight are not counted
+    """
+    columns = ['sloIR__report__year','sloIR__slo','status','number']
+    counts = pd.DataFrame.from_records(list(SLOStatus.objects.filter(
+        sloIR__report__year__gte = bYear,
+        sloIR__report__year__lte = eYear,
+        sloIR__report__degreeProgram__pk = degreeProgram
+        ).values('sloIR__report__year','sloIR__slo','status').annotate(number=Count('pk'))), columns=columns)
+    years = pd.Index(range(bYear,eYear+1), name='Year')
+    statuses = [s[0] for s in SLO_STATUS_CHOICES]
+    if counts.empty:
+        weighted = pd.DataFrame(0.0, index=years, columns=statuses)
+        numbers = weighted.copy()
+    else:
+        weights = pd.Series({int(pk): int(w) for pk, w in sloWeights.items()}, dtype=float)
+        counts['weight'] = counts['sloIR__slo'].map(weights).fillna(0)
+        counts['weighted'] = counts['number']*counts['weight']
+        counts['counted'] = counts['number'].where(counts['weight'] > 0, 0)
+        byStatus = counts.groupby(['sloIR__report__year','status'])[['weighted','counted']].sum()
+        weighted = byStatus['weighted'].unstack('status').reindex(index=years, columns=statuses).fillna(0)
+        numbers = byStatus['counted'].unstack('status').reindex(index=years, columns=statuses).fillna(0)
+    totals = weighted.sum(axis=1)
+    percentages = weighted.div(totals.where(totals > 0), axis=0).fillna(0)
+    percentages.columns = [s[1] for s in SLO_STATUS_CHOICES]
+    percentages.index = years
+    if not withCounts:
+        return percentages.reset_index()
+    numbers = numbers.astype(int)
+    numbers.columns = percentages.columns
+    numbers.index = years
+    return percentages.reset_index(), numbers.reset_index()
+def get_numberSLOs_graph(request, imageFormat="png", dpi=None):
     """
     Generate the figure that graphs number of each SLO status within a degree program
 
     Args:
         request (HttpRequest): contains the GET parameters
+        imageFormat (str): format to encode the graph in
+        dpi (int): resolution of the graph if a raster image, the default if None
     Returns:
-        matplotlib.figure.Figure : figure, i.e. the graph
+        bytes : the encoded graph
     Notes:
         Uses POST parameters 'report__year__gte' (min year), 'report__year__lte' (max year),
         'report__degreeProgram' (degree program pk), and sloWeights (weights of SLOs)
     """
-    begYear=request.data['report__year__gte']
-    endYear = request.data['report__year__lte']
+    bYear = int(request.data['report__year__gte'])
+    eYear = int(request.data['report__year__lte'])
     sloWeights = json.loads(request.data['sloWeights'])
-    bYear=int(begYear)
-    eYear=int(endYear)
     degreeProgram = request.data['report__degreeProgram']
-    queryset = SLOStatus.objects.filter(
-        sloIR__report__year__gte = begYear,
-        sloIR__report__year__lte = endYear,
-        sloIR__report__degreeProgram__pk = degreeProgram
-        )
-    dataFrame = {
-        'Year':[],
-        'Met': [],
-        'Partially Met': [],
-        'Not Met': [],
-        'Unknown': []
-    }
+    df = get_numberSLOs_series(bYear, eYear, degreeProgram, sloWeights)
+    return render_bar_graph(df, [s[1] for s in SLO_STATUS_CHOICES], imageFormat, dpi)
+def get_degreeProgramSuccess_series(bYear, eYear, department, withCounts=False):
+    """
+    Computes the percentage of SLOs met by each active degree program within a department in each year,
+    from one grouped query pivoted into a year by program matrix
 
-    for year in range(bYear,eYear+1):
-        qYear = queryset.filter(sloIR__report__year=year)
-        overall = qYear.count()
-        if overall != 0:
-            met = 0
-            partiallyMet = 0
-            notMet = 0
-            unknown = 0
-            for weightPk in sloWeights.keys():
-                met += qYear.filter(
-                    status=SLO_STATUS_CHOICES[0][0],
-                    sloIR__slo__pk=weightPk).count()*int(sloWeights[weightPk])
-                partiallyMet += qYear.filter(
-                    status=SLO_STATUS_CHOICES[1][0],
-                    sloIR__slo__pk=weightPk).count()*int(sloWeights[weightPk])
-                notMet += qYear.filter(
-                    status=SLO_STATUS_CHOICES[2][0],
-                    sloIR__slo__pk=weightPk).count()*int(sloWeights[weightPk])
-                unknown += qYear.filter(
-                    status=SLO_STATUS_CHOICES[3][0],
-                    sloIR__slo__pk=weightPk).count()*int(sloWeights[weightPk])
-            # met = qYear.filter(status=SLO_STATUS_CHOICES[0][0]).count()
-            # partiallyMet = qYear.filter(status=SLO_STATUS_CHOICES[1][0]).count()
-            # notMet = qYear.filter(status=SLO_STATUS_CHOICES[2][0]).count()
-            # unknown = qYear.filter(status=SLO_STATUS_CHOICES[3][0]).count()
-            sumWithWeights = met+partiallyMet+notMet+unknown
-            metP = met/sumWithWeights
-            parP = partiallyMet/sumWithWeights
-            notP = notMet/sumWithWeights
-            unkP = unknown/sumWithWeights
-        else:
-            metP = 0
-            parP = 0
-            notP = 0
-            unkP = 0
-        dataFrame['Met'].append(metP)
-        dataFrame['Partially Met'].append(parP)
-        dataFrame['Not Met'].append(notP)
-        dataFrame['Unknown'].append(unkP)
-        dataFrame['Year'].append(year)
-    
-    df = pd.DataFrame(dataFrame)
-    lines = df.plot(kind='bar',x='Year',y=['Met','Partially Met','Not Met','Unknown'])
-    lines.set(xlabel="Year", ylabel="Percentage")
-    lines.yaxis.set_major_formatter(FuncFormatter(lambda y, _: '{:.0%}'.format(y))) 
-    #lines = df.plot(kind='line',x='Year',y='Partially Met',ax=ax)
-    #lines = df.plot(kind='line',x='Year',y='Not Met',ax=ax)
-    #lines = df.plot(kind='line',x='Year',y='Unknown',ax=ax)
-    figure = lines.get_figure()
-    return figure
-def get_degreeProgramSuccess_graph(request):
+    Args:
+        bYear (int): minimum year
+        eYear (int): maximum year
+        department (str): primary key of the department
+        withCounts (bool): whether to also return the number of SLOs of each degree program
+    Returns:
+        pandas.DataFrame : 'Year' column and a column of percentages for each degree program; if withCounts,
+        also a DataFrame of the same shape with the number of SLOs
+    """
+    programs = list(DegreeProgram.active_objects.filter(department=department).order_by("name","level","pk"))
+    counts = pd.DataFrame.from_records(list(SLOStatus.objects.filter(
+        sloIR__report__year__gte=bYear,
+        sloIR__report__year__lte = eYear,
+        sloIR__report__degreeProgram__in = programs
+        ).values('sloIR__report__year','sloIR__report__degreeProgram').annotate(
+            total=Count('pk'),
+            met=Count('pk',filter=Q(status=SLO_STATUS_CHOICES[0][0]))
+        )), columns=['sloIR__report__year','sloIR__report__degreeProgram','total','met'])
+    years = pd.Index(range(bYear,eYear+1), name='Year')
+    if counts.empty:
+        matrix = pd.DataFrame(0.0, index=years, columns=[d.pk for d in programs])
+        numbers = matrix.copy()
+    else:
+        counts['rate'] = counts['met']/counts['total']
+        pivoted = counts.pivot(index='sloIR__report__year', columns='sloIR__report__degreeProgram')
+        matrix = pivoted['rate'].reindex(index=years, columns=[d.pk for d in programs]).fillna(0)
+        numbers = pivoted['total'].reindex(index=years, columns=[d.pk for d in programs]).fillna(0)
+    matrix.columns = [d.name+" ("+d.level+")" for d in programs]
+    matrix.index = years
+    if not withCounts:
+        return matrix.reset_index()
+    numbers = numbers.astype(int)
+    numbers.columns = matrix.columns
+    numbers.index = years
+    return matrix.reset_index(), numbers.reset_index()
+def get_degreeProgramSuccess_graph(request, imageFormat="png", dpi=None):
     """
     Generates graph of percentage of SLOs being met by degree programs within department
 
+    Args:
+        request (HttpRequest): contains the POST parameters
+        imageFormat (str): format to encode the graph in
+        dpi (int): resolution of the graph if a raster image, the default if None
     Returns:
-        matplotlib.figure.Figure : figure, i.e. the graph
+        bytes : the encoded graph
     Notes:
         Uses POST data 'report__year__gte' (min year), 'report__year__lte' (max year),
         'report__degreeProgram__department' (department pk)
     """
-    begYear = request.data['report__year__gte']
-    endYear = request.data['report__year__lte']
-    bYear=int(begYear)
-    eYear=int(endYear)
+    bYear = int(request.data['report__year__gte'])
+    eYear = int(request.data['report__year__lte'])
     thisDep = request.data['report__degreeProgram__department']
-    queryset = SLOStatus.objects.filter(
-        sloIR__report__year__gte=begYear,
-        sloIR__report__year__lte = endYear,
-        sloIR__report__degreeProgram__department__pk = thisDep
-        )
-    depQS = DegreeProgram.active_objects.filter(department=thisDep)
-    dataFrame = {
-        'Year':[]
+    df = get_degreeProgramSuccess_series(bYear, eYear, thisDep)
+    return render_bar_graph(df, [c for c in df.columns if c != 'Year'], imageFormat, dpi)
+def graph_revision(data):
+    """
+    Gets the revision of the data a graph is drawn from, with one query over the SLOs of its degree program
+    or department in its years
+
+    Args:
+        data (QueryDict): POST data of the graph request
+    Returns:
+        str : latest modification time and number of the SLOs, assessments, aggregates and statuses graphed,
+        with the active degree programs for the department graph, blank if the parameters are invalid
+    Notes:
+        The numbers change when objects are deleted, which leave no modification time behind
+    """
+    dec = str(data.get('decision'))
+    try:
+        lookups = {
+            'report__year__gte': int(data['report__year__gte']),
+            'report__year__lte': int(data['report__year__lte'])
+        }
+        programs = []
+        if dec == '3':
+            programs = list(DegreeProgram.active_objects.filter(
+                department=int(data['report__degreeProgram__department'])).order_by('pk').values_list('pk', 'name', 'level'))
+            lookups['report__degreeProgram__in'] = [pk for pk, _, _ in programs]
+        elif dec in GRAPH_PARAMETERS:
+            lookups['report__degreeProgram'] = int(data['report__degreeProgram'])
+        else:
+            return ""
+    except (KeyError, TypeError, ValueError):
+        return ""
+    latest = SLOInReport.objects.filter(**lookups).aggregate(
+        slos=Max('updatedAt'),
+        sloCount=Count('pk', distinct=True),
+        versions=Max('assessmentversion__updatedAt'),
+        versionCount=Count('assessmentversion', distinct=True),
+        aggregates=Max('assessmentversion__assessmentaggregate__updatedAt'),
+        aggregateCount=Count('assessmentversion__assessmentaggregate', distinct=True),
+        statuses=Max('slostatus__updatedAt'),
+        statusCount=Count('slostatus', distinct=True)
+    )
+    return json.dumps([str(latest[k]) for k in sorted(latest)]+[list(p) for p in programs])
+def graph_parameters_key(data, revision=""):
+    """
+    Computes the key identifying a graph by its type, image format, resolution, the parameters it is drawn from
+    and the revision of the data
+
+    Args:
+        data (QueryDict): POST data of the graph request
+        revision (str): revision of the data the graph is drawn from, from :func:`graph_revision`
+    Returns:
+        str : SHA-1 hash of the parameters, None if the type of graph is unknown
+    Notes:
+        SLO weights are compared as parsed JSON, so the order they are sent in does not matter.
+        Graphs drawn before the data changed have another revision, so are not reused
+    """
+    dec = str(data.get('decision'))
+    if dec not in GRAPH_PARAMETERS:
+        return None
+    values = {p: str(data.get(p, "")) for p in GRAPH_PARAMETERS[dec]}
+    values['format'] = str(data.get('format', 'png'))
+    values['dpi'] = str(data.get('dpi', ""))
+    if 'sloWeights' in values:
+        values['sloWeights'] = json.loads(values['sloWeights'])
+    return hashlib.sha1(json.dumps([dec, values, revision], sort_keys=True).encode()).hexdigest()
+def graph_dpi(data):
+    """
+    Gets the resolution requested for a graph
+
+    Args:
+        data (QueryDict): POST data of the graph request
+    Returns:
+        int : dots per inch, None for the default resolution
+    Raises:
+        ValueError : if the resolution is not a whole number between :data:`MIN_DPI` and :data:`MAX_DPI`
+    """
+    dpi = data.get('dpi')
+    if dpi in (None, ""):
+        return None
+    dpi = int(dpi)
+    if dpi < MIN_DPI or dpi > MAX_DPI:
+        raise ValueError("dpi out of range")
+    return dpi
+def graph_size(graphObj):
+    """
+    Gets the size of the graph's image
+
+    Args:
+        graphObj (Graph): the graph, possibly annotated with its size by :func:`~makeReports.views.helperFunctions.graph_store.reusable_graphs`
+    Returns:
+        int : size of the image in bytes
+    """
+    size = getattr(graphObj, 'size', None)
+    return len(graphObj.image) if size is None else size
+def series_payload(values, numbers):
+    """
+    Converts the series computed for a graph to JSON serializable form
+
+    Args:
+        values (pandas.DataFrame): 'Year' column and a column of values for each series
+        numbers (pandas.DataFrame): 'Year' column and a column of counts for each series
+    Returns:
+        dict : 'years', with 'series' and 'counts' dictionaries of lists keyed by column name
+    """
+    return {
+        'years': [int(y) for y in values['Year']],
+        'series': {c: [float(v) for v in values[c]] for c in values.columns if c != 'Year'},
+        'counts': {c: [int(n) for n in numbers[c]] for c in numbers.columns if c != 'Year'}
     }
-    for year in range(bYear,eYear+1):
-        qYear = queryset.filter(sloIR__report__year=year)
-        for d in depQS:
-            qDP = qYear.filter(sloIR__report__degreeProgram = d)
-            overall = qDP.count()
-            if overall != 0:
-                met = qDP.filter(status=SLO_STATUS_CHOICES[0][0]).count()
-                metP = met/overall
-            else:
-                metP = 0 
-            name = d.name+" ("+d.level+")"
-            try:
-                dataFrame[name].append(metP)
-            except:
-                new = {name:[metP]}
-                dataFrame.update(new)
-        dataFrame['Year'].append(year)
-    df = pd.DataFrame(dataFrame)
-    yVals = list(dataFrame.keys()).remove('Year')
-    lines = df.plot(kind='bar',x='Year',y=yVals)
-    lines.set(xlabel="Year", ylabel="Percentage")
-    lines.yaxis.set_major_formatter(FuncFormatter(lambda y, _: '{:.0%}'.format(y))) 
-    figure = lines.get_figure()
-    return figure
+def graph_response(graphObj, delivery):
+    """
+    Delivers the stored graph in the requested way
+
+    Args:
+        graphObj (Graph): the graph
+        delivery (str): 'image' for the image itself, 'uri' for a data URI of it,
+            otherwise the URL of :class:`GraphImageAPI` for it
+    Returns:
+        HttpResponse : response to the graph request, with the size of the image in bytes in the X-Graph-Size header
+    """
+    if delivery == 'image':
+        response = HttpResponse(bytes(graphObj.image), content_type=graphObj.contentType)
+    else:
+        response = Response(graph_location(graphObj, delivery))
+    response['X-Graph-Size'] = str(graph_size(graphObj))
+    return response
+def graph_location(graphObj, delivery):
+    """
+    Gets where the browser can load the stored graph from
+
+    Args:
+        graphObj (Graph): the graph
+        delivery (str): 'uri' for a data URI of the image, otherwise the URL of :class:`GraphImageAPI` for it
+    Returns:
+        str : data URI or URL of the graph
+    """
+    if delivery == 'uri':
+        return "data:"+graphObj.contentType+";base64,"+base64.b64encode(bytes(graphObj.image)).decode()
+    return reverse('makeReports:api-graph-image', kwargs={'key':graphObj.parameters})
+def graph_series(data, bYear, eYear):
+    """
+    Computes the series of a graph and the columns of them to draw
+
+    Args:
+        data (dict): parameters of the graph, as taken by :class:`createGraphAPI`
+        bYear (int): minimum year
+        eYear (int): maximum year
+    Returns:
+        tuple : pandas.DataFrame of the series and list of the columns to draw
+    """
+    dec = str(data['decision'])
+    if dec == '1':
+        df = get_specificSLO_series(bYear, eYear, data['report__degreeProgram'], data['sloIR'], data['assess'])
+        return df, ['Target','Actual']
+    if dec == '2':
+        df = get_numberSLOs_series(bYear, eYear, data['report__degreeProgram'], json.loads(data['sloWeights']))
+        return df, [s[1] for s in SLO_STATUS_CHOICES]
+    if dec == '3':
+        df = get_degreeProgramSuccess_series(bYear, eYear, data['report__degreeProgram__department'])
+        return df, [c for c in df.columns if c != 'Year']
+    raise KeyError(dec)
+def draw_graphs(specs, imageFormat, dpi=None):
+    """
+    Draws the graphs, sharing the queries of graphs which only differ by their years and drawing them in parallel
+
+    Args:
+        specs (list): tuples of the key from :func:`graph_parameters_key` and the parameters of each graph
+        imageFormat (str): key of :data:`GRAPH_FORMATS`
+        dpi (int): resolution of raster images, the default if None
+    Returns:
+        dict : encoded image of each graph, keyed by its key
+    """
+    #graphs grouped by their parameters other than the years
+    groups = {}
+    for key, spec in specs:
+        shared = graph_parameters_key(dict(spec, format=imageFormat, report__year__gte="", report__year__lte=""))
+        groups.setdefault(shared, {})[key] = (spec, int(spec['report__year__gte']), int(spec['report__year__lte']))
+    toDraw = []
+    for group in groups.values():
+        bYear = min(b for _, b, _ in group.values())
+        eYear = max(e for _, _, e in group.values())
+        df, columns = graph_series(next(iter(group.values()))[0], bYear, eYear)
+        for key, (_, b, e) in group.items():
+            toDraw.append((key, df[(df['Year'] >= b) & (df['Year'] <= e)].reset_index(drop=True), columns))
+    images = render_bar_graphs([(df, columns) for _, df, columns in toDraw], imageFormat, dpi)
+    return {key: image for (key, _, _), image in zip(toDraw, images)}
 class createGraphAPI(views.APIView):
     """
-    JSON API to get url of graph on file server with specified college,
+    JSON API to draw a graph with specified college,
     department, degree program, start and end dates, specific graph choice,
     and maybe SLO to be graphed
     """
     
     def post(self,request,format=None):
         """
-        Returns URL to graph on file server upon get request to API
+        Returns the graph upon POST request to API
 
         Args:
             request (HttpRequest): POST request to API
             format (None): format of request (not used here)
+        Notes:
+            Uses the optional POST data 'format' (image format, 'png' by default, 'svg' or 'webp'), 'dpi'
+            (resolution of PNG and WebP images) and 'delivery' ('url' by default, 'uri' or 'image',
+            see :func:`graph_response`)
         """
-        #Start by deleting some old graphs
-        graphs = Graph.objects.filter(dateTime__date__lte=datetime.now()-timedelta(minutes=20))
-        for g in graphs:
-            g.graph.delete(save=False)
-            g.delete()
-        dec = request.data['decision']
+        imageFormat = str(request.data.get('format', 'png'))
+        try:
+            dpi = graph_dpi(request.data)
+        except ValueError:
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        if imageFormat not in GRAPH_FORMATS:
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        delivery = str(request.data.get('delivery', 'url'))
+        #Reuse the graph if it was recently drawn with the same parameters and data
+        key = graph_parameters_key(request.data, graph_revision(request.data))
+        if key:
+            cached = reusable_graphs([key]).order_by('-dateTime')
+            if delivery == 'url':
+                cached = cached.defer('image')
+            cached = cached.first()
+            if cached:
+                return graph_response(cached, delivery)
+        dec = str(request.data['decision'])
+        image = None
         if dec == '1':
             #specific SLO
-            figure = get_specificSLO_graph(request)
+            image = get_specificSLO_graph(request, imageFormat, dpi)
         elif dec == '2':
             #Number of SLOs met
-            figure = get_numberSLOs_graph(request)
+            image = get_numberSLOs_graph(request, imageFormat, dpi)
         elif dec == '3':
             #Number of degree programs meeting target
-            figure = get_degreeProgramSuccess_graph(request)
-        if figure:
-            f1 = io.BytesIO()
-            figure.savefig(f1, format="png", bbox_inches='tight')
-            content_file = files.images.ImageFile(f1)
-            graphObj = Graph.objects.create(dateTime=datetime.now())
-            graphObj.graph.save("graph-"+str(request.user)+"-"+str(datetime.now())+".png",content_file)
-            return Response(graphObj.graph.url)
+            image = get_degreeProgramSuccess_graph(request, imageFormat, dpi)
+        if image:
+            graphObj = Graph.objects.create(
+                dateTime=timezone.now(),
+                parameters=key or "",
+                image=image,
+                contentType=GRAPH_FORMATS[imageFormat]
+            )
+            return graph_response(graphObj, delivery)
         else:
             return Response("error",status.HTTP_404_NOT_FOUND)
+class GraphBatchAPI(views.APIView):
+    """
+    JSON API to draw several graphs at once
+    """
+    #most graphs which can be requested at once
+    max_graphs = 20
+    def post(self, request, format=None):
+        """
+        Returns where each graph can be loaded from, in the order requested
+
+        Args:
+            request (HttpRequest): POST request to API
+            format (None): format of request (not used here)
+        Notes:
+            Uses the JSON data 'graphs' (list of parameters of each graph, as taken by :class:`createGraphAPI`),
+            and the optional 'format', 'dpi' and 'delivery' ('url' or 'uri') which apply to every graph.
+            Graphs which only differ by their years share the queries for their series, and the graphs not
+            recently drawn are drawn in parallel. The sizes of the images in bytes are in the X-Graph-Sizes
+            header, separated by commas.
+        """
+        specs = request.data.get('graphs')
+        imageFormat = str(request.data.get('format', 'png'))
+        delivery = str(request.data.get('delivery', 'url'))
+        if not isinstance(specs, list) or not specs or len(specs) > self.max_graphs or imageFormat not in GRAPH_FORMATS:
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        try:
+            dpi = graph_dpi(request.data)
+            keys = [graph_parameters_key(dict(spec, format=imageFormat, dpi=dpi or ""), graph_revision(spec)) for spec in specs]
+        except (TypeError, ValueError):
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        if None in keys:
+            return Response("error",status.HTTP_404_NOT_FOUND)
+        cached = reusable_graphs(keys).order_by('dateTime')
+        if delivery != 'uri':
+            cached = cached.defer('image')
+        graphs = {g.parameters: g for g in cached}
+        toDraw = [(key, spec) for key, spec in zip(keys, specs) if key not in graphs]
+        try:
+            images = draw_graphs(toDraw, imageFormat, dpi)
+        except (KeyError, ValueError):
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        for key, image in images.items():
+            graphs[key] = Graph.objects.create(
+                dateTime=timezone.now(),
+                parameters=key,
+                image=image,
+                contentType=GRAPH_FORMATS[imageFormat]
+            )
+        response = Response([graph_location(graphs[key], delivery) for key in keys])
+        response['X-Graph-Sizes'] = ",".join(str(graph_size(graphs[key])) for key in keys)
+        return response
+class GraphImageAPI(views.APIView):
+    """
+    API to get the image of a graph drawn by :class:`createGraphAPI`
+    """
+    def get(self, request, key):
+        """
+        Returns the image of the graph
+
+        Args:
+            request (HttpRequest): GET request to API
+            key (str): key of the graph's parameters, from :func:`graph_parameters_key`
+        Returns:
+            HttpResponse : the image, which the browser may keep while the graph is reused
+        Notes:
+            Graphs are found by their key rather than their primary key, since the key includes the revision
+            of the data they are drawn from, so it cannot be guessed by those who could not request the graph
+        """
+        graphObj = live_graphs().exclude(image=b"").filter(parameters=key).order_by('-dateTime').first()
+        if graphObj is None:
+            raise Http404
+        response = HttpResponse(bytes(graphObj.image), content_type=graphObj.contentType)
+        patch_cache_control(response, private=True, max_age=GRAPH_CACHE_MINUTES*60)
+        return response
+class GraphSeriesAPI(views.APIView):
+    """
+    JSON API to get the series a graph is drawn from, so it can be drawn by the browser
+    """
+    def get(self, request, format=None):
+        """
+        Returns the series of the graph, or 304 if they match the ETag the browser has
+
+        Args:
+            request (HttpRequest): GET request to API
+            format (None): format of request (not used here)
+        Notes:
+            Takes the same parameters as :class:`createGraphAPI` as GET parameters
+        """
+        params = request.query_params
+        try:
+            bYear = int(params['report__year__gte'])
+            eYear = int(params['report__year__lte'])
+            dec = params['decision']
+            if dec == '1':
+                values, numbers = get_specificSLO_series(
+                    bYear, eYear, params['report__degreeProgram'], params['sloIR'], params['assess'], withCounts=True)
+            elif dec == '2':
+                values, numbers = get_numberSLOs_series(
+                    bYear, eYear, params['report__degreeProgram'], json.loads(params['sloWeights']), withCounts=True)
+            elif dec == '3':
+                values, numbers = get_degreeProgramSuccess_series(
+                    bYear, eYear, params['report__degreeProgram__department'], withCounts=True)
+            else:
+                return Response("error",status.HTTP_404_NOT_FOUND)
+        except (KeyError, ValueError):
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        payload = series_payload(values, numbers)
+        etag = '"'+hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()+'"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(payload)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+class SLOTrendAPI(views.APIView):
+    """
+    JSON API to get the trends of every SLO of a degree program, or of every program of a department, across years
+    """
+    #most years which can be requested at once
+    max_years = 20
+    def get(self, request, format=None):
+        """
+        Returns the proficiency, target, status, change from the previous report, streak of unmet targets
+        and moving average of each SLO in each year
+
+        Args:
+            request (HttpRequest): GET request to API
+            format (None): format of request (not used here)
+        Notes:
+            Takes 'report__year__gte' (min year), 'report__year__lte' (max year), either 'report__degreeProgram'
+            (degree program pk) or 'report__degreeProgram__department' (department pk), and optionally
+            'window' (number of years in the moving average) as GET parameters, for at most :attr:`max_years` years
+        """
+        params = request.query_params
+        try:
+            bYear = int(params['report__year__gte'])
+            eYear = int(params['report__year__lte'])
+            window = int(params.get('window', TREND_WINDOW))
+            if 'report__degreeProgram' in params:
+                lookups = {'report__degreeProgram': int(params['report__degreeProgram'])}
+            else:
+                lookups = {'report__degreeProgram__department': int(params['report__degreeProgram__department'])}
+        except (KeyError, ValueError):
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        if eYear < bYear or eYear-bYear >= self.max_years or window < 1:
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        payload = trends_payload(bYear, eYear, slo_trends(bYear, eYear, window, **lookups))
+        etag = '"'+hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()+'"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(payload)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+class RollupAPI(views.APIView):
+    """
+    JSON API for the AAC to get any slice of the rollup cube of outcomes, grouped by some of its dimensions
+    """
+    #GET parameters filtering the slice, and how their values are read
+    filter_parameters = {
+        'year': int, 'year__gte': int, 'year__lte': int, 'college': int, 'department': int,
+        'level': str, 'blooms': str, 'directMeasure': lambda v: {'true': True, 'false': False}[v.lower()], 'status': str,
+    }
+    def get(self, request, format=None):
+        """
+        Returns the measures of each group of the slice
+
+        Args:
+            request (HttpRequest): GET request to API
+            format (None): format of request (not used here)
+        Notes:
+            Takes 'groupby', a comma separated list of dimensions (year, college, department, level, blooms,
+            directMeasure, status), and any of the dimensions or 'year__gte' and 'year__lte' to filter by
+            as GET parameters. 'none' matches SLOs without assessments or statuses for directMeasure and status
+        """
+        if not request.user.profile.aac:
+            return Response("error",status.HTTP_403_FORBIDDEN)
+        params = request.query_params
+        groupby = [d for d in params.get('groupby', '').split(',') if d]
+        if any(d not in ROLLUP_DIMENSIONS for d in groupby):
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        filters = {}
+        try:
+            for name, parse in self.filter_parameters.items():
+                if name not in params:
+                    continue
+                if name in ('directMeasure', 'status') and params[name].lower() == 'none':
+                    filters[name+'__isnull'] = True
+                else:
+                    filters[name] = parse(params[name])
+        except (KeyError, ValueError):
+            return Response("error",status.HTTP_400_BAD_REQUEST)
+        return Response({'groupby': groupby, 'groups': slice_rollup(groupby, **filters)})
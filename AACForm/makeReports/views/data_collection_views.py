@@ -1,6 +1,7 @@
 """
 This file contains all views related to inputting data into the form
 """
+from django.db import transaction
 from django.http import Http404
 from django.views.generic.list import ListView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView, FormView
@@ -10,6 +11,7 @@ from makeReports.models import (
     AssessmentData,
     AssessmentVersion,
     DataAdditionalInformation,
+    Report,
     ResultCommunicate,
     SLOInReport,
     SLOStatus
@@ -19,8 +21,10 @@ from makeReports.forms import (
     AssessmentAggregateForm,
     SLOStatusForm, 
     ResultCommunicationForm,
-    Single2000Textbox
+    Single2000Textbox,
+    UploadDataCollection
 )
+from .helperFunctions.aggregates import AggregateRecompute
 from .helperFunctions.section_context import section3Context
 from .helperFunctions.mixins import DeptReportMixin
 from .helperFunctions.todos import todoGetter
@@ -134,6 +138,58 @@ class CreateDataCollectionRowAssess(CreateDataCollectionRow):
         """
         return reverse_lazy('makeReports:assessment-summary', args=[self.report.pk])
 
+class UploadDataCollectionRows(DeptReportMixin,FormView):
+    """
+    View to add many data points at once from a CSV file, keyed by SLO number, measure number and data range
+    """
+    template_name = "makeReports/DataCollection/uploadDataCollection.html"
+    form_class = UploadDataCollection
+    def get_form_kwargs(self):
+        """
+        Gets keyword arguments for the form, only allowing data for assessments in the report
+
+        Returns:
+            dict : keyword arguments for form
+        """
+        kwargs = super(UploadDataCollectionRows,self).get_form_kwargs()
+        kwargs['assessments'] = AssessmentVersion.objects.filter(report=self.report)
+        return kwargs
+    def get_context_data(self, **kwargs):
+        """
+        Returns the context for the template, including the assessments in the report
+
+        Returns:
+            dict : context of template
+        """
+        context = super(UploadDataCollectionRows,self).get_context_data(**kwargs)
+        context['assessments'] = AssessmentVersion.objects.filter(
+            report=self.report).select_related('slo','assessment').order_by("slo__number","number")
+        return context
+    def get_success_url(self):
+        """
+        Gets URL to go to upon success (data summary)
+
+        Returns:
+            str : URL of data summary page (:class:`~makeReports.views.data_collection_views.DataCollectionSummary`)
+        """
+        return reverse_lazy('makeReports:data-summary', args=[self.report.pk])
+    def form_valid(self, form):
+        """
+        Creates all the data points together, then recomputes the aggregates and statuses of the report once
+
+        Args:
+            form (UploadDataCollection): filled out form to process
+                
+        Returns:
+            HttpResponseRedirect : redirects to success URL given by get_success_url
+        """
+        with transaction.atomic():
+            AssessmentData.objects.bulk_create(form.cleaned_data['dataFile'])
+            recompute = AggregateRecompute(Report.objects.filter(pk=self.report.pk))
+            recompute.compute()
+            recompute.save()
+        return super(UploadDataCollectionRows, self).form_valid(form)
+
 class EditDataCollectionRow(DeptReportMixin,FormView):
     """
     View to edit a data point
@@ -1,11 +1,17 @@
 """
 This file contains views related to graphing
 """
-from django.views.generic import TemplateView
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.generic import TemplateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from makeReports.models import College, AssessmentData
+from makeReports.models import College, AssessmentOutcome, DeletedRecord, ExportJob
 from makeReports.views.helperFunctions.mixins import AACOnlyMixin
 from makeReports.views.helperFunctions.csvExport import CSVExportView
+from makeReports.views.helperFunctions.delta_export import DeltaExportMixin
+from makeReports.views.helperFunctions.export_jobs import EXPORT_FORMATS, ExportJobMixin, export_view
+from makeReports.views.helperFunctions.parquetExport import ParquetExportMixin
 
 class GraphingHome(AACOnlyMixin,TemplateView):
     """
@@ -35,67 +41,54 @@ class GraphingDept(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
             bool : whether user is part of the department and can access page
         """
         return self.request.user.profile.department.pk == int(self.kwargs['dept'])
-class OutputCSVDepartment(LoginRequiredMixin, UserPassesTestMixin,CSVExportView):
+class OutputCSVDepartment(LoginRequiredMixin, UserPassesTestMixin,DeltaExportMixin,ExportJobMixin,ParquetExportMixin,
+    CSVExportView):
     """
-    CSV generating page for within the department
+    CSV generating page for within the department, which gives Parquet instead if the 'format' GET parameter is 'parquet',
+    only the changed data if the 'since' GET parameter is given, and runs large exports in the background
 
     Keyword Args:
         gYear (str): the minimum year for data
         lYear (str): the maximum year for data
         dept (str): the primary key of the desired department
     """
-    model = AssessmentData
+    model = AssessmentOutcome
+    #exports can span many years, so rows are sent as they are written
+    streaming = True
+    categorical_fields = ['degreeProgramName', 'departmentName']
+    delta_fields = ['data']
     fields = [
-        'assessmentVersion__report__year',
-        'assessmentVersion__report__degreeProgram', 'assessmentVersion__report__degreeProgram__name',
-        'assessmentVersion__report',
-        'assessmentVersion__slo', 'assessmentVersion__slo__goalText', 'assessmentVersion__slo__changedFromPrior',
-        'assessmentVersion__slo__slo__blooms',
-        'assessmentVersion__assessment', 'assessmentVersion__assessment__title',
-        'assessmentVersion__assessment__domainExamination', 
-        'assessmentVersion__assessment__domainProduct', 
-        'assessmentVersion__assessment__domainPerformance',
-        'assessmentVersion__assessment__directMeasure',
-        'assessmentVersion', 'assessmentVersion__assessmentaggregate__aggregate_proficiency',
-        'assessmentVersion__assessmentaggregate__met',
-        'assessmentVersion__date', 'assessmentVersion__description',
-        'assessmentVersion__finalTerm', 'assessmentVersion__where',
-        'assessmentVersion__allStudents', 'assessmentVersion__sampleDescription',
-        'assessmentVersion__frequencyChoice', 'assessmentVersion__frequency',
-        'assessmentVersion__threshold', 'assessmentVersion__target', 'assessmentVersion__changedFromPrior',
+        'year',
+        'degreeProgram', 'degreeProgramName',
+        'report',
+        'sloIR', 'goalText', 'sloChangedFromPrior',
+        'blooms',
+        'assessment', 'title',
+        'domainExamination', 
+        'domainProduct', 
+        'domainPerformance',
+        'directMeasure',
+        'assessmentVersion', 'aggregate_proficiency',
+        'met',
+        'date', 'description',
+        'finalTerm', 'where',
+        'allStudents', 'sampleDescription',
+        'frequencyChoice', 'frequency',
+        'threshold', 'target', 'changedFromPrior',
         'dataRange','numberStudents','overallProficient',
         ]
-    def get_field_value(self,obj, field_name):
-        """
-        Generally gets field value. Since not all assessment versions have assessment aggregates,
-        this ensures the application does not fail
-
-        Returns:
-            value : value of the field (many types possible)
-        """
-        if "assessmentVersion__assessmentaggregate" in field_name:
-            #following code is taken from the source code for CSVExportView
-            try:
-                related_field_names = field_name.split('__')
-                related_obj = getattr(obj, related_field_names[0])
-                related_field_name = '__'.join(related_field_names[1:])
-                return self.get_field_value(related_obj, related_field_name)
-            except:
-                return ""
-        else:
-            return super(OutputCSVDepartment,self).get_field_value(obj, field_name)
     def get_queryset(self):
         """
-        Gets the QuerySet of AssessmentData to generate the CSV for.
+        Gets the QuerySet of analytics rows to generate the CSV for.
         In particular, it limits to assessments within the year within the department.
         
         Returns:
-            QuerySet : set of AssessmentData within parameters
+            QuerySet : set of AssessmentOutcome within parameters
         """
-        return AssessmentData.objects.filter(
-            assessmentVersion__report__year__gte=self.kwargs['gYear'],
-            assessmentVersion__report__year__lte=self.kwargs['lYear'],
-            assessmentVersion__report__degreeProgram__department__pk=self.kwargs['dept'])
+        return self.filter_changed(AssessmentOutcome.objects.filter(
+            year__gte=self.kwargs['gYear'],
+            year__lte=self.kwargs['lYear'],
+            department=self.kwargs['dept']))
     def test_func(self):
         """
         Ensures the user is in the department or the AAC
@@ -119,12 +112,12 @@ class OutputCSVDP(OutputCSVDepartment):
         Gets the QuerySet to generate CSV for, filtering based upon year and degree program
         
         Returns:
-            QuerySet : set of AssessmentData within parameters
+            QuerySet : set of AssessmentOutcome within parameters
         """
-        return AssessmentData.objects.filter(
-            assessmentVersion__report__year__gte=self.kwargs['gYear'],
-            assessmentVersion__report__year__lte=self.kwargs['lYear'],
-            assessmentVersion__report__degreeProgram__pk=self.kwargs['dP'])
+        return self.filter_changed(AssessmentOutcome.objects.filter(
+            year__gte=self.kwargs['gYear'],
+            year__lte=self.kwargs['lYear'],
+            degreeProgram=self.kwargs['dP']))
 class OutputCSVCollege(OutputCSVDepartment):
     """
     View to output CSV for data within a specific college
@@ -135,24 +128,24 @@ class OutputCSVCollege(OutputCSVDepartment):
         col (str): the primary key of the desired college
     """
     fields = [
-        'assessmentVersion__report__year',
-        'assessmentVersion__report__degreeProgram__department', 'assessmentVersion__report__degreeProgram__department__name',
-        'assessmentVersion__report__degreeProgram', 'assessmentVersion__report__degreeProgram__name',
-        'assessmentVersion__report',
-        'assessmentVersion__slo', 'assessmentVersion__slo__goalText', 'assessmentVersion__slo__changedFromPrior',
-        'assessmentVersion__slo__slo__blooms', 'assessmentVersion__slo__slo',
-        'assessmentVersion__assessment', 'assessmentVersion__assessment__title',
-        'assessmentVersion__assessment__domainExamination', 
-        'assessmentVersion__assessment__domainProduct', 
-        'assessmentVersion__assessment__domainPerformance',
-        'assessmentVersion__assessment__directMeasure',
-        'assessmentVersion', 'assessmentVersion__assessmentaggregate__aggregate_proficiency',
-        'assessmentVersion__assessmentaggregate__met',
-        'assessmentVersion__date', 'assessmentVersion__description',
-        'assessmentVersion__finalTerm', 'assessmentVersion__where',
-        'assessmentVersion__allStudents', 'assessmentVersion__sampleDescription',
-        'assessmentVersion__frequencyChoice', 'assessmentVersion__frequency',
-        'assessmentVersion__threshold', 'assessmentVersion__target', 'assessmentVersion__changedFromPrior',
+        'year',
+        'department', 'departmentName',
+        'degreeProgram', 'degreeProgramName',
+        'report',
+        'sloIR', 'goalText', 'sloChangedFromPrior',
+        'blooms', 'slo',
+        'assessment', 'title',
+        'domainExamination', 
+        'domainProduct', 
+        'domainPerformance',
+        'directMeasure',
+        'assessmentVersion', 'aggregate_proficiency',
+        'met',
+        'date', 'description',
+        'finalTerm', 'where',
+        'allStudents', 'sampleDescription',
+        'frequencyChoice', 'frequency',
+        'threshold', 'target', 'changedFromPrior',
         'dataRange','numberStudents','overallProficient',
         ]
     def get_queryset(self):
@@ -160,13 +153,13 @@ class OutputCSVCollege(OutputCSVDepartment):
         Gets the QuerySet to generate CSV for, filtering based upon year and college
         
         Returns:
-            QuerySet : set of AssessmentData within parameters
+            QuerySet : set of AssessmentOutcome within parameters
         """
-        return AssessmentData.objects.filter(
-            assessmentVersion__report__year__gte=self.kwargs['gYear'],
-            assessmentVersion__report__year__lte=self.kwargs['lYear'],
-            assessmentVersion__report__degreeProgram__department__college__pk=self.kwargs['col']
-            )
+        return self.filter_changed(AssessmentOutcome.objects.filter(
+            year__gte=self.kwargs['gYear'],
+            year__lte=self.kwargs['lYear'],
+            college=self.kwargs['col']
+            ))
     def test_func(self):
         """
         Ensures the user is within the AAC
@@ -175,6 +168,26 @@ class OutputCSVCollege(OutputCSVDepartment):
             bool : whether the user is in the AAC and therefore can access the page
         """
         return self.request.user.profile.aac
+class DeletedRecordsCSV(AACOnlyMixin,DeltaExportMixin,ParquetExportMixin,CSVExportView):
+    """
+    CSV of the tombstones of deleted reports, SLOs, assessments, data, aggregates and statuses,
+    since the time in the 'since' GET parameter if given, so copies of the exports can drop them
+    """
+    model = DeletedRecord
+    streaming = True
+    fields = ['model', 'objectPk', 'deletedAt']
+    delta_fields = []
+    def get_queryset(self):
+        """
+        Gets the tombstones, oldest first
+
+        Returns:
+            QuerySet : tombstones (:class:`~makeReports.models.data_models.DeletedRecord`) after the given time
+        """
+        deleted = DeletedRecord.objects.order_by('deletedAt')
+        if self.since is not None:
+            deleted = deleted.filter(deletedAt__gt=self.since)
+        return deleted
 class CSVManagement(LoginRequiredMixin, TemplateView):
     """
     View to set parameters to generate CSV from one of the other views
@@ -182,11 +195,66 @@ class CSVManagement(LoginRequiredMixin, TemplateView):
     template_name = "makeReports/CSV/csvManagement.html"
     def get_context_data(self, **kwargs):
         """
-        Gets active colleges needed to display page
+        Gets active colleges needed to display page, and the export job given by the 'job' GET parameter
 
         Returns:
             context (dict): dictionary of context for template, including active colleges
         """
         context = super(CSVManagement, self).get_context_data(**kwargs)
         context['colleges'] = College.active_objects.all().order_by("name")
-        return context
\ No newline at end of file
+        jobPk = self.request.GET.get('job', '')
+        job = ExportJob.objects.filter(pk=jobPk).first() if jobPk.isdigit() else None
+        if job and export_view(job, self.request).test_func():
+            context['job'] = job
+        return context
+class ExportJobAccessMixin(LoginRequiredMixin, UserPassesTestMixin):
+    """
+    Mixin for views of an export job, which can be accessed by anyone able to request the export
+
+    Keyword Args:
+        pk (str): the primary key of the job
+    """
+    def test_func(self):
+        """
+        Ensures the user can access the export the job was requested from
+
+        Returns:
+            bool : whether the user can access the job
+        """
+        self.job = get_object_or_404(ExportJob, pk=self.kwargs['pk'])
+        return export_view(self.job, self.request).test_func()
+class ExportJobStatus(ExportJobAccessMixin, View):
+    """
+    JSON view of the status of an export job, polled by the CSV management page
+    """
+    def get(self, request, *args, **kwargs):
+        """
+        Gets the status of the job
+
+        Returns:
+            JsonResponse : status, number of rows, error and the URL of the file once done
+        """
+        return JsonResponse({
+            'status': self.job.status,
+            'rows': self.job.rows,
+            'error': self.job.error,
+            'download': reverse('makeReports:export-job-download', kwargs={'pk':self.job.pk})
+                if self.job.status == "done" else None,
+        })
+class ExportJobDownload(ExportJobAccessMixin, View):
+    """
+    View to download the file of a finished export job
+    """
+    def get(self, request, *args, **kwargs):
+        """
+        Gets the file of the job
+
+        Returns:
+            FileResponse : the gzipped CSV or Parquet file
+        """
+        if self.job.status != "done" or not self.job.artifact:
+            raise Http404("The export is not done")
+        extension, contentType = EXPORT_FORMATS[self.job.fileFormat]
+        view = export_view(self.job)
+        filename = view.get_filename(view.get_queryset())+"."+extension
+        return FileResponse(self.job.artifact.open('rb'), as_attachment=True, filename=filename, content_type=contentType)
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+Calculates assessment aggregates and SLO statuses in bulk for many reports at once,
+instead of one row at a time through the signals
+"""
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from makeReports.models import (
+    AssessmentAggregate,
+    AssessmentData,
+    AssessmentVersion,
+    Report,
+    SLOStatus
+)
+from makeReports.choices import SLO_STATUS_CHOICES
+from makeReports.signals.analytics_signals import refresh_outcomes
+
+def reports_in_scope(years=None, colleges=None, reports=None):
+    """
+    Gets the reports to recompute, limited by any of the given years, colleges and reports
+
+    Args:
+        years (list): years of reports to include, all if None
+        colleges (list): primary keys of colleges to include, all if None
+        reports (list): primary keys of reports to include, all if None
+    Returns:
+        QuerySet : reports (:class:`~makeReports.models.basic_models.Report`) within scope
+    """
+    qS = Report.objects.all()
+    if years:
+        qS = qS.filter(year__in=years)
+    if colleges:
+        qS = qS.filter(degreeProgram__department__college__pk__in=colleges)
+    if reports:
+        qS = qS.filter(pk__in=reports)
+    return qS
+
+def queryset_frame(queryset, columns):
+    """
+    Loads the given columns of the QuerySet into a DataFrame with one query
+
+    Args:
+        queryset (QuerySet): QuerySet to load
+        columns (list): field names to load, which become the column names
+    Returns:
+        pandas.DataFrame : one row per object in the QuerySet
+    """
+    return pd.DataFrame.from_records(list(queryset.values_list(*columns)), columns=columns)
+
+def weighted_proficiency(data):
+    """
+    Calculates the weighted aggregate proficiency of each assessment, the same way as
+    :func:`~makeReports.signals.data_signals.calcWeightedAgg`
+
+    Args:
+        data (pandas.DataFrame): data points with 'assessmentVersion', 'numberStudents' and 'overallProficient' columns
+    Returns:
+        pandas.Series : rounded aggregate proficiency indexed by assessment version primary key
+    """
+    data = data.astype({'numberStudents':float, 'overallProficient':float})
+    data['weighted'] = data['numberStudents']*data['overallProficient']
+    totals = data.groupby('assessmentVersion')[['numberStudents','weighted']].sum()
+    students = totals['numberStudents'].where(totals['numberStudents'] > 0)
+    return (totals['weighted']/students).round().fillna(0).astype(int)
+
+def status_by_slo(mets):
+    """
+    Calculates the status of each SLO from whether the targets of its aggregates were met,
+    the same way as :func:`~makeReports.signals.data_signals.update_status`
+
+    Args:
+        mets (pandas.DataFrame): aggregates with 'slo' and 'met' columns
+    Returns:
+        pandas.Series : status indexed by SLOInReport primary key
+    """
+    grouped = mets.astype({'met':bool}).groupby('slo')['met']
+    allMet = grouped.all()
+    anyMet = grouped.any()
+    statuses = np.select(
+        [allMet.values, anyMet.values],
+        [SLO_STATUS_CHOICES[0][0], SLO_STATUS_CHOICES[1][0]],
+        default=SLO_STATUS_CHOICES[2][0]
+    )
+    return pd.Series(statuses, index=allMet.index, dtype=object)
+
+class AggregateRecompute:
+    """
+    Recomputes the :class:`~makeReports.models.data_models.AssessmentAggregate` and
+    :class:`~makeReports.models.data_models.SLOStatus` of every assessment and SLO within the reports,
+    loading each table with one query and writing the changes back in bulk
+
+    Notes:
+        Unless clearing overrides, overridden aggregates and statuses are kept as they are, but overridden
+        aggregates still count towards the status of their SLO. Statuses of SLOs without any aggregates
+        are not changed unless their override is cleared.
+        Signals are not sent, since every dependent value is recomputed together.
+    """
+    def __init__(self, reports, clearOverrides=False):
+        """
+        Args:
+            reports (QuerySet): reports (:class:`~makeReports.models.basic_models.Report`) to recompute
+            clearOverrides (bool): whether to clear overrides and reset every row to its computed value
+        """
+        self.reports = reports
+        self.clearOverrides = clearOverrides
+        self.newAggs = []
+        self.changedAggs = []
+        self.newStatuses = []
+        self.changedStatuses = []
+        self.changes = []
+    def compute(self):
+        """
+        Computes the aggregates and statuses, recording what would change
+
+        Returns:
+            pandas.DataFrame : changes, with one row per created or updated object
+        """
+        versions = queryset_frame(
+            AssessmentVersion.objects.filter(report__in=self.reports),
+            ['pk','slo','target']
+        ).set_index('pk')
+        data = queryset_frame(
+            AssessmentData.objects.filter(assessmentVersion__report__in=self.reports),
+            ['assessmentVersion','numberStudents','overallProficient']
+        )
+        aggs = {
+            a.assessmentVersion_id: a for a in AssessmentAggregate.objects.filter(
+                assessmentVersion__report__in=self.reports)
+        }
+        statuses = {
+            s.sloIR_id: s for s in SLOStatus.objects.filter(sloIR__report__in=self.reports)
+        }
+        proficiency = weighted_proficiency(data).reindex(versions.index, fill_value=0)
+        met = proficiency >= versions['target']
+        withData = set(data['assessmentVersion'])
+        for pk, prof, isMet in zip(versions.index, proficiency.values, met.values):
+            pk = int(pk)
+            prof = int(prof)
+            isMet = bool(isMet)
+            agg = aggs.get(pk)
+            if agg is None:
+                if pk in withData:
+                    agg = AssessmentAggregate(assessmentVersion_id=pk, aggregate_proficiency=prof, met=isMet)
+                    aggs[pk] = agg
+                    self.newAggs.append(agg)
+                    self._record(agg, pk, None, (prof, isMet))
+            elif agg.override and not self.clearOverrides:
+                continue
+            elif agg.override or agg.aggregate_proficiency != prof or agg.met != isMet:
+                self._record(agg, agg.pk, (agg.aggregate_proficiency, agg.met), (prof, isMet))
+                agg.aggregate_proficiency = prof
+                agg.met = isMet
+                agg.override = False
+                self.changedAggs.append(agg)
+        aggPks = list(aggs)
+        mets = pd.DataFrame({
+            'slo': versions['slo'].reindex(aggPks).values,
+            'met': [aggs[pk].met for pk in aggPks]
+        })
+        computed = status_by_slo(mets)
+        if self.clearOverrides:
+            #as in update_status, an SLO without any aggregates is considered met
+            withoutAggs = [slo for slo, sS in statuses.items() if sS.override and slo not in computed.index]
+            computed = pd.concat([computed, pd.Series(SLO_STATUS_CHOICES[0][0], index=withoutAggs, dtype=object)])
+        for slo, status in computed.items():
+            slo = int(slo)
+            sS = statuses.get(slo)
+            if sS is None:
+                sS = SLOStatus(sloIR_id=slo, status=status)
+                self.newStatuses.append(sS)
+                self._record(sS, slo, None, status)
+            elif sS.override and not self.clearOverrides:
+                continue
+            elif sS.override or sS.status != status:
+                self._record(sS, sS.pk, sS.status, status)
+                sS.status = status
+                sS.override = False
+                self.changedStatuses.append(sS)
+        return pd.DataFrame(self.changes, columns=['model','pk','old','new'])
+    def _record(self, obj, pk, old, new):
+        """
+        Records a change to be shown in a diff
+
+        Args:
+            obj (Model): object changed
+            pk (int): primary key of the object, or of the assessment or SLO it is for if new
+            old (object): old value, None if the object is new
+            new (object): new value
+        """
+        self.changes.append((obj.__class__.__name__, pk, old, new))
+    def save(self):
+        """
+        Writes the computed aggregates and statuses with a fixed number of statements, and rewrites the analytics rows of the data
+        whose aggregate or status changed, or which have no row yet
+        """
+        #bulk_update does not set auto_now fields
+        now = timezone.now()
+        for obj in self.changedAggs+self.changedStatuses:
+            obj.updatedAt = now
+        with transaction.atomic():
+            AssessmentAggregate.objects.bulk_create(self.newAggs, batch_size=500)
+            AssessmentAggregate.objects.bulk_update(
+                self.changedAggs, ['aggregate_proficiency','met','override','updatedAt'], batch_size=500)
+            SLOStatus.objects.bulk_create(self.newStatuses, batch_size=500)
+            SLOStatus.objects.bulk_update(self.changedStatuses, ['status','override','updatedAt'], batch_size=500)
+            versions = [agg.assessmentVersion_id for agg in self.newAggs+self.changedAggs]
+            slos = [sS.sloIR_id for sS in self.newStatuses+self.changedStatuses]
+            #data points created in bulk before recomputing have no row yet
+            refresh_outcomes(AssessmentData.objects.filter(assessmentVersion__report__in=self.reports).filter(
+                Q(assessmentVersion__in=versions) | Q(assessmentVersion__slo__in=slos) |
+                Q(assessmentoutcome__isnull=True)))
+
+def reset_to_computed(reports):
+    """
+    Clears the overridden aggregates and statuses of the reports and resets every aggregate
+    and status to its computed value, with a fixed number of statements
+
+    Args:
+        reports (QuerySet): reports (:class:`~makeReports.models.basic_models.Report`) to reset
+    Returns:
+        AggregateRecompute : the saved recomputation
+    """
+    recompute = AggregateRecompute(reports, clearOverrides=True)
+    recompute.compute()
+    recompute.save()
+    return recompute
@@ -34,8 +34,8 @@ In order to upgrade python and Django version
 import types
 import csv
 
-from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
-from django.http.response import HttpResponse
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ObjectDoesNotExist
+from django.http.response import HttpResponse, StreamingHttpResponse
 from django.utils.encoding import force_text
 from django.views.generic.base import View
 from django.views.generic.list import MultipleObjectMixin
@@ -49,12 +49,24 @@ def _get_method_type():
 _method_type = _get_method_type()
 
 
+class _Echo(object):
+    """ Pseudo-buffer whose write returns the value, so csv.writer rows can be yielded. """
+    def write(self, value):
+        return value
+
+
 class CSVExportView(MultipleObjectMixin, View):
     fields = None
     exclude = None
     header = True
     specify_separator = True  # Useful for Excel.
     filename = None
+    # Stream the rows as they are written instead of building the whole file in memory.
+    streaming = False
+    # Number of objects fetched from the database at a time when streaming.
+    chunk_size = 2000
+    # Fetch rows with values_list rather than as model objects when every field is a column.
+    use_values_list = True
 
     # Override some View defaults that are not supported by CSVExportView.
     paginate_by = None
@@ -147,6 +159,110 @@ class CSVExportView(MultipleObjectMixin, View):
             related_field_name = '__'.join(related_field_names[1:])
             return self.get_field_value(related_obj, related_field_name)
 
+    def resolve_field(self, model, field_name):
+        """
+        Follows a field name through its forward and one-to-one relations.
+        Returns the attribute names of the relations and the final field (None for a property),
+        or None if the field goes through or ends in a relation to many objects.
+        """
+        parts = field_name.split('__')
+        steps = []
+        for part in parts[:-1]:
+            field = model._meta.get_field(part)
+            if not (field.is_relation and (field.many_to_one or field.one_to_one)):
+                return None
+            steps.append(field.name if field.concrete else field.get_accessor_name())
+            model = field.related_model
+        try:
+            field = model._meta.get_field(parts[-1])
+        except FieldDoesNotExist as e:
+            if not hasattr(model, parts[-1]):
+                raise e
+            # field_name is a property.
+            return steps, None
+        if field.many_to_many or field.one_to_many or not field.concrete:
+            return None
+        return steps, field
+
+    def compile_accessor(self, model, field_name):
+        """
+        Compiles a field name into a function getting its value from an object, the same as get_field_value but
+        without looking the fields up again for each cell. Missing related objects give ''.
+        Returns the accessor and the select_related path it needs, or None and None if the field cannot be compiled.
+        """
+        resolved = self.resolve_field(model, field_name)
+        if resolved is None:
+            return None, None
+        steps, field = resolved
+        attname = field.attname if field else field_name.split('__')[-1]
+        choices = dict(field.choices) if field and field.choices else None
+
+        def accessor(obj):
+            for step in steps:
+                try:
+                    obj = getattr(obj, step)
+                except ObjectDoesNotExist:
+                    return ''
+                if obj is None:
+                    return ''
+            value = getattr(obj, attname)
+            if choices is not None:
+                if value is None or str(value).strip() == '':
+                    return ''
+                return choices[value]
+            return value
+
+        return accessor, field_name.rpartition('__')[0] or None
+
+    def compile_values(self, model, field_names):
+        """
+        Compiles the fields into one values_list query when every field is a column, following relations with joins
+        (left joins where the related object may be missing, which then gives None).
+        Returns the choices of each column, None for columns without choices, or None if a field is not a column.
+        """
+        columns = []
+        for field_name in field_names:
+            resolved = self.resolve_field(model, field_name)
+            if resolved is None or resolved[1] is None:
+                return None
+            field = resolved[1]
+            columns.append(dict(field.choices) if field.choices else None)
+        return columns
+
+    def get_row_plan(self, queryset, field_names):
+        """
+        Compiles the fields once per export.
+        Returns the queryset to export, either of value tuples or joined to every related object the fields need,
+        and a function giving the row of each of its items.
+        """
+        overridden = type(self).get_field_value is not CSVExportView.get_field_value
+        if self.use_values_list and not overridden:
+            columns = self.compile_values(queryset.model, field_names)
+            if columns is not None:
+                choiceColumns = [(i, choices) for i, choices in enumerate(columns) if choices is not None]
+
+                def row(values):
+                    values = list(values)
+                    for i, choices in choiceColumns:
+                        value = values[i]
+                        values[i] = '' if value is None or str(value).strip() == '' else choices[value]
+                    return values
+
+                return queryset.values_list(*field_names), row
+        accessors = []
+        related = set()
+        for field_name in field_names:
+            accessor, path = self.compile_accessor(queryset.model, field_name)
+            if path:
+                related.add(path)
+            if accessor is None or overridden:
+                # Subclasses overriding get_field_value still get the joins.
+                accessor = (lambda name: lambda obj: self.get_field_value(obj, name))(field_name)
+            accessors.append(accessor)
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        return queryset, lambda obj: [accessor(obj) for accessor in accessors]
+
     def get_header_name(self, model, field_name):
         """ Override if a custom value or behaviour is required for specific fields. """
         if '__' not in field_name:
@@ -171,18 +287,38 @@ class CSVExportView(MultipleObjectMixin, View):
             'quoting': csv.QUOTE_ALL,
         }
 
+    def iter_rows(self, queryset, field_names):
+        """ Yields the lines of the CSV, fetching objects chunk_size at a time. """
+        queryset, row = self.get_row_plan(queryset, field_names)
+        writer = csv.writer(_Echo(), **self.get_csv_writer_fmtparams())
+
+        if self.specify_separator:
+            yield 'sep={}{}'.format(writer.dialect.delimiter, writer.dialect.lineterminator)
+
+        if self.header:
+            yield writer.writerow([self.get_header_name(queryset.model, field_name) for field_name in list(field_names)])
+
+        for obj in queryset.iterator(chunk_size=self.chunk_size):
+            yield writer.writerow(row(obj))
+
     def get(self, request, *args, **kwargs):
         queryset = self.get_queryset()
 
         field_names = self.get_fields(queryset)
 
-        response = HttpResponse(content_type='text/csv')
+        if self.streaming:
+            response = StreamingHttpResponse(self.iter_rows(queryset, field_names), content_type='text/csv')
+        else:
+            response = HttpResponse(content_type='text/csv')
 
         filename = self.get_filename(queryset)
         if not filename.endswith('.csv'):
             filename += '.csv'
         response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
 
+        if self.streaming:
+            return response
+
         writer = csv.writer(response, **self.get_csv_writer_fmtparams())
 
         if self.specify_separator:
@@ -191,7 +327,8 @@ class CSVExportView(MultipleObjectMixin, View):
         if self.header:
             writer.writerow([self.get_header_name(queryset.model, field_name) for field_name in list(field_names)])
 
+        queryset, row = self.get_row_plan(queryset, field_names)
         for obj in queryset:
-            writer.writerow([self.get_field_value(obj, field) for field in field_names])
+            writer.writerow(row(obj))
 
         return response
\ No newline at end of file
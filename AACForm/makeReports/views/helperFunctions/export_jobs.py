@@ -0,0 +1,192 @@
+"""
+Runs exports too large to write within a request in the background, keeping the file written for later requests.
+
+The file of an export is reused until the data exported changes, which is found from the modification times
+and tombstones of the tracked models when the export is requested, so saving data does no extra work.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta
+import pyarrow as pa
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.shortcuts import redirect
+from django.urls import resolve, reverse
+from django.utils import timezone
+from makeReports.models import (
+    AssessmentAggregate, AssessmentData, AssessmentOutcome, AssessmentVersion, DeletedRecord, ExportJob, Report,
+    SLOInReport, SLOStatus
+)
+from .parquetExport import PARQUET_CONTENT_TYPE
+
+logger = logging.getLogger(__name__)
+#extension and content type of the file of each format
+EXPORT_FORMATS = {
+    'csv': ('csv.gz', 'application/gzip'),
+    'parquet': ('parquet', PARQUET_CONTENT_TYPE),
+}
+#minutes after which a job still pending or running is assumed to have been lost, such as by a restart
+EXPORT_JOB_TIMEOUT_MINUTES = 30
+#models with modification times whose data is exported, including the analytics table for renamed programs
+TRACKED_MODELS = (
+    Report, SLOInReport, AssessmentVersion, AssessmentData, AssessmentAggregate, SLOStatus, AssessmentOutcome
+)
+
+def data_revision():
+    """
+    Gets the revision of the data exported, which changes whenever a tracked object is saved or deleted
+
+    Returns:
+        str : latest modification time of each tracked model and the latest tombstone
+    """
+    revision = [model.objects.aggregate(latest=Max('updatedAt'))['latest'] for model in TRACKED_MODELS]
+    revision.append(DeletedRecord.objects.aggregate(latest=Max('pk'))['latest'])
+    return "|".join(str(r) for r in revision)
+
+def export_job_key(path, fileFormat, revision):
+    """
+    Gets the key of an export, matching the jobs whose file can be reused for it
+
+    Args:
+        path (str): path of the export
+        fileFormat (str): key of :data:`EXPORT_FORMATS`
+        revision (str): revision of the data, from :func:`data_revision`
+    Returns:
+        str : sha1 of the path, format and revision
+    """
+    return hashlib.sha1((path+"|"+fileFormat+"|"+revision).encode()).hexdigest()
+
+def start_export_job(path, fileFormat, rows):
+    """
+    Gets the job for an export, starting one if no job's file can be reused
+
+    Args:
+        path (str): path of the export
+        fileFormat (str): key of :data:`EXPORT_FORMATS`
+        rows (int): number of rows counted for the export
+    Returns:
+        ExportJob : the job (:class:`~makeReports.models.data_models.ExportJob`)
+    """
+    key = export_job_key(path, fileFormat, data_revision())
+    job = ExportJob.objects.filter(parameters=key).filter(
+        Q(status="done") |
+        Q(status__in=["pending", "running"], created__gte=timezone.now()-timedelta(minutes=EXPORT_JOB_TIMEOUT_MINUTES))
+        ).order_by('-created').first()
+    if job is None:
+        job = ExportJob.objects.create(path=path, fileFormat=fileFormat, rows=rows, parameters=key)
+        #the job is only visible to the thread once it is committed
+        transaction.on_commit(lambda: threading.Thread(target=run_export_job_thread, args=(job.pk,), daemon=True).start())
+    return job
+
+def write_export(view, fileFormat, filePath):
+    """
+    Writes the file of an export
+
+    Args:
+        view (CSVExportView): the export view, with its keyword arguments set
+        fileFormat (str): key of :data:`EXPORT_FORMATS`
+        filePath (str): path the file is written to
+    """
+    queryset = view.get_queryset()
+    fieldNames = view.get_fields(queryset)
+    if fileFormat == 'parquet':
+        with pa.OSFile(filePath, 'wb') as sink:
+            view.write_parquet(queryset, fieldNames, sink)
+    else:
+        with gzip.open(filePath, 'wt', newline='') as f:
+            f.writelines(view.iter_rows(queryset, fieldNames))
+
+def run_export_job(pk):
+    """
+    Writes the file of a job, recording whether it succeeded
+
+    Args:
+        pk (int): primary key of the job
+    """
+    try:
+        job = ExportJob.objects.get(pk=pk)
+        ExportJob.objects.filter(pk=pk).update(status="running")
+        view = export_view(job)
+        extension = EXPORT_FORMATS[job.fileFormat][0]
+        with tempfile.TemporaryDirectory() as tmp:
+            filePath = os.path.join(tmp, "export."+extension)
+            write_export(view, job.fileFormat, filePath)
+            with open(filePath, 'rb') as f:
+                job.artifact.save("export-%d.%s" % (job.pk, extension), File(f), save=False)
+        ExportJob.objects.filter(pk=pk).update(status="done", artifact=job.artifact.name, finished=timezone.now())
+    except Exception as e:
+        logger.exception("Export job %s failed", pk)
+        ExportJob.objects.filter(pk=pk).update(status="failed", error=str(e), finished=timezone.now())
+
+def run_export_job_thread(pk):
+    """
+    Runs a job in a thread of its own
+
+    Args:
+        pk (int): primary key of the job
+    """
+    try:
+        run_export_job(pk)
+    finally:
+        #the thread's connection is not closed by the request cycle
+        connection.close()
+
+def export_view(job, request=None):
+    """
+    Gets the export view a job was requested from
+
+    Args:
+        job (ExportJob): the job
+        request (HttpRequest): request to set on the view, to check who can access the job
+    Returns:
+        CSVExportView : the view, with its keyword arguments set
+    """
+    match = resolve(job.path)
+    return match.func.view_class(request=request, kwargs=match.kwargs)
+
+def delete_old_exports(days=7):
+    """
+    Deletes jobs older than the given age along with their files, leaving jobs which may still be running
+
+    Args:
+        days (int): age in days beyond which jobs are deleted
+    Returns:
+        int : number of jobs deleted
+    """
+    old = ExportJob.objects.filter(created__lte=timezone.now()-timedelta(days=days)).exclude(
+        status__in=["pending", "running"], created__gte=timezone.now()-timedelta(minutes=EXPORT_JOB_TIMEOUT_MINUTES))
+    deleted = 0
+    for job in old:
+        if job.artifact:
+            job.artifact.delete(save=False)
+        job.delete()
+        deleted += 1
+    return deleted
+
+class ExportJobMixin:
+    """
+    Mixin for export views to run exports with more rows than the EXPORT_JOB_ROWS setting in the background,
+    redirecting to the CSV management page which shows the job's status and links to its file when done
+    """
+    def get(self, request, *args, **kwargs):
+        """
+        Gets the export, or starts a job for it if it is large
+
+        Returns:
+            HttpResponse : the file or a redirect to the CSV management page
+        """
+        if getattr(self, 'since', None) is not None:
+            #exports of changes are small, and their jobs would not know the time
+            return super().get(request, *args, **kwargs)
+        rows = self.get_queryset().count()
+        if rows <= getattr(settings, 'EXPORT_JOB_ROWS', 20000):
+            return super().get(request, *args, **kwargs)
+        fileFormat = 'parquet' if request.GET.get('format') == 'parquet' else 'csv'
+        job = start_export_job(request.path, fileFormat, rows)
+        return redirect(reverse('makeReports:csv-mang')+"?job=%d" % job.pk)
@@ -0,0 +1,154 @@
+"""
+Draws graphs with the object-oriented Agg API of matplotlib
+
+Figures are never registered with pyplot, whose global state is not thread-safe and keeps every
+figure alive until it is closed, so each figure is freed once it has been encoded. The style is set up
+once when the worker loads this module, and the number of graphs drawn at once is capped.
+Raster images are recompressed with Pillow, losslessly, since matplotlib does not optimize them.
+"""
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import django
+import numpy as np
+import matplotlib
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+from PIL import Image, features
+from django.conf import settings
+
+#content type of each image format graphs can be drawn in
+GRAPH_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+if features.check('webp'):
+    GRAPH_FORMATS['webp'] = 'image/webp'
+#range of resolutions raster graphs can be drawn at, in dots per inch
+MIN_DPI = 50
+MAX_DPI = 300
+#style graphs are drawn with
+GRAPH_STYLE = {
+    'figure.figsize': (6.4, 4.8),
+    'figure.dpi': 100,
+    'font.size': 10,
+}
+matplotlib.rcParams.update(GRAPH_STYLE)
+#looks the font up now so the first graph does not pay for it
+font_manager.findfont(font_manager.FontProperties(family=matplotlib.rcParams['font.family']))
+PERCENT_FORMATTER = FuncFormatter(lambda y, _: '{:.0%}'.format(y))
+#graphs drawn at once within a worker, beyond which requests wait
+_renderSlots = threading.BoundedSemaphore(getattr(settings, 'GRAPH_RENDER_CONCURRENCY', 2))
+#processes drawing batches of graphs for this worker, started when first needed
+_renderPool = None
+_renderPoolLock = threading.Lock()
+
+def draw_bar_graph(df, columns, xlabel="Year", ylabel="Percentage"):
+    """
+    Draws a grouped bar graph of percentages, with one group of bars per row
+
+    Args:
+        df (pandas.DataFrame): 'Year' column and the columns to graph
+        columns (list): names of the columns to graph, one bar per column in each group
+        xlabel (str): label of the x-axis
+        ylabel (str): label of the y-axis
+    Returns:
+        matplotlib.figure.Figure : figure, i.e. the graph, with an Agg canvas
+    """
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot(1, 1, 1)
+    positions = np.arange(len(df))
+    width = 0.5/max(len(columns), 1)
+    for i, column in enumerate(columns):
+        axes.bar(positions-0.25+width*(i+0.5), df[column].values, width, label=column)
+    axes.set_xticks(positions)
+    axes.set_xticklabels([str(y) for y in df['Year']], rotation=90)
+    axes.set(xlabel=xlabel, ylabel=ylabel)
+    axes.yaxis.set_major_formatter(PERCENT_FORMATTER)
+    if columns:
+        axes.legend()
+    return figure
+
+def compress_image(png, imageFormat):
+    """
+    Recompresses a PNG drawn by matplotlib, losslessly
+
+    Args:
+        png (bytes): the PNG image
+        imageFormat (str): 'png' or 'webp'
+    Returns:
+        bytes : the compressed image
+    """
+    f1 = io.BytesIO()
+    with Image.open(io.BytesIO(png)) as image:
+        if imageFormat == 'webp':
+            image.save(f1, format='WEBP', lossless=True, method=4)
+        else:
+            image.save(f1, format='PNG', optimize=True)
+    return f1.getvalue()
+
+def render_bar_graph(df, columns, imageFormat, dpi=None):
+    """
+    Draws and encodes a grouped bar graph, waiting if too many graphs are already being drawn
+
+    Args:
+        df (pandas.DataFrame): 'Year' column and the columns to graph
+        columns (list): names of the columns to graph
+        imageFormat (str): key of :data:`GRAPH_FORMATS`
+        dpi (int): resolution of raster images, the style's resolution if None
+    Returns:
+        bytes : the encoded image
+    """
+    with _renderSlots:
+        figure = draw_bar_graph(df, columns)
+        f1 = io.BytesIO()
+        try:
+            figure.savefig(f1, format='svg' if imageFormat == 'svg' else 'png', dpi=dpi, bbox_inches='tight')
+        finally:
+            figure.clear()
+        if imageFormat == 'svg':
+            return f1.getvalue()
+        return compress_image(f1.getvalue(), imageFormat)
+
+def render_pool():
+    """
+    Gets the pool of processes which draw batches of graphs, starting it if needed
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor : the pool, None if GRAPH_RENDER_PROCESSES is 0
+    Notes:
+        The processes are spawned rather than forked, since forking a worker running threads can copy held locks
+    """
+    global _renderPool
+    processes = getattr(settings, 'GRAPH_RENDER_PROCESSES', 0)
+    if processes < 1:
+        return None
+    with _renderPoolLock:
+        if _renderPool is None:
+            _renderPool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+            )
+        return _renderPool
+
+def render_bar_graphs(graphs, imageFormat, dpi=None):
+    """
+    Draws and encodes several grouped bar graphs, in parallel when there is a pool of processes
+
+    Args:
+        graphs (list): tuples of the DataFrame and the columns to graph, as passed to :func:`render_bar_graph`
+        imageFormat (str): key of :data:`GRAPH_FORMATS`
+        dpi (int): resolution of raster images, the style's resolution if None
+    Returns:
+        list : the encoded images, in the same order as the graphs
+    """
+    pool = render_pool() if len(graphs) > 1 else None
+    if pool is None:
+        return [render_bar_graph(df, columns, imageFormat, dpi) for df, columns in graphs]
+    futures = [pool.submit(render_bar_graph, df, columns, imageFormat, dpi) for df, columns in graphs]
+    return [f.result() for f in futures]
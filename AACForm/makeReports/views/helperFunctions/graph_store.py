@@ -0,0 +1,63 @@
+"""
+Keeps drawn graphs for a short time, after which they are deleted by the expire_graphs management command.
+Graphs precomputed by the precompute_graphs management command are kept until it replaces them.
+Graphs are keyed by the revision of their data, so are no longer reused once it changes.
+"""
+from datetime import timedelta
+from django.db.models import Q
+from django.db.models.functions import Length
+from django.utils import timezone
+from makeReports.models import Graph
+
+#minutes a drawn graph is reused for, less than the time it is kept for
+GRAPH_CACHE_MINUTES = 15
+#minutes a drawn graph is kept for
+GRAPH_EXPIRY_MINUTES = 20
+
+def live_graphs():
+    """
+    Gets the graphs which have not expired, whether or not they have been deleted yet
+
+    Returns:
+        QuerySet : graphs (:class:`~makeReports.models.data_models.Graph`) younger than the expiry time or precomputed
+    """
+    return Graph.objects.filter(
+        Q(dateTime__gt=timezone.now()-timedelta(minutes=GRAPH_EXPIRY_MINUTES)) | Q(precomputed=True))
+
+def reusable_graphs(keys):
+    """
+    Gets the graphs which can be reused instead of drawing them again
+
+    Args:
+        keys (list): keys of the graphs' parameters, from :func:`~makeReports.views.API.graphAPI.graph_parameters_key`
+    Returns:
+        QuerySet : graphs (:class:`~makeReports.models.data_models.Graph`) with the keys drawn recently or precomputed,
+        annotated with the 'size' of their image in bytes
+    """
+    return Graph.objects.filter(parameters__in=keys).filter(
+        Q(dateTime__gte=timezone.now()-timedelta(minutes=GRAPH_CACHE_MINUTES)) | Q(precomputed=True)
+        ).annotate(size=Length('image'))
+
+def delete_expired_graphs(minutes=GRAPH_EXPIRY_MINUTES, batchSize=500):
+    """
+    Deletes the graphs older than the given age, a batch at a time
+
+    Args:
+        minutes (int): age in minutes beyond which graphs are deleted
+        batchSize (int): number of graphs deleted by each statement
+    Returns:
+        int : number of graphs deleted
+    Notes:
+        Precomputed graphs are not deleted here, as the precompute_graphs command deletes the previous set
+        when it draws the next.
+        Graphs uploaded to Google Drive before graphs were kept in the database also have their file deleted
+    """
+    expired = Graph.objects.filter(dateTime__lte=timezone.now()-timedelta(minutes=minutes), precomputed=False)
+    deleted = 0
+    while True:
+        pks = list(expired.values_list('pk', flat=True)[:batchSize])
+        if not pks:
+            return deleted
+        for g in Graph.objects.filter(pk__in=pks).exclude(graph="").only('pk', 'graph'):
+            g.graph.delete(save=False)
+        deleted += Graph.objects.filter(pk__in=pks).delete()[0]
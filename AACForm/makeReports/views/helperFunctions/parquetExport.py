@@ -0,0 +1,149 @@
+"""
+Exports the data of a :class:`~makeReports.views.helperFunctions.csvExport.CSVExportView` as Parquet
+
+Columns keep the types of their fields, so the file can be loaded by pandas or BI tools without parsing,
+and repeated names are stored once per row group as categorical columns.
+"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.http import HttpResponse
+
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+#Parquet types of Django fields, by internal type, with any other field stored as a string
+ARROW_TYPES = {
+    'AutoField': pa.int64(),
+    'BigAutoField': pa.int64(),
+    'BigIntegerField': pa.int64(),
+    'IntegerField': pa.int64(),
+    'PositiveIntegerField': pa.int64(),
+    'PositiveSmallIntegerField': pa.int64(),
+    'SmallIntegerField': pa.int64(),
+    'BooleanField': pa.bool_(),
+    'NullBooleanField': pa.bool_(),
+    'DateField': pa.date32(),
+    'DateTimeField': pa.timestamp('us', tz='UTC'),
+    'DecimalField': pa.float64(),
+    'FloatField': pa.float64(),
+}
+CATEGORICAL = pa.dictionary(pa.int32(), pa.string())
+
+def arrow_type(field, categorical=False):
+    """
+    Gets the Parquet type of a field
+
+    Args:
+        field (Field): the field, None for a property
+        categorical (bool): whether to store strings as categories
+    Returns:
+        pyarrow.DataType : the type of the column
+    Notes:
+        Fields with choices are exported as their labels, so are categorical
+    """
+    if field is None:
+        return CATEGORICAL if categorical else pa.string()
+    if field.choices or categorical:
+        return CATEGORICAL
+    if field.is_relation:
+        return arrow_type(field.target_field)
+    return ARROW_TYPES.get(field.get_internal_type(), pa.string())
+
+def column_array(values, arrowType):
+    """
+    Converts the values of a column to a Parquet array
+
+    Args:
+        values (list): the values, where '' stands for a missing related object
+        arrowType (pyarrow.DataType): type of the column, from :func:`arrow_type`
+    Returns:
+        pyarrow.Array : the array
+    """
+    if arrowType == CATEGORICAL:
+        return pa.array([None if v is None or v == '' else str(v) for v in values], type=pa.string()).dictionary_encode()
+    if arrowType == pa.string():
+        return pa.array([None if v is None else str(v) for v in values], type=arrowType)
+    return pa.array([None if v == '' else v for v in values], type=arrowType)
+
+class ParquetExportMixin:
+    """
+    Mixin for CSV export views to give the same data as Parquet when the 'format' GET parameter is 'parquet'
+
+    Notes:
+        Columns are named by the fields' lookups, such as 'assessmentVersion__report__year',
+        since several headers of the CSV can be the same
+    """
+    #fields stored as categories, such as names repeated on many rows
+    categorical_fields = []
+    #number of rows in each row group of the file
+    parquet_batch_size = 50000
+    def get_schema(self, model, field_names):
+        """
+        Gets the schema of the file
+
+        Args:
+            model (Model): the model exported
+            field_names (list): names of the fields exported
+        Returns:
+            pyarrow.Schema : schema with a nullable column per field
+        """
+        columns = []
+        for field_name in field_names:
+            resolved = self.resolve_field(model, field_name)
+            field = resolved[1] if resolved else None
+            columns.append(pa.field(field_name, arrow_type(field, field_name in self.categorical_fields)))
+        return pa.schema(columns)
+    def write_parquet(self, queryset, field_names, sink):
+        """
+        Writes the rows to the sink a row group at a time
+
+        Args:
+            queryset (QuerySet): the objects exported
+            field_names (list): names of the fields exported
+            sink (pyarrow.NativeFile): stream the Parquet file is written to
+        Returns:
+            int : number of rows written
+        """
+        schema = self.get_schema(queryset.model, field_names)
+        queryset, row = self.get_row_plan(queryset, field_names)
+        written = 0
+        with pq.ParquetWriter(sink, schema, compression='snappy') as writer:
+            batch = []
+            for obj in queryset.iterator(chunk_size=self.chunk_size):
+                batch.append(row(obj))
+                if len(batch) >= self.parquet_batch_size:
+                    written += self.write_row_group(writer, schema, batch)
+                    batch = []
+            if batch or not written:
+                written += self.write_row_group(writer, schema, batch)
+        return written
+    def write_row_group(self, writer, schema, rows):
+        """
+        Writes rows as one row group
+
+        Args:
+            writer (pyarrow.parquet.ParquetWriter): writer of the file
+            schema (pyarrow.Schema): schema of the file
+            rows (list): the rows, each a list of values
+        Returns:
+            int : number of rows written
+        """
+        columns = list(zip(*rows)) if rows else [[] for _ in schema]
+        arrays = [column_array(list(values), field.type) for values, field in zip(columns, schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        return len(rows)
+    def get(self, request, *args, **kwargs):
+        """
+        Gets the Parquet file if requested, otherwise the CSV
+
+        Returns:
+            HttpResponse : the file
+        """
+        if request.GET.get('format') != 'parquet':
+            return super().get(request, *args, **kwargs)
+        queryset = self.get_queryset()
+        field_names = self.get_fields(queryset)
+        sink = pa.BufferOutputStream()
+        self.write_parquet(queryset, field_names, sink)
+        response = HttpResponse(sink.getvalue().to_pybytes(), content_type=PARQUET_CONTENT_TYPE)
+        filename = self.get_filename(queryset)
+        response['Content-Disposition'] = 'attachment; filename="{}.parquet"'.format(filename)
+        return response
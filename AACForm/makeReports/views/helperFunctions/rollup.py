@@ -0,0 +1,220 @@
+"""
+Keeps the rollup cube of outcomes (:class:`~makeReports.models.data_models.OutcomeRollup`) and answers slices of it.
+
+The cube is refreshed a department and year at a time: only the slices with objects changed since the last
+refresh, or whose numbers of SLOs, assessments or data points by their dimensions no longer match the cube's
+after objects are deleted or moved or the dimensions copied from SLOs, assessments, degree programs and
+departments change, are recomputed.
+"""
+import pandas as pd
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, Q, Sum
+from django.utils import timezone
+from makeReports.models import AssessmentData, OutcomeRollup, SLOInReport
+
+#dimensions of the cube and the lookups from SLOInReport they are taken from
+ROLLUP_DIMENSIONS = {
+    'year': 'report__year',
+    'college': 'report__degreeProgram__department__college',
+    'department': 'report__degreeProgram__department',
+    'level': 'report__degreeProgram__level',
+    'blooms': 'slo__blooms',
+    'directMeasure': 'assessmentversion__assessment__directMeasure',
+    'status': 'slostatus__status',
+}
+ROLLUP_MEASURES = ('slos', 'assessments', 'aggregates', 'met', 'proficiencySum', 'dataPoints', 'students', 'proficientStudents')
+#dimensions missing for SLOs without assessments or statuses, grouped under MISSING as pandas drops missing keys
+NULLABLE_DIMENSIONS = ('directMeasure', 'status')
+MISSING = "missing"
+#dimensions the numbers of SLOs and assessments are compared with the cube's by, which are copied from objects
+#without change tracking, or from SLOs and assessments changed without changing the SLOs in reports
+COUNTED_DIMENSIONS = {
+    'slos': ('department', 'year', 'college', 'level', 'blooms'),
+    'assessments': ('department', 'year', 'college', 'level', 'blooms', 'directMeasure'),
+}
+
+def rollup_cells(slices, refreshedAt):
+    """
+    Computes the cells of the cube for slices, with one query
+
+    Args:
+        slices (Q): lookups of the SLOs in the slices
+        refreshedAt (datetime): time the refresh started
+    Returns:
+        list : unsaved cells (:class:`~makeReports.models.data_models.OutcomeRollup`)
+    """
+    rows = pd.DataFrame.from_records(list(SLOInReport.objects.filter(slices).order_by().values(
+        'pk', 'assessmentversion', 'assessmentversion__assessmentaggregate__aggregate_proficiency',
+        'assessmentversion__assessmentaggregate__met', *ROLLUP_DIMENSIONS.values()
+        ).annotate(
+            dataPoints=Count('assessmentversion__assessmentdata'),
+            students=Sum('assessmentversion__assessmentdata__numberStudents'),
+            proficient=Sum(
+                F('assessmentversion__assessmentdata__numberStudents')*
+                F('assessmentversion__assessmentdata__overallProficient'),
+                output_field=IntegerField())
+        )))
+    if rows.empty:
+        return []
+    rows = rows.rename(columns={lookup: dimension for dimension, lookup in ROLLUP_DIMENSIONS.items()})
+    aggregate = rows['assessmentversion__assessmentaggregate__aggregate_proficiency']
+    measures = pd.DataFrame({
+        'slos': 1/rows.groupby('pk')['pk'].transform('size'),
+        'assessments': rows['assessmentversion'].notna().astype(int),
+        'aggregates': aggregate.notna().astype(int),
+        'met': (rows['assessmentversion__assessmentaggregate__met'] == True).astype(int),
+        'proficiencySum': aggregate.fillna(0).astype(int),
+        'dataPoints': rows['dataPoints'].astype(int),
+        'students': rows['students'].fillna(0).astype(int),
+        'proficientStudents': rows['proficient'].fillna(0).astype(float)/100,
+    })
+    for dimension in ROLLUP_DIMENSIONS:
+        measures[dimension] = rows[dimension]
+    for dimension in NULLABLE_DIMENSIONS:
+        measures[dimension] = rows[dimension].astype(object).where(rows[dimension].notna(), MISSING)
+    #missing values cannot be sorted with the others
+    cells = measures.groupby(list(ROLLUP_DIMENSIONS), sort=False)[list(ROLLUP_MEASURES)].sum().reset_index()
+    return [OutcomeRollup(refreshedAt=refreshedAt, **cell_values(cell)) for cell in cells.to_dict('records')]
+
+def cell_values(cell):
+    """
+    Converts a cell computed by pandas to the values of its fields
+
+    Args:
+        cell (dict): the cell's dimensions and measures
+    Returns:
+        dict : the values, as Python types with None for missing dimensions
+    """
+    values = {name: value.item() if hasattr(value, 'item') else value for name, value in cell.items()}
+    for name in NULLABLE_DIMENSIONS:
+        if values[name] == MISSING:
+            values[name] = None
+    return values
+
+def slice_lookups(pairs):
+    """
+    Gets the lookups of the SLOs in slices
+
+    Args:
+        pairs (iterable): department and year of each slice
+    Returns:
+        Q : lookups of the SLOs, matching nothing if there are no slices
+    """
+    lookups = Q(pk__in=[])
+    for department, year in pairs:
+        lookups |= Q(report__degreeProgram__department=department, report__year=year)
+    return lookups
+
+def changed_slices(since):
+    """
+    Gets the slices whose objects changed since the last refresh, were deleted or moved to other slices,
+    or whose dimensions changed
+
+    Args:
+        since (datetime): time of the last refresh
+    Returns:
+        set : department and year of each slice
+    Notes:
+        Deletions, moves and changes to dimensions leave no time of change in the slices, so the counts of
+        every slice are compared on each refresh
+    """
+    changed = Q()
+    for lookup in ('', 'report__', 'slostatus__', 'assessmentversion__', 'assessmentversion__assessmentaggregate__',
+            'assessmentversion__assessmentdata__'):
+        changed |= Q(**{lookup+'updatedAt__gt': since})
+    slices = set(SLOInReport.objects.filter(changed).values_list(
+        'report__degreeProgram__department', 'report__year').distinct())
+    return slices | miscounted_slices()
+
+def miscounted_slices():
+    """
+    Gets the slices whose numbers of SLOs or assessments by :data:`COUNTED_DIMENSIONS`, or of data points,
+    differ from the cube's, such as after deletions or changes to their dimensions
+
+    Returns:
+        set : department and year of each slice
+    Notes:
+        Deleted and moved objects leave no trace in the slices they were in, so this counts the whole of the
+        SLO, data and cube tables, with one grouped query per number. Counts are keyed by the number and the
+        dimensions, and groups counting nothing are left out
+    """
+    counts = {}
+    for measure, counted in (('slos', 'pk'), ('assessments', 'assessmentversion')):
+        lookups = [ROLLUP_DIMENSIONS[dimension] for dimension in COUNTED_DIMENSIONS[measure]]
+        for *group, number in SLOInReport.objects.order_by().values_list(*lookups).annotate(
+                number=Count(counted, distinct=True)):
+            if number:
+                counts[(measure, *group)] = number
+    for department, year, dataPoints in AssessmentData.objects.order_by().values_list(
+            'assessmentVersion__report__degreeProgram__department', 'assessmentVersion__report__year').annotate(
+            dataPoints=Count('pk')):
+        counts[('dataPoints', department, year)] = dataPoints
+    cube = {}
+    for cell in OutcomeRollup.objects.order_by().values(*COUNTED_DIMENSIONS['assessments']).annotate(
+            Sum('slos'), Sum('assessments'), Sum('dataPoints')):
+        for measure, dimensions in COUNTED_DIMENSIONS.items():
+            key = (measure, *(cell[dimension] for dimension in dimensions))
+            cube[key] = cube.get(key, 0)+cell[measure+'__sum']
+        key = ('dataPoints', cell['department'], cell['year'])
+        cube[key] = cube.get(key, 0)+cell['dataPoints__sum']
+    #SLOs split between assessments are counted in shares
+    cube = {key: round(number) for key, number in cube.items() if round(number)}
+    return {key[1:3] for key in set(counts) | set(cube) if counts.get(key) != cube.get(key)}
+
+def refresh_rollup(full=False):
+    """
+    Recomputes the slices of the cube which changed since the last refresh
+
+    Args:
+        full (bool): whether to recompute the whole cube
+    Returns:
+        tuple : number of slices recomputed and number of cells written
+    Notes:
+        The refresh time is taken before reading, so objects changed while it runs are read again next time
+    """
+    refreshedAt = timezone.now()
+    since = OutcomeRollup.objects.aggregate(latest=Max('refreshedAt'))['latest']
+    with transaction.atomic():
+        if full or since is None:
+            OutcomeRollup.objects.all().delete()
+            cells = rollup_cells(Q(), refreshedAt)
+            slices = {(cell.department, cell.year) for cell in cells}
+        else:
+            slices = changed_slices(since)
+            if not slices:
+                return 0, 0
+            stale = Q(pk__in=[])
+            for department, year in slices:
+                stale |= Q(department=department, year=year)
+            OutcomeRollup.objects.filter(stale).delete()
+            cells = rollup_cells(slice_lookups(slices), refreshedAt)
+        OutcomeRollup.objects.bulk_create(cells, batch_size=500)
+    return len(slices), len(cells)
+
+def slice_rollup(groupby, **filters):
+    """
+    Sums the cells of the cube in a slice, grouped by some of its dimensions
+
+    Args:
+        groupby (list): dimensions to group by, none to total the slice
+        **filters: lookups of the cells in the slice, such as year__gte or college
+    Returns:
+        list : dictionary per group of its dimensions and measures, with 'weightedProficiency' (proficiency of the
+        students assessed), 'meanProficiency' (mean aggregate proficiency) and 'metShare' (share of aggregates
+        meeting their target) as fractions, None where nothing was counted
+    """
+    cells = OutcomeRollup.objects.filter(**filters)
+    sums = {measure: Sum(measure) for measure in ROLLUP_MEASURES}
+    if groupby:
+        cells = cells.order_by(*groupby).values(*groupby).annotate(**sums)
+    else:
+        cells = [cells.aggregate(**sums)]
+    groups = []
+    for group in cells:
+        if group['slos'] is None:
+            continue
+        group['weightedProficiency'] = group['proficientStudents']/group['students'] if group['students'] else None
+        group['meanProficiency'] = group['proficiencySum']/group['aggregates']/100 if group['aggregates'] else None
+        group['metShare'] = group['met']/group['aggregates'] if group['aggregates'] else None
+        groups.append(group)
+    return groups
@@ -0,0 +1,139 @@
+"""
+Computes the trends of every SLO of degree programs across report years, from one query.
+
+SLOs are followed by their lineage, the :class:`~makeReports.models.slo_models.SLO` shared by their versions in
+each report. The values are held as matrices with a row per program and SLO and a column per year, so the
+deltas, streaks and moving averages are computed for every SLO at once.
+"""
+import numpy as np
+import pandas as pd
+from makeReports.models import SLOInReport
+
+#default number of years averaged by the moving average
+TREND_WINDOW = 3
+#statuses counting as the target not being met
+UNMET_STATUSES = ("Not Met", "Partially Met")
+#matrices of values by year computed for each SLO
+TREND_MEASURES = ('proficiency', 'target', 'status', 'delta', 'unmetStreak', 'movingAverage')
+
+def trend_rows(bYear, eYear, **lookups):
+    """
+    Gets a row per assessment of each SLO in the years, with one query
+
+    Args:
+        bYear (int): minimum year
+        eYear (int): maximum year
+        **lookups: lookups of the reports, such as report__degreeProgram
+    Returns:
+        pandas.DataFrame : 'program', 'slo', 'year', 'goalText', 'status', 'target', 'proficiency' and 'met' columns,
+        with SLOs without assessments given one row without a target
+    """
+    columns = ['program', 'slo', 'year', 'goalText', 'status', 'target', 'proficiency', 'met']
+    rows = SLOInReport.objects.filter(report__year__gte=bYear, report__year__lte=eYear, **lookups).values_list(
+        'report__degreeProgram', 'slo', 'report__year', 'goalText', 'slostatus__status',
+        'assessmentversion__target', 'assessmentversion__assessmentaggregate__aggregate_proficiency',
+        'assessmentversion__assessmentaggregate__met')
+    return pd.DataFrame.from_records(list(rows), columns=columns)
+
+def year_matrix(values, years):
+    """
+    Spreads values keyed by program, SLO and year into a matrix
+
+    Args:
+        values (pandas.Series): values indexed by 'program', 'slo' and 'year'
+        years (pandas.Index): years of the columns
+    Returns:
+        pandas.DataFrame : a row per program and SLO and a column per year, NaN where there is no value
+    """
+    return values.unstack('year').reindex(columns=years)
+
+def unmet_streaks(unmet, reported):
+    """
+    Counts the consecutive reports up to each year in which the target was not met
+
+    Args:
+        unmet (numpy.ndarray): whether the target was not met, by row and year
+        reported (numpy.ndarray): whether there was a report, by row and year
+    Returns:
+        numpy.ndarray : length of the streak ending at each year, where years without reports neither
+        extend nor end a streak
+    """
+    counted = np.cumsum(unmet & reported, axis=1)
+    resets = np.where(reported & ~unmet, counted, 0)
+    return counted-np.maximum.accumulate(resets, axis=1)
+
+def slo_trends(bYear, eYear, window=TREND_WINDOW, **lookups):
+    """
+    Computes the trends of every SLO of the programs across the years
+
+    Args:
+        bYear (int): minimum year
+        eYear (int): maximum year
+        window (int): number of years averaged by the moving average
+        **lookups: lookups of the reports, such as report__degreeProgram
+    Returns:
+        dict : pandas.DataFrame with a row per program and SLO and a column per year for each of 'proficiency',
+        'target', 'status', 'delta', 'unmetStreak' and 'movingAverage', and pandas.Series of the latest 'goalText'
+    Notes:
+        Proficiency and target are the means over the SLO's assessments in each year, as fractions.
+        The delta is the change from the previous report. A year's target is not met if the SLO's status is
+        Not Met or Partially Met, or without a status, if any of its aggregates did not meet its target
+    """
+    years = pd.Index(range(bYear, eYear+1), name='year')
+    rows = trend_rows(bYear, eYear, **lookups).sort_values('year')
+    if rows.empty:
+        index = pd.MultiIndex.from_arrays([[], []], names=['program', 'slo'])
+        trends = {m: pd.DataFrame(index=index, columns=years) for m in TREND_MEASURES}
+        trends['goalText'] = pd.Series(index=index, dtype=object)
+        return trends
+    rows['target'] = rows['target'].astype(float)/100
+    rows['proficiency'] = rows['proficiency'].astype(float)/100
+    rows['notMet'] = rows['met'].map({True: 0.0, False: 1.0}).astype(float)
+    grouped = rows.groupby(['program', 'slo', 'year'])
+    proficiency = year_matrix(grouped['proficiency'].mean(), years)
+    status = year_matrix(grouped['status'].first(), years).reindex(proficiency.index)
+    notMet = year_matrix(grouped['notMet'].max(), years).values == 1
+    reported = year_matrix(grouped.size(), years).notna().values
+    unmet = status.isin(UNMET_STATUSES).values | (status.isna().values & notMet)
+    streaks = np.where(reported, unmet_streaks(unmet, reported), np.nan)
+    return {
+        'proficiency': proficiency,
+        'target': year_matrix(grouped['target'].mean(), years),
+        'status': status,
+        'delta': proficiency-proficiency.ffill(axis=1).shift(1, axis=1),
+        'unmetStreak': pd.DataFrame(streaks, index=proficiency.index, columns=years),
+        'movingAverage': proficiency.rolling(window, min_periods=1, axis=1).mean().where(proficiency.notna()),
+        'goalText': rows.groupby(['program', 'slo'])['goalText'].last(),
+    }
+
+def trend_values(values):
+    """
+    Converts a row of a trend matrix to JSON serializable form
+
+    Args:
+        values (numpy.ndarray): the row
+    Returns:
+        list : the values, with None where there was no report
+    """
+    return [None if pd.isna(v) else (v if isinstance(v, str) else float(v)) for v in values]
+
+def trends_payload(bYear, eYear, trends):
+    """
+    Converts the trends to JSON serializable form
+
+    Args:
+        bYear (int): minimum year
+        eYear (int): maximum year
+        trends (dict): trends from :func:`slo_trends`
+    Returns:
+        dict : 'years', and 'trends' with a dictionary per program and SLO of lists by year
+    """
+    matrices = {m: trends[m].values for m in TREND_MEASURES}
+    payload = []
+    for i, (program, slo) in enumerate(trends['proficiency'].index):
+        trend = {'program': int(program), 'slo': int(slo), 'goalText': trends['goalText'][(program, slo)]}
+        for m in TREND_MEASURES:
+            trend[m] = trend_values(matrices[m][i])
+        trend['unmetStreak'] = [None if v is None else int(v) for v in trend['unmetStreak']]
+        payload.append(trend)
+    return {'years': list(range(bYear, eYear+1)), 'trends': payload}
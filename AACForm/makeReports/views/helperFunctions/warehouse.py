@@ -0,0 +1,354 @@
+"""
+Writes a self-contained SQLite database of the assessment results with a star schema, for ad-hoc SQL by analysts
+without access to the production database.
+
+Fact tables of data points, aggregates, SLO statuses and rubric grades reference dimension tables of colleges,
+departments, degree programs, years, SLO lineage and assessment lineage. An SLO's lineage is the
+:class:`~makeReports.models.slo_models.SLO` its versions in each report share, and likewise for assessments.
+After the first build the database is refreshed incrementally from the modification times and tombstones of
+the tracked models.
+"""
+import datetime
+import os
+import sqlite3
+from django.db.models import Q
+from django.utils import timezone
+from makeReports.models import (
+    Assessment, AssessmentAggregate, AssessmentData, AssessmentVersion, College, DegreeProgram, DeletedRecord,
+    Department, GradedRubricItem, Report, RubricItem, SLO, SLOInReport, SLOStatus
+)
+from .delta_export import parse_since
+
+#changed whenever the tables below change, so older databases are rebuilt rather than refreshed
+WAREHOUSE_SCHEMA_VERSION = "1"
+#number of rows fetched and inserted at a time
+WAREHOUSE_BATCH_SIZE = 5000
+
+class WarehouseTable:
+    """
+    Table of the warehouse and the model it is copied from
+
+    Args:
+        name (str): name of the table
+        model (type): model copied, one row per object
+        columns (list): tuples of the column, its SQL type and the lookup it is copied from,
+            the first being the primary key
+        changed_lookups (list): prefixes of the lookups of the objects with modification times making up each row,
+            '' for the row's own object, or None to rewrite the table on every refresh
+        queryset (function): gets the objects copied in order, all objects of the model by primary key if None
+    """
+    def __init__(self, name, model, columns, changed_lookups=None, queryset=None):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.changed_lookups = changed_lookups
+        self.queryset = queryset
+    def create_sql(self):
+        """
+        Gets the statement creating the table
+
+        Returns:
+            str : CREATE TABLE statement
+        """
+        columns = ["%s %s" % (column, sqlType) for column, sqlType, _ in self.columns]
+        columns[0] += " PRIMARY KEY"
+        return "CREATE TABLE %s (%s)" % (self.name, ", ".join(columns))
+    def insert_sql(self):
+        """
+        Gets the statement inserting or replacing a row
+
+        Returns:
+            str : INSERT statement with a parameter per column
+        """
+        return "INSERT OR REPLACE INTO %s VALUES (%s)" % (self.name, ", ".join("?" for _ in self.columns))
+    def get_queryset(self, since=None):
+        """
+        Gets the objects to copy
+
+        Args:
+            since (datetime): time of the last refresh, None to copy every object
+        Returns:
+            QuerySet : the objects
+        """
+        queryset = self.queryset() if self.queryset else self.model.objects.order_by('pk')
+        if since is not None and self.changed_lookups is not None:
+            changed = Q()
+            for lookup in self.changed_lookups:
+                changed |= Q(**{lookup+'updatedAt__gt': since})
+            queryset = queryset.filter(changed)
+        return queryset
+
+def sql_value(value):
+    """
+    Converts a value from the database to one SQLite stores
+
+    Args:
+        value: the value
+    Returns:
+        the value, with dates as ISO 8601 text
+    """
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+def years():
+    """
+    Gets the years of reports
+
+    Returns:
+        QuerySet : a row per year with a report
+    """
+    return Report.objects.order_by('year').values('year').distinct()
+
+WAREHOUSE_TABLES = [
+    WarehouseTable('dim_college', College, [
+        ('college_id', 'INTEGER', 'pk'),
+        ('name', 'TEXT', 'name'),
+        ('active', 'BOOLEAN', 'active'),
+    ]),
+    WarehouseTable('dim_department', Department, [
+        ('department_id', 'INTEGER', 'pk'),
+        ('college_id', 'INTEGER REFERENCES dim_college', 'college'),
+        ('name', 'TEXT', 'name'),
+        ('active', 'BOOLEAN', 'active'),
+    ]),
+    WarehouseTable('dim_program', DegreeProgram, [
+        ('program_id', 'INTEGER', 'pk'),
+        ('department_id', 'INTEGER REFERENCES dim_department', 'department'),
+        ('college_id', 'INTEGER REFERENCES dim_college', 'department__college'),
+        ('name', 'TEXT', 'name'),
+        ('level', 'TEXT', 'level'),
+        ('accredited', 'BOOLEAN', 'accredited'),
+        ('active', 'BOOLEAN', 'active'),
+    ]),
+    WarehouseTable('dim_year', Report, [
+        ('year', 'INTEGER', 'year'),
+    ], queryset=years),
+    WarehouseTable('dim_slo', SLO, [
+        ('slo_id', 'INTEGER', 'pk'),
+        ('blooms', 'TEXT', 'blooms'),
+        ('number_of_uses', 'INTEGER', 'numberOfUses'),
+    ]),
+    WarehouseTable('dim_slo_version', SLOInReport, [
+        ('slo_version_id', 'INTEGER', 'pk'),
+        ('slo_id', 'INTEGER REFERENCES dim_slo', 'slo'),
+        ('report_id', 'INTEGER', 'report'),
+        ('program_id', 'INTEGER REFERENCES dim_program', 'report__degreeProgram'),
+        ('year', 'INTEGER REFERENCES dim_year', 'report__year'),
+        ('number', 'INTEGER', 'number'),
+        ('goal_text', 'TEXT', 'goalText'),
+        ('changed_from_prior', 'BOOLEAN', 'changedFromPrior'),
+    ], changed_lookups=['', 'report__']),
+    WarehouseTable('dim_assessment', Assessment, [
+        ('assessment_id', 'INTEGER', 'pk'),
+        ('title', 'TEXT', 'title'),
+        ('domain_examination', 'BOOLEAN', 'domainExamination'),
+        ('domain_product', 'BOOLEAN', 'domainProduct'),
+        ('domain_performance', 'BOOLEAN', 'domainPerformance'),
+        ('direct_measure', 'BOOLEAN', 'directMeasure'),
+        ('number_of_uses', 'INTEGER', 'numberOfUses'),
+    ]),
+    WarehouseTable('dim_assessment_version', AssessmentVersion, [
+        ('assessment_version_id', 'INTEGER', 'pk'),
+        ('assessment_id', 'INTEGER REFERENCES dim_assessment', 'assessment'),
+        ('slo_version_id', 'INTEGER REFERENCES dim_slo_version', 'slo'),
+        ('report_id', 'INTEGER', 'report'),
+        ('program_id', 'INTEGER REFERENCES dim_program', 'report__degreeProgram'),
+        ('year', 'INTEGER REFERENCES dim_year', 'report__year'),
+        ('number', 'INTEGER', 'number'),
+        ('date', 'DATE', 'date'),
+        ('description', 'TEXT', 'description'),
+        ('final_term', 'BOOLEAN', 'finalTerm'),
+        ('location', 'TEXT', 'where'),
+        ('all_students', 'BOOLEAN', 'allStudents'),
+        ('sample_description', 'TEXT', 'sampleDescription'),
+        ('frequency_choice', 'TEXT', 'frequencyChoice'),
+        ('frequency', 'TEXT', 'frequency'),
+        ('threshold', 'TEXT', 'threshold'),
+        ('target', 'INTEGER', 'target'),
+        ('changed_from_prior', 'BOOLEAN', 'changedFromPrior'),
+    ], changed_lookups=['', 'report__']),
+    WarehouseTable('dim_rubric_item', RubricItem, [
+        ('rubric_item_id', 'INTEGER', 'pk'),
+        ('rubric_name', 'TEXT', 'rubricVersion__name'),
+        ('rubric_date', 'DATE', 'rubricVersion__date'),
+        ('section', 'INTEGER', 'section'),
+        ('item_order', 'INTEGER', 'order'),
+        ('abbreviation', 'TEXT', 'abbreviation'),
+        ('text', 'TEXT', 'text'),
+    ]),
+    WarehouseTable('fact_data', AssessmentData, [
+        ('data_id', 'INTEGER', 'pk'),
+        ('assessment_version_id', 'INTEGER REFERENCES dim_assessment_version', 'assessmentVersion'),
+        ('assessment_id', 'INTEGER REFERENCES dim_assessment', 'assessmentVersion__assessment'),
+        ('slo_version_id', 'INTEGER REFERENCES dim_slo_version', 'assessmentVersion__slo'),
+        ('slo_id', 'INTEGER REFERENCES dim_slo', 'assessmentVersion__slo__slo'),
+        ('program_id', 'INTEGER REFERENCES dim_program', 'assessmentVersion__report__degreeProgram'),
+        ('year', 'INTEGER REFERENCES dim_year', 'assessmentVersion__report__year'),
+        ('data_range', 'TEXT', 'dataRange'),
+        ('number_students', 'INTEGER', 'numberStudents'),
+        ('overall_proficient', 'INTEGER', 'overallProficient'),
+    ], changed_lookups=['', 'assessmentVersion__', 'assessmentVersion__slo__', 'assessmentVersion__report__']),
+    WarehouseTable('fact_aggregate', AssessmentAggregate, [
+        ('aggregate_id', 'INTEGER', 'pk'),
+        ('assessment_version_id', 'INTEGER REFERENCES dim_assessment_version', 'assessmentVersion'),
+        ('assessment_id', 'INTEGER REFERENCES dim_assessment', 'assessmentVersion__assessment'),
+        ('slo_version_id', 'INTEGER REFERENCES dim_slo_version', 'assessmentVersion__slo'),
+        ('slo_id', 'INTEGER REFERENCES dim_slo', 'assessmentVersion__slo__slo'),
+        ('program_id', 'INTEGER REFERENCES dim_program', 'assessmentVersion__report__degreeProgram'),
+        ('year', 'INTEGER REFERENCES dim_year', 'assessmentVersion__report__year'),
+        ('aggregate_proficiency', 'INTEGER', 'aggregate_proficiency'),
+        ('target', 'INTEGER', 'assessmentVersion__target'),
+        ('met', 'BOOLEAN', 'met'),
+        ('override', 'BOOLEAN', 'override'),
+    ], changed_lookups=['', 'assessmentVersion__', 'assessmentVersion__slo__', 'assessmentVersion__report__']),
+    WarehouseTable('fact_slo_status', SLOStatus, [
+        ('status_id', 'INTEGER', 'pk'),
+        ('slo_version_id', 'INTEGER REFERENCES dim_slo_version', 'sloIR'),
+        ('slo_id', 'INTEGER REFERENCES dim_slo', 'sloIR__slo'),
+        ('program_id', 'INTEGER REFERENCES dim_program', 'sloIR__report__degreeProgram'),
+        ('year', 'INTEGER REFERENCES dim_year', 'sloIR__report__year'),
+        ('status', 'TEXT', 'status'),
+        ('override', 'BOOLEAN', 'override'),
+    ], changed_lookups=['', 'sloIR__', 'sloIR__report__']),
+    WarehouseTable('fact_rubric_grade', GradedRubricItem, [
+        ('graded_item_id', 'INTEGER', 'pk'),
+        ('rubric_item_id', 'INTEGER REFERENCES dim_rubric_item', 'item'),
+        ('report_id', 'INTEGER', 'rubric__report'),
+        ('program_id', 'INTEGER REFERENCES dim_program', 'rubric__report__degreeProgram'),
+        ('year', 'INTEGER REFERENCES dim_year', 'rubric__report__year'),
+        ('section', 'INTEGER', 'item__section'),
+        ('grade', 'TEXT', 'grade'),
+        ('complete', 'BOOLEAN', 'rubric__complete'),
+    ], queryset=lambda: GradedRubricItem.objects.filter(rubric__report__isnull=False).order_by('pk')),
+]
+#tables whose rows are removed by the tombstones of each model
+TOMBSTONE_TABLES = {
+    'SLOInReport': 'dim_slo_version',
+    'AssessmentVersion': 'dim_assessment_version',
+    'AssessmentData': 'fact_data',
+    'AssessmentAggregate': 'fact_aggregate',
+    'SLOStatus': 'fact_slo_status',
+}
+
+def copy_table(conn, table, since=None, batchSize=WAREHOUSE_BATCH_SIZE):
+    """
+    Copies the objects of a table to the warehouse a batch at a time
+
+    Args:
+        conn (sqlite3.Connection): connection to the warehouse
+        table (WarehouseTable): the table
+        since (datetime): time of the last refresh, None to copy every object
+        batchSize (int): number of rows fetched and inserted at a time
+    Returns:
+        int : number of rows written
+    """
+    if since is None or table.changed_lookups is None:
+        conn.execute("DELETE FROM %s" % table.name)
+        since = None
+    rows = table.get_queryset(since).values_list(*[lookup for _, _, lookup in table.columns])
+    insert = table.insert_sql()
+    written = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batchSize):
+        batch.append([sql_value(value) for value in row])
+        if len(batch) >= batchSize:
+            conn.executemany(insert, batch)
+            written += len(batch)
+            batch = []
+    conn.executemany(insert, batch)
+    return written+len(batch)
+
+def remove_deleted(conn, since):
+    """
+    Removes the rows of objects deleted since the last refresh
+
+    Args:
+        conn (sqlite3.Connection): connection to the warehouse
+        since (datetime): time of the last refresh
+    Returns:
+        int : number of tombstones applied
+    """
+    tombstones = DeletedRecord.objects.filter(deletedAt__gt=since, model__in=list(TOMBSTONE_TABLES))
+    applied = 0
+    for model, objectPk in tombstones.values_list('model', 'objectPk').iterator():
+        table = TOMBSTONE_TABLES[model]
+        conn.execute("DELETE FROM %s WHERE %s = ?" % (table, table_named(table).columns[0][0]), [objectPk])
+        applied += 1
+    return applied
+
+def table_named(name):
+    """
+    Gets a table of the warehouse by its name
+
+    Args:
+        name (str): name of the table
+    Returns:
+        WarehouseTable : the table
+    """
+    return next(table for table in WAREHOUSE_TABLES if table.name == name)
+
+def last_refresh(path):
+    """
+    Gets the time the warehouse was last refreshed
+
+    Args:
+        path (str): path of the database file
+    Returns:
+        datetime : time of the last refresh, None if the file is missing or has an older schema
+    """
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        state = dict(conn.execute("SELECT key, value FROM warehouse_state"))
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+    if state.get('schema_version') != WAREHOUSE_SCHEMA_VERSION:
+        return None
+    return parse_since(state.get('refreshed_at', ''))
+
+def build_warehouse(path, full=False, batchSize=WAREHOUSE_BATCH_SIZE):
+    """
+    Writes the warehouse, incrementally if it was built before
+
+    Args:
+        path (str): path of the database file
+        full (bool): whether to rebuild the whole database even if it could be refreshed
+        batchSize (int): number of rows fetched and inserted at a time
+    Returns:
+        dict : number of rows written to each table, and of tombstones applied when refreshed
+    Notes:
+        A full build is written to a new file which then replaces the old one, and a refresh is a single
+        transaction, so readers never see a partly written database. The refresh time is taken before
+        reading, so objects changed while it runs are copied again next time rather than missed.
+    """
+    refreshedAt = timezone.now()
+    since = None if full else last_refresh(path)
+    target = path if since is not None else path+".tmp"
+    if since is None and os.path.exists(target):
+        os.remove(target)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(target)
+    counts = {}
+    try:
+        with conn:
+            if since is None:
+                conn.execute("CREATE TABLE warehouse_state (key TEXT PRIMARY KEY, value TEXT)")
+                for table in WAREHOUSE_TABLES:
+                    conn.execute(table.create_sql())
+            else:
+                counts['tombstones'] = remove_deleted(conn, since)
+            for table in WAREHOUSE_TABLES:
+                counts[table.name] = copy_table(conn, table, since, batchSize)
+            conn.executemany("INSERT OR REPLACE INTO warehouse_state VALUES (?, ?)", [
+                ('schema_version', WAREHOUSE_SCHEMA_VERSION),
+                ('refreshed_at', refreshedAt.isoformat()),
+            ])
+    finally:
+        conn.close()
+    if target != path:
+        os.replace(target, path)
+    return counts